@@ -0,0 +1,125 @@
+"""partition operationlog by month
+
+Revision ID: 3b1f5c7e9a2d
+Revises: 638939984ef6
+Create Date: 2026-10-18 10:12:41.518320
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = '3b1f5c7e9a2d'
+down_revision = '638939984ef6'
+branch_labels = None
+depends_on = None
+
+# 预先创建的未来分区月数，之后由 app.crud.operation_log.maintain_operation_log_partitions 维护
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    "user_id, username, name, title, request_method, request_path, "
+    "request_query_params, response_status_code, id, created_at"
+)
+INDEXES = ("created_at", "title", "user_id", "username")
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_indexes():
+    for column in INDEXES:
+        op.create_index(
+            op.f(f'ix_operationlog_{column}'), 'operationlog', [column], unique=False
+        )
+
+
+def _drop_indexes():
+    for column in INDEXES:
+        op.drop_index(op.f(f'ix_operationlog_{column}'), table_name='operationlog')
+
+
+def upgrade():
+    _drop_indexes()
+    op.rename_table('operationlog', 'operationlog_old')
+    op.execute('ALTER TABLE operationlog_old RENAME CONSTRAINT operationlog_pkey TO operationlog_old_pkey')
+
+    # 分区键必须包含在主键中
+    op.create_table('operationlog',
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('username', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('title', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('request_method', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('request_path', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('request_query_params', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('response_status_code', sa.Integer(), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    # 兜底分区，避免缺少对应月份的分区时写入失败
+    op.execute('CREATE TABLE operationlog_default PARTITION OF operationlog DEFAULT')
+
+    conn = op.get_bind()
+    oldest = conn.execute(sa.text('SELECT min(created_at) FROM operationlog_old')).scalar()
+    today = date.today()
+    this_month = date(today.year, today.month, 1)
+    month = date(oldest.year, oldest.month, 1) if oldest else this_month
+    # 只迁移保留期内的数据，更早的数据迁移后也会被定期维护删除
+    if settings.OPERATION_LOG_RETENTION_MONTHS is not None:
+        month = max(month, _add_months(this_month, -settings.OPERATION_LOG_RETENTION_MONTHS))
+    last_month = _add_months(this_month, MONTHS_AHEAD)
+    # 为历史数据的每个月份创建分区，兜底分区中只留下超出范围的数据；按月分批复制
+    while month <= last_month:
+        start, end = f'{month:%Y-%m-%d}', f'{_add_months(month, 1):%Y-%m-%d}'
+        op.execute(
+            f"CREATE TABLE operationlog_p{month:%Y%m} PARTITION OF operationlog "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+        op.execute(
+            f'INSERT INTO operationlog ({COLUMNS}) SELECT {COLUMNS} FROM operationlog_old '
+            f"WHERE created_at >= '{start}' AND created_at < '{end}'"
+        )
+        month = _add_months(month, 1)
+    op.execute(
+        f'INSERT INTO operationlog ({COLUMNS}) SELECT {COLUMNS} FROM operationlog_old '
+        f"WHERE created_at >= '{month:%Y-%m-%d}'"
+    )
+    # 复制完成后再创建索引，避免逐行维护索引
+    _create_indexes()
+    op.drop_table('operationlog_old')
+
+
+def downgrade():
+    op.rename_table('operationlog', 'operationlog_partitioned')
+    for column in INDEXES:
+        op.execute(f'ALTER INDEX ix_operationlog_{column} RENAME TO ix_operationlog_partitioned_{column}')
+    op.execute('ALTER TABLE operationlog_partitioned RENAME CONSTRAINT operationlog_pkey TO operationlog_partitioned_pkey')
+
+    op.create_table('operationlog',
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('username', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('title', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('request_method', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('request_path', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('request_query_params', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('response_status_code', sa.Integer(), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(f'INSERT INTO operationlog ({COLUMNS}) SELECT {COLUMNS} FROM operationlog_partitioned')
+    # 分区表会连同所有分区一起删除
+    op.drop_table('operationlog_partitioned')
+    _create_indexes()
@@ -1,20 +1,37 @@
 import json
-from collections.abc import Generator, Sequence
-from typing import Annotated
+import math
+from collections.abc import AsyncGenerator, Awaitable, Callable, Generator, Sequence
+from typing import Annotated, Any, TypeVar
 
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, Form, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
 from fastapi.security import OAuth2PasswordBearer, SecurityScopes
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
-from app.core.db import engine
-from app.core.security import decode_token, oauth2_scopes
+from app.core.db import async_engine, async_replica_engine, engine, replica_engine
+from app.core.rate_limit import (
+    get_client_ip,
+    login_ip_limiter,
+    login_username_limiter,
+)
+from app.core.replica import is_recent_writer, mark_recent_write
+from app.core.security import decode_token, get_token_scopes, oauth2_scopes
+from app.crud.user import get_principal, get_principal_async
+from app.models.operation_log import OperationLogCursor
 from app.models.query import CommonSearchParam
 from app.models.security import TokenPayload
 from app.models.user import User
 
+T = TypeVar("T")
+
+# 可以读取只读副本的请求方法
+SAFE_METHODS = ("GET", "HEAD")
+
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token",
     scopes=oauth2_scopes,
@@ -26,25 +43,50 @@ def get_db() -> Generator[Session, None, None]:
         yield session
 
 
-SessionDep = Annotated[Session, Depends(get_db)]
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSession(async_engine) as session:
+        yield session
+
+
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-def get_current_user(
-    security_scopes: SecurityScopes,
-    session: SessionDep,
-    token: TokenDep,
-    request: Request,
-) -> User:
+def use_replica(request: Request, token: str) -> bool:
+    if replica_engine is engine or request.method not in SAFE_METHODS:
+        return False
+    token_data = decode_token_data(token)
+    # 刚写入过的用户读取主库，保证能读到自己的写入
+    return not (token_data.sub and is_recent_writer(int(token_data.sub)))
+
+
+def get_read_db(request: Request, token: TokenDep) -> Generator[Session, None, None]:
+    with Session(replica_engine if use_replica(request, token) else engine) as session:
+        yield session
+
+
+SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
+# 只读查询使用，已配置只读副本时 GET 请求读取副本
+ReadSessionDep = Annotated[Session, Depends(get_read_db)]
+
+
+def decode_token_data(token: str) -> TokenPayload:
     try:
         payload = decode_token(token)
-        token_data = TokenPayload(**payload)
-    except (InvalidTokenError, ValidationError):
+        return TokenPayload(sub=payload.get("sub"), scopes=get_token_scopes(payload))
+    except (InvalidTokenError, ValidationError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
+
+
+def check_current_user(
+    user: User | None,
+    token_data: TokenPayload,
+    security_scopes: SecurityScopes,
+    request: Request,
+) -> User:
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -68,6 +110,136 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    security_scopes: SecurityScopes,
+    session: SessionDep,
+    token: TokenDep,
+    request: Request,
+) -> User:
+    token_data = decode_token_data(token)
+    user = (
+        get_principal(session=session, user_id=int(token_data.sub), token=token)
+        if token_data.sub
+        else None
+    )
+    user = check_current_user(user, token_data, security_scopes, request)
+    if request.method not in SAFE_METHODS and user.id is not None:
+        mark_recent_write(session=session, user_id=user.id)
+    return user
+
+
+def get_current_active_superuser(
+    current_user: Annotated[User, Depends(get_current_user)],
+) -> User:
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=403, detail="The user doesn't have enough privileges"
+        )
+    return current_user
+
+
+async def get_current_user_async(
+    security_scopes: SecurityScopes,
+    session: AsyncSessionDep,
+    token: TokenDep,
+    request: Request,
+) -> User:
+    """
+    供异步路由使用，不占用线程池。返回的用户不能按需加载关联关系。
+    """
+    token_data = decode_token_data(token)
+    user = (
+        await get_principal_async(
+            session=session, user_id=int(token_data.sub), token=token
+        )
+        if token_data.sub
+        else None
+    )
+    return check_current_user(user, token_data, security_scopes, request)
+
+
+class ReadContext:
+    """
+    只读路由的上下文：当前用户及读取数据的会话。
+
+    路由名称在 settings.ASYNC_ROUTES 中时使用异步会话，不占用线程池；
+    否则在线程池中使用同步会话。路由只需实现一次，通过 call 调用 crud 函数。
+    """
+
+    def __init__(self, *, user: User, session: Session | AsyncSession) -> None:
+        self.user = user
+        self.session = session
+
+    async def call(
+        self,
+        sync_func: Callable[..., T],
+        async_func: Callable[..., Awaitable[T]],
+        /,
+        **kwargs: Any,
+    ) -> T:
+        if isinstance(self.session, AsyncSession):
+            return await async_func(session=self.session, **kwargs)
+        return await run_in_threadpool(sync_func, session=self.session, **kwargs)
+
+
+def is_async_route(request: Request) -> bool:
+    route = request.scope.get("route")
+    return isinstance(route, APIRoute) and route.name in settings.ASYNC_ROUTES
+
+
+async def get_read_context(
+    security_scopes: SecurityScopes, request: Request, token: TokenDep
+) -> AsyncGenerator[ReadContext, None]:
+    """
+    认证当前用户并创建只读会话，已配置只读副本时 GET 请求读取副本。
+    """
+    replica = use_replica(request, token)
+    if is_async_route(request):
+        async with AsyncSession(async_engine) as session:
+            user = await get_current_user_async(
+                security_scopes, session, token, request
+            )
+        async with AsyncSession(
+            async_replica_engine if replica else async_engine
+        ) as session:
+            yield ReadContext(user=user, session=session)
+        return
+
+    def authenticate() -> User:
+        with Session(engine) as session:
+            return get_current_user(security_scopes, session, token, request)
+
+    user = await run_in_threadpool(authenticate)
+    sync_session = Session(replica_engine if replica else engine)
+    try:
+        yield ReadContext(user=user, session=sync_session)
+    finally:
+        await run_in_threadpool(sync_session.close)
+
+
+async def check_login_rate_limit(
+    request: Request, username: Annotated[str, Form()]
+) -> None:
+    """
+    在事件循环中检查登录限流，被拒绝的请求不进入线程池，也不计算密码哈希。
+    """
+    client_ip = get_client_ip(
+        request.client.host if request.client else None,
+        request.headers.get("X-Forwarded-For"),
+    )
+    for limiter, key in [
+        (login_ip_limiter, client_ip),
+        (login_username_limiter, username),
+    ]:
+        retry_after = limiter.acquire(key)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
 def build_common_search_params(
     common_search: str | None = None,
 ) -> Sequence[CommonSearchParam]:
@@ -76,3 +248,16 @@ def build_common_search_params(
         if common_search
         else []
     )
+
+
+def build_operation_log_cursor(
+    cursor: str | None = Query(
+        None, description="Cursor returned as next_cursor by the previous page"
+    ),
+) -> OperationLogCursor | None:
+    if not cursor:
+        return None
+    try:
+        return OperationLogCursor.decode(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -4,17 +4,19 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordRequestForm
 
-from app.api.deps import SessionDep, get_current_user
+from app.api.deps import SessionDep, check_login_rate_limit, get_current_user
 from app.core import security
 from app.crud import security as crud
-from app.crud.user import get_user_permissions
+from app.crud.refresh_token import create_refresh_token, rotate_refresh_token
+from app.crud.user import get_cached_user_permissions, get_user_permissions
+from app.models.refresh_token import RefreshTokenRequest
 from app.models.security import Token
 from app.models.user import User, UserPublic
 
 router = APIRouter()
 
 
-@router.post("/login/access-token")
+@router.post("/login/access-token", dependencies=[Depends(check_login_rate_limit)])
 def access_token(
     *,
     request: Request,
@@ -31,9 +33,11 @@ def access_token(
         raise HTTPException(status_code=400, detail="Incorrect username or password")
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    assert user.id is not None
     permissions = get_user_permissions(session=session, user=user)
     token = Token(
-        access_token=security.create_access_token(user.id, scopes=permissions)
+        access_token=security.create_access_token(user.id, scopes=permissions),
+        refresh_token=create_refresh_token(session=session, user_id=user.id),
     )
     user.last_login_at = datetime.now()
     session.add(user)
@@ -43,6 +47,27 @@ def access_token(
     return token
 
 
+@router.post("/login/refresh-token")
+def refresh_token(
+    *, request: Request, session: SessionDep, body: RefreshTokenRequest
+) -> Token:
+    """
+    Exchange a refresh token for a new access token and refresh token
+    """
+    rotated = rotate_refresh_token(session=session, token=body.refresh_token)
+    if not rotated:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    user, new_refresh_token = rotated
+    # 不校验密码，权限集合从缓存中获取
+    permissions = get_cached_user_permissions(session=session, user=user)
+    # 提供给中间件使用
+    request.state.user = user
+    return Token(
+        access_token=security.create_access_token(user.id, scopes=permissions),
+        refresh_token=new_refresh_token,
+    )
+
+
 @router.post("/login/test-token", response_model=UserPublic)
 def test_token(
     *,
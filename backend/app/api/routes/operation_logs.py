@@ -5,15 +5,19 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Security
 
 from app.api.common import check_order_params
 from app.api.deps import (
+    ReadContext,
     SessionDep,
     build_common_search_params,
+    build_operation_log_cursor,
     get_current_user,
+    get_read_context,
 )
 from app.core.security import ApiPermissions
 from app.crud import operation_log as crud
 from app.models import Message
 from app.models.operation_log import (
     OperationLog,
+    OperationLogCursor,
     OperationLogPublic,
     OperationLogsPublic,
 )
@@ -22,38 +26,43 @@ from app.models.query import CommonSearchParam, OrderParams, PaginationParams
 router = APIRouter()
 
 
-@router.get(
-    "/",
-    dependencies=[
-        Security(
-            get_current_user, scopes=[ApiPermissions.V1_OPERATION_LOGS.value.read.name]
+def check_operation_logs_params(
+    order: OrderParams, cursor: OperationLogCursor | None
+) -> None:
+    check_order_params(OperationLog, order)
+    if cursor and order.order_by not in (None, "created_at"):
+        raise HTTPException(
+            status_code=400, detail="Cursor pagination requires ordering by created_at"
         )
-    ],
-    response_model=OperationLogsPublic,
-)
-def read_operation_logs(
-    session: SessionDep,
+
+
+@router.get("/", response_model=OperationLogsPublic)
+async def read_operation_logs(
+    context: ReadContext = Security(
+        get_read_context, scopes=[ApiPermissions.V1_OPERATION_LOGS.value.read.name]
+    ),
     pagination: PaginationParams = Depends(),
     order: OrderParams = Depends(),
     quick_search: str = Query(None, description="Quick search"),
     common_search: Sequence[CommonSearchParam] = Depends(build_common_search_params),
+    cursor: OperationLogCursor | None = Depends(build_operation_log_cursor),
 ) -> OperationLogsPublic:
     """
-    Read operation logs
+    Read operation logs. Pass the returned next_cursor as cursor to page by keyset instead of offset.
     """
-    check_order_params(OperationLog, order)
+    check_operation_logs_params(order, cursor)
 
-    logs = crud.get_operation_logs(
-        session=session,
+    return await context.call(
+        crud.get_operation_logs,
+        crud.get_operation_logs_async,
         pagination=pagination,
         order_by=order.order_by or "created_at",
         order_direction=order.order_direction,
         quick_search=quick_search,
         common_search=common_search,
+        cursor=cursor,
     )
 
-    return logs
-
 
 @router.get("/submit", dependencies=[Depends(get_current_user)])
 async def submit_operation_log(rule_name: str) -> Message:
@@ -63,20 +72,19 @@ async def submit_operation_log(rule_name: str) -> Message:
     return Message(message=f"Operation log for {rule_name} generated successfully")
 
 
-@router.get(
-    "/{id}",
-    dependencies=[
-        Security(
-            get_current_user, scopes=[ApiPermissions.V1_OPERATION_LOGS.value.read.name]
-        )
-    ],
-    response_model=OperationLogPublic,
-)
-def read_operation_log_by_id(id: uuid.UUID, session: SessionDep) -> OperationLogPublic:
+@router.get("/{id}", response_model=OperationLogPublic)
+async def read_operation_log_by_id(
+    id: uuid.UUID,
+    context: ReadContext = Security(
+        get_read_context, scopes=[ApiPermissions.V1_OPERATION_LOGS.value.read.name]
+    ),
+) -> OperationLogPublic:
     """
     Read a specific operation log by id.
     """
-    operation_log = session.get(OperationLog, id)
+    operation_log = await context.call(
+        crud.get_operation_log, crud.get_operation_log_async, id=id
+    )
     if not operation_log:
         raise HTTPException(status_code=404, detail="Operation log not found")
     return OperationLogPublic.model_validate(operation_log)
@@ -96,7 +104,7 @@ def delete_operation_log(session: SessionDep, id: uuid.UUID) -> Message:
     """
     Delete a specific operation log.
     """
-    operation_log = session.get(OperationLog, id)
+    operation_log = crud.get_operation_log(session=session, id=id)
     if not operation_log:
         raise HTTPException(status_code=404, detail="Operation log not found")
     crud.delete_operation_log(session=session, operation_log=operation_log)
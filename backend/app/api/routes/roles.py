@@ -1,28 +1,29 @@
+from collections.abc import Sequence
+
 from fastapi import APIRouter, Depends, HTTPException, Query, Security
 
 from app.api.common import check_order_params
 from app.api.deps import (
+    ReadContext,
     SessionDep,
+    build_common_search_params,
     get_current_user,
+    get_read_context,
 )
 from app.core.security import ApiPermissions
 from app.crud import role as crud
 from app.models import Message
-from app.models.query import OrderParams, PaginationParams
+from app.models.query import CommonSearchParam, OrderParams, PaginationParams
 from app.models.role import Role, RoleCreate, RolePublic, RolesPublic, RoleUpdate
 
 router = APIRouter()
 
 
-@router.get(
-    "/",
-    dependencies=[
-        Security(get_current_user, scopes=[ApiPermissions.V1_ROLES.value.read.name])
-    ],
-    response_model=RolesPublic,
-)
-def read_roles(
-    session: SessionDep,
+@router.get("/", response_model=RolesPublic)
+async def read_roles(
+    context: ReadContext = Security(
+        get_read_context, scopes=[ApiPermissions.V1_ROLES.value.read.name]
+    ),
     pagination: PaginationParams = Depends(),
     order: OrderParams = Depends(),
     quick_search: str = Query(None, description="Quick search"),
@@ -32,32 +33,30 @@ def read_roles(
     """
     check_order_params(Role, order)
 
-    roles = crud.get_roles(
-        session=session,
+    return await context.call(
+        crud.get_roles,
+        crud.get_roles_async,
         pagination=pagination,
         order_by=order.order_by or "id",
         order_direction=order.order_direction,
         quick_search=quick_search,
     )
 
-    return roles
-
 
-@router.get(
-    "/{id}",
-    dependencies=[
-        Security(get_current_user, scopes=[ApiPermissions.V1_ROLES.value.read.name])
-    ],
-    response_model=RolePublic,
-)
-def read_role(session: SessionDep, id: int) -> RolePublic:
+@router.get("/{id}", response_model=RolePublic)
+async def read_role(
+    id: int,
+    context: ReadContext = Security(
+        get_read_context, scopes=[ApiPermissions.V1_ROLES.value.read.name]
+    ),
+) -> RolePublic:
     """
     Read a role by id.
     """
-    role = session.get(Role, id)
+    role = await context.call(crud.get_role, crud.get_role_async, id=id)
     if not role:
         raise HTTPException(status_code=404, detail="Role not found")
-    return RolePublic.model_validate(role)
+    return role
 
 
 @router.post(
@@ -125,3 +124,24 @@ def delete_role(session: SessionDep, id: int) -> Message:
         raise HTTPException(status_code=404, detail="Role not found")
     crud.delete_role(session=session, role=role)
     return Message(message="Role deleted successfully")
+
+
+@router.delete(
+    "/",
+    dependencies=[
+        Security(get_current_user, scopes=[ApiPermissions.V1_ROLES.value.delete.name])
+    ],
+    response_model=Message,
+)
+def delete_roles(
+    session: SessionDep,
+    ids: list[int] | None = Query(None, description="Ids of the roles to delete"),
+    common_search: Sequence[CommonSearchParam] = Depends(build_common_search_params),
+) -> Message:
+    """
+    Delete roles by ids and/or common search in one transaction.
+    """
+    if ids is None and not common_search:
+        raise HTTPException(status_code=400, detail="ids or common_search is required")
+    count = crud.delete_roles(session=session, ids=ids, common_search=common_search)
+    return Message(message=f"{count} roles deleted successfully")
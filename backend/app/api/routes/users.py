@@ -4,15 +4,19 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Security
 
 from app.api.common import check_order_params
 from app.api.deps import (
+    ReadContext,
+    ReadSessionDep,
     SessionDep,
     build_common_search_params,
+    build_operation_log_cursor,
     get_current_user,
+    get_read_context,
 )
 from app.core.config import settings
 from app.core.security import ApiPermissions
 from app.crud import user as crud
 from app.models import Message
-from app.models.operation_log import OperationLogsPublic
+from app.models.operation_log import OperationLogCursor, OperationLogsPublic
 from app.models.query import CommonSearchParam, OrderParams, PaginationParams
 from app.models.user import (
     User,
@@ -30,15 +34,11 @@ from app.models.user import (
 router = APIRouter()
 
 
-@router.get(
-    "/",
-    dependencies=[
-        Security(get_current_user, scopes=[ApiPermissions.V1_USERS.value.read.name])
-    ],
-    response_model=UsersPublic,
-)
-def read_users(
-    session: SessionDep,
+@router.get("/", response_model=UsersPublic)
+async def read_users(
+    context: ReadContext = Security(
+        get_read_context, scopes=[ApiPermissions.V1_USERS.value.read.name]
+    ),
     pagination: PaginationParams = Depends(),
     order: OrderParams = Depends(),
     quick_search: str = Query(None, description="Quick search"),
@@ -49,8 +49,9 @@ def read_users(
     """
     check_order_params(User, order)
 
-    users = crud.get_users(
-        session=session,
+    return await context.call(
+        crud.get_users,
+        crud.get_users_async,
         pagination=pagination,
         order_by=order.order_by or "id",
         order_direction=order.order_direction,
@@ -58,12 +59,10 @@ def read_users(
         common_search=common_search,
     )
 
-    return users
-
 
 @router.get("/home", response_model=UserHome)
 def read_user_home(
-    session: SessionDep,
+    session: ReadSessionDep,
     current_user: User = Security(
         get_current_user, scopes=[ApiPermissions.V1_USERS_HOME.value.read.name]
     ),
@@ -76,25 +75,26 @@ def read_user_home(
 
 
 @router.get("/operation-logs", response_model=OperationLogsPublic)
-def read_user_operation_logs(
-    session: SessionDep,
-    current_user: User = Security(
-        get_current_user, scopes=[ApiPermissions.V1_USERS_ME.value.read.name]
+async def read_user_operation_logs(
+    context: ReadContext = Security(
+        get_read_context, scopes=[ApiPermissions.V1_USERS_ME.value.read.name]
     ),
     pagination: PaginationParams = Depends(),
+    cursor: OperationLogCursor | None = Depends(build_operation_log_cursor),
 ) -> OperationLogsPublic:
     """
-    Read current user operation logs.
+    Read current user operation logs. Pass the returned next_cursor as cursor to page by keyset instead of offset.
     """
-    if current_user.id is None:
+    if context.user.id is None:
         raise HTTPException(status_code=400, detail="Current user id is missing")
 
-    operation_logs = crud.get_user_logs(
-        session=session,
+    return await context.call(
+        crud.get_user_logs,
+        crud.get_user_logs_async,
         pagination=pagination,
-        user_id=current_user.id,
+        user_id=context.user.id,
+        cursor=cursor,
     )
-    return operation_logs
 
 
 @router.get("/me", response_model=UserMePublic)
@@ -126,7 +126,8 @@ def update_user_me(
     """
     Update own user.
     """
-    db_user = session.get(User, current_user.id)
+    # 当前用户可能来自缓存的快照，从数据库重新加载
+    db_user = session.get(User, current_user.id, populate_existing=True)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     crud.update_user_me(
@@ -152,7 +153,8 @@ def delete_user_me(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
 
-    user = session.get(User, current_user.id)
+    # 当前用户可能来自缓存的快照，从数据库重新加载
+    user = session.get(User, current_user.id, populate_existing=True)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
     crud.delete_user(session=session, user=user)
@@ -180,21 +182,20 @@ def register_user(session: SessionDep, user_in: UserRegister) -> Message:
     return Message(message="User registered successfully")
 
 
-@router.get(
-    "/{id}",
-    dependencies=[
-        Security(get_current_user, scopes=[ApiPermissions.V1_USERS.value.read.name])
-    ],
-    response_model=UserPublic,
-)
-def read_user_by_id(id: int, session: SessionDep) -> UserPublic:
+@router.get("/{id}", response_model=UserPublic)
+async def read_user_by_id(
+    id: int,
+    context: ReadContext = Security(
+        get_read_context, scopes=[ApiPermissions.V1_USERS.value.read.name]
+    ),
+) -> UserPublic:
     """
     Read a specific user by id.
     """
-    user = session.get(User, id)
+    user = await context.call(crud.get_user, crud.get_user_async, id=id)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return UserPublic.model_validate(user)
+    return user
 
 
 @router.post(
@@ -274,9 +275,41 @@ def delete_user(
     user = session.get(User, id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    if user == current_user:
+    if user.id == current_user.id:
         raise HTTPException(
             status_code=403, detail="Users are not allowed to delete themselves"
         )
     crud.delete_user(session=session, user=user)
     return Message(message="User deleted successfully")
+
+
+@router.delete(
+    "/",
+    response_model=Message,
+)
+def delete_users(
+    session: SessionDep,
+    ids: list[int] | None = Query(None, description="Ids of the users to delete"),
+    common_search: Sequence[CommonSearchParam] = Depends(build_common_search_params),
+    current_user: User = Security(
+        get_current_user, scopes=[ApiPermissions.V1_USERS.value.delete.name]
+    ),
+) -> Message:
+    """
+    Delete users by ids and/or common search in one transaction.
+    """
+    if ids is None and not common_search:
+        raise HTTPException(status_code=400, detail="ids or common_search is required")
+    if ids and current_user.id in ids:
+        raise HTTPException(
+            status_code=403, detail="Users are not allowed to delete themselves"
+        )
+    assert current_user.id is not None
+    count = crud.delete_users(
+        session=session,
+        ids=ids,
+        common_search=common_search,
+        # 按条件删除时跳过当前用户
+        exclude_ids=[current_user.id],
+    )
+    return Message(message=f"{count} users deleted successfully")
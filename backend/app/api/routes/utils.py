@@ -1,4 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_current_active_superuser
+from app.core.pool import admission_control, get_pool_metrics
+from app.models.pool import PoolsMetricsPublic
 
 router = APIRouter()
 
@@ -9,3 +13,17 @@ async def health_check() -> bool:
     Health check
     """
     return True
+
+
+@router.get(
+    "/pool-metrics/",
+    dependencies=[Depends(get_current_active_superuser)],
+    include_in_schema=False,
+)
+def read_pool_metrics() -> PoolsMetricsPublic:
+    """
+    Database connection pool metrics
+    """
+    return PoolsMetricsPublic(
+        data=get_pool_metrics(), rejected_requests=admission_control.rejected
+    )
@@ -0,0 +1,58 @@
+"""
+测量当前机器上不同 bcrypt cost 的哈希耗时，推荐不超过目标耗时的最大 cost（BCRYPT_ROUNDS）。
+
+    python -m app.benchmarks.bcrypt_rounds --target-ms 250
+"""
+
+import argparse
+import logging
+import statistics
+import time
+
+from passlib.hash import bcrypt
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MIN_ROUNDS = 4
+MAX_ROUNDS = 20
+
+
+def measure(rounds: int, repeat: int) -> float:
+    hasher = bcrypt.using(rounds=rounds)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hasher.hash("calibration")
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(*, target_ms: float, repeat: int) -> int:
+    recommended = MIN_ROUNDS
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        duration = measure(rounds, repeat)
+        logger.info(f"rounds {rounds:>2}: median {duration:.2f} ms")
+        if duration > target_ms:
+            break
+        recommended = rounds
+    return recommended
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    recommended = calibrate(target_ms=args.target_ms, repeat=args.repeat)
+    logger.info(
+        f"Recommended BCRYPT_ROUNDS={recommended} for a target of "
+        f"{args.target_ms:.0f} ms (current: {settings.BCRYPT_ROUNDS})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+对比 BaseHTTPMiddleware（@app.middleware("http")）与纯 ASGI 实现的操作日志中间件的吞吐量。
+
+    python -m app.benchmarks.middleware --requests 5000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from collections.abc import Awaitable, Callable, Sequence
+
+import httpx
+from fastapi import FastAPI, Request, Response
+
+from app.core.middleware import OperationLogMiddleware, build_operation_log
+from app.core.write_behind import WriteBehindQueue
+from app.models.operation_log import OperationLog
+
+logger = logging.getLogger(__name__)
+# 每个请求的日志会掩盖中间件的差异
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def discard(_operation_logs: Sequence[OperationLog]) -> None:
+    pass
+
+
+def build_queue() -> WriteBehindQueue[OperationLog]:
+    return WriteBehindQueue(
+        discard, max_size=100000, batch_size=1000, flush_interval=0.1
+    )
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping() -> dict[str, bool]:
+        return {"ok": True}
+
+    return app
+
+
+def build_base_http_app(queue: WriteBehindQueue[OperationLog]) -> FastAPI:
+    """
+    原实现的方式：通过 BaseHTTPMiddleware 包装每个请求。
+    """
+    app = build_app()
+
+    @app.middleware("http")
+    async def save_operation_log(
+        request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        response = await call_next(request)
+        operation_log = build_operation_log(request.scope, response.status_code)
+        if operation_log is not None:
+            await queue.put(operation_log)
+        return response
+
+    return app
+
+
+def build_asgi_app(queue: WriteBehindQueue[OperationLog]) -> FastAPI:
+    app = build_app()
+    app.add_middleware(OperationLogMiddleware, queue=queue)
+    return app
+
+
+async def measure(
+    build: Callable[[WriteBehindQueue[OperationLog]], FastAPI], requests: int
+) -> float:
+    queue = build_queue()
+    await queue.start()
+    transport = httpx.ASGITransport(app=build(queue))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        start = time.perf_counter()
+        for _ in range(requests):
+            await c.get("/ping")
+        duration = time.perf_counter() - start
+    await queue.stop()
+    return requests / duration
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, build in [
+        ("base_http", build_base_http_app),
+        ("asgi", build_asgi_app),
+    ]:
+        throughputs = [
+            asyncio.run(measure(build, args.requests)) for _ in range(args.repeat)
+        ]
+        logger.info(
+            f"{name:>9}: median {statistics.median(throughputs):.0f} req/s, "
+            f"max {max(throughputs):.0f} req/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
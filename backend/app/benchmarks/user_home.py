@@ -0,0 +1,171 @@
+"""
+对比用户主页统计新旧查询方式的耗时。
+
+    python -m app.benchmarks.user_home --rows 100000 --repeat 20
+"""
+
+import argparse
+import logging
+import random
+import statistics
+import time
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from sqlmodel import Session, case, col, delete, func, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.security import ApiPermissions, oauth2_scopes
+from app.crud import operation_log as operation_log_crud
+from app.crud import user as user_crud
+from app.crud.user_activity import LOGIN_PATH
+from app.models.operation_log import OperationLog
+from app.models.user import User, UserCreate
+from app.models.user_activity import UserDailyActivity, UserDailyMenuActivity
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 10000
+
+
+def get_user_home_legacy(*, session: Session, user: User) -> None:
+    """
+    原实现的查询方式：每个时间窗口一条 COUNT，每个明细窗口一条 GROUP BY。
+    """
+    today = date.today()
+    dt = func.date(OperationLog.created_at)
+    windows = [
+        [dt > today - timedelta(days=7)],
+        [dt <= today - timedelta(days=7), dt > today - timedelta(days=14)],
+        [dt > today - timedelta(days=30)],
+        [dt <= today - timedelta(days=30), dt > today - timedelta(days=60)],
+    ]
+    for where_clause in [[OperationLog.request_path == LOGIN_PATH], []]:
+        for window in windows:
+            statement = (
+                select(func.count())
+                .select_from(OperationLog)
+                .where(OperationLog.user_id == user.id, *window, *where_clause)
+            )
+            session.exec(statement).one()
+        for window in [windows[0], windows[2]]:
+            detail_statement = (
+                select(dt.label("dt"), func.count().label("count"))
+                .where(OperationLog.user_id == user.id, *window, *where_clause)
+                .group_by("dt")
+                .order_by("dt")
+            )
+            session.exec(detail_statement).all()
+    menus_statement = (
+        select(
+            case(
+                (
+                    col(OperationLog.name).in_(oauth2_scopes.keys()),
+                    func.split_part(OperationLog.name, ":", 1),
+                ),
+                else_=OperationLog.name,
+            ).label("menu"),
+            func.count().label("count"),
+        )
+        .where(
+            OperationLog.user_id == user.id,
+            *windows[2],
+            col(OperationLog.name).in_(
+                user_crud.get_user_permissions(session=session, user=user)
+            ),
+            col(OperationLog.response_status_code) >= 200,
+            col(OperationLog.response_status_code) < 300,
+            col(OperationLog.request_path).not_in(
+                settings.USER_HOME_FEATURES_EXCLUDE_PATHS
+            ),
+        )
+        .group_by("menu")
+        .order_by(func.count().desc())
+    )
+    session.exec(menus_statement).all()
+
+
+def seed(*, session: Session, rows: int) -> User:
+    user_in = UserCreate(
+        username=f"benchmark-{datetime.now():%Y%m%d%H%M%S}",
+        password="benchmark",
+        is_superuser=True,
+    )
+    user = user_crud.create_user(session=session, user_create=user_in)
+    names = [
+        ApiPermissions.V1_RULES.value.read.name,
+        ApiPermissions.V1_USERS.value.read.name,
+        ApiPermissions.V1_ROLES.value.read.name,
+    ]
+    now = datetime.now()
+    for start in range(0, rows, BATCH_SIZE):
+        operation_logs = []
+        for _ in range(min(BATCH_SIZE, rows - start)):
+            login = random.random() < 0.1
+            operation_logs.append(
+                OperationLog(
+                    user_id=user.id,
+                    username=user.username,
+                    name=None if login else random.choice(names),
+                    request_path=LOGIN_PATH if login else "/api/v1/benchmark",
+                    response_status_code=200,
+                    created_at=now - timedelta(seconds=random.randint(0, 90 * 86400)),
+                )
+            )
+        operation_log_crud.create_operation_logs(operation_logs)
+    return user
+
+
+def cleanup(*, session: Session, user: User) -> None:
+    session.execute(delete(OperationLog).where(col(OperationLog.user_id) == user.id))
+    session.execute(
+        delete(UserDailyActivity).where(col(UserDailyActivity.user_id) == user.id)
+    )
+    session.execute(
+        delete(UserDailyMenuActivity).where(
+            col(UserDailyMenuActivity.user_id) == user.id
+        )
+    )
+    session.delete(user)
+    session.commit()
+
+
+def measure(func: Callable[..., Any], repeat: int, **kwargs: Any) -> list[float]:
+    func(**kwargs)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(**kwargs)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        logger.info(f"Seeding {args.rows} operation logs")
+        user = seed(session=session, rows=args.rows)
+        try:
+            for name, func in [
+                ("legacy", get_user_home_legacy),
+                ("logs", user_crud.get_user_home_from_logs),
+                ("rollups", user_crud.get_user_home_from_rollups),
+            ]:
+                timings = measure(func, args.repeat, session=session, user=user)
+                logger.info(
+                    f"{name:>8}: median {statistics.median(timings):.2f} ms, "
+                    f"min {min(timings):.2f} ms"
+                )
+        finally:
+            cleanup(session=session, user=user)
+
+
+if __name__ == "__main__":
+    main()
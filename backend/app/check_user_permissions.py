@@ -0,0 +1,53 @@
+"""
+检查 userpermission 表与根据角色及规则实时计算的有效权限是否一致。
+
+    python app/check_user_permissions.py [--fix]
+"""
+
+import argparse
+import logging
+import sys
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.crud.user import publish_principals_invalidation
+from app.crud.user_permission import check_user_permissions, refresh_user_permissions
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def check(fix: bool = False) -> bool:
+    with Session(engine) as session:
+        mismatches = check_user_permissions(session=session)
+        for user_id, (missing, unexpected) in mismatches.items():
+            logger.warning(
+                f"User {user_id}: missing {sorted(missing)}, "
+                f"unexpected {sorted(unexpected)}"
+            )
+        if mismatches and fix:
+            refresh_user_permissions(session=session, user_ids=list(mismatches))
+            # 通知应用的工作进程清除缓存的权限集合
+            publish_principals_invalidation(session=session)
+            session.commit()
+            logger.info(f"Rebuilt permissions of {len(mismatches)} users")
+    return not mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--fix", action="store_true", help="Rebuild permissions of mismatched users"
+    )
+    args = parser.parse_args()
+
+    logger.info("Checking user permissions")
+    if check(fix=args.fix):
+        logger.info("User permissions are consistent")
+    elif not args.fix:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
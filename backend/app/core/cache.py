@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any, Generic, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    进程内的 LRU 缓存，条目在 ttl 秒后过期，超过 max_size 时淘汰最久未使用的条目。
+    """
+
+    def __init__(self, *, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": self.size}
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] <= time.monotonic():
+                if item is not None:
+                    del self._items[key]
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: K, value: V) -> None:
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete_where(self, predicate: Callable[[K], bool]) -> None:
+        with self._lock:
+            for key in [key for key in self._items if predicate(key)]:
+                del self._items[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+class VersionedCache(Generic[K, V]):
+    """
+    按数据版本号失效的缓存，读写时传入的版本号变化后清空所有条目。
+    """
+
+    def __init__(self, *, max_size: int) -> None:
+        self.max_size = max_size
+        self.version: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self._items: dict[K, V] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": self.size}
+
+    def get(self, version: int, key: K) -> V | None:
+        with self._lock:
+            if version != self.version or key not in self._items:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._items[key]
+
+    def set(self, version: int, key: K, value: V) -> None:
+        with self._lock:
+            if self.version is not None and version < self.version:
+                # 构建期间版本已更新，丢弃过期的结果
+                return
+            if version != self.version:
+                self._items.clear()
+                self.version = version
+            if key not in self._items and len(self._items) >= self.max_size:
+                self._items.pop(next(iter(self._items)))
+            self._items[key] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.version = None
+
+
+# 名称 -> 缓存，用于导出命中率等统计
+caches: dict[str, TTLCache[Any, Any] | VersionedCache[Any, Any]] = {}
+
+
+def register_cache(
+    name: str, cache: TTLCache[Any, Any] | VersionedCache[Any, Any]
+) -> None:
+    caches[name] = cache
@@ -32,8 +32,17 @@ class Settings(BaseSettings):
     )
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = secrets.token_urlsafe(32)
-    # 60 minutes * 24 hours * 1 days = 1 days
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 1
+    # 访问令牌过期后使用刷新令牌换取新令牌
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # 刷新令牌的有效期，刷新时轮换，不需要重新校验密码
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # 已使用的刷新令牌保留的天数，期间再次使用视为泄露并撤销整个 family，之后由定期维护删除
+    REFRESH_TOKEN_REUSE_DETECTION_DAYS: int = 7
+    # 定期删除过期的刷新令牌，单位：秒
+    REFRESH_TOKEN_PRUNE_INTERVAL: float = 60 * 60
+    # 访问令牌中的作用域以 oauth2_scopes 序号的位图编码，减小令牌体积；
+    # 仅保留 oauth2_scopes 中的作用域，旧格式的令牌仍然有效
+    COMPACT_TOKEN_SCOPES: bool = False
     FRONTEND_HOST: str = "http://localhost:5173"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
@@ -67,6 +76,42 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # 只读副本，未配置时所有查询使用主库
+    POSTGRES_REPLICA_SERVER: str | None = None
+    POSTGRES_REPLICA_PORT: int | None = None
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_REPLICA_DATABASE_URI(self) -> PostgresDsn | None:
+        if not self.POSTGRES_REPLICA_SERVER:
+            return None
+        return MultiHostUrl.build(
+            scheme="postgresql+psycopg",
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD,
+            host=self.POSTGRES_REPLICA_SERVER,
+            port=self.POSTGRES_REPLICA_PORT or self.POSTGRES_PORT,
+            path=self.POSTGRES_DB,
+        )
+
+    # 数据库连接池，单位：秒
+    POOL_SIZE: int = 20
+    POOL_MAX_OVERFLOW: int = 10
+    POOL_TIMEOUT: float = 30
+    # 准入控制：等待获取连接的请求数超过该值时直接返回 503（None 表示不限制），
+    # Retry-After 单位：秒
+    ADMISSION_MAX_WAITING: int | None = 20
+    ADMISSION_RETRY_AFTER: int = 1
+    ADMISSION_EXCLUDE_PATHS: Sequence[str] = [
+        "/metrics",
+        f"{API_V1_STR}/utils/health-check/",
+        f"{API_V1_STR}/utils/pool-metrics/",
+    ]
+
+    # 用户写入后在该时间内的读取仍使用主库，避免读到副本中尚未同步的数据，单位：秒
+    REPLICA_READ_YOUR_WRITES_WINDOW: float = 5.0
+    REPLICA_RECENT_WRITERS_MAX_SIZE: int = 10000
+
     TEST_USER: str = "test"
 
     FIRST_SUPERUSER: str
@@ -74,23 +119,104 @@ class Settings(BaseSettings):
 
     OPEN_REGISTRATION: bool = False
 
+    # 登录限流（令牌桶），分别按用户名和客户端 IP 限制：桶容量及每秒补充的令牌数
+    LOGIN_RATE_LIMIT_USERNAME_BURST: int = 10
+    LOGIN_RATE_LIMIT_USERNAME_RATE: float = 0.1
+    LOGIN_RATE_LIMIT_IP_BURST: int = 30
+    LOGIN_RATE_LIMIT_IP_RATE: float = 1.0
+    LOGIN_RATE_LIMIT_MAX_KEYS: int = 100000
+    # 受信任的反向代理地址（IP 或网段，逗号分隔），来自这些地址的请求按
+    # X-Forwarded-For 识别客户端 IP；部署在 Traefik 之后时需要配置
+    TRUSTED_PROXIES: Annotated[Sequence[str] | str, BeforeValidator(parse_cors)] = []
+    # bcrypt 的 cost，可通过 python -m app.benchmarks.bcrypt_rounds 按目标耗时校准；
+    # 修改后用户登录时自动按新的 cost 重新计算密码哈希
+    BCRYPT_ROUNDS: int = 12
+    # 密码哈希使用的独立线程池，等待中的任务超过 PASSWORD_HASHING_MAX_PENDING 时直接拒绝
+    PASSWORD_HASHING_WORKERS: int = 4
+    PASSWORD_HASHING_MAX_PENDING: int = 16
+
     LOG_EXCLUDE_PATHS: Sequence[str] = [
         "/docs",
+        "/metrics",
         f"{API_V1_STR}/openapi.json",
         f"{API_V1_STR}/utils/health-check/",
     ]
     LOG_STATIC_PATHS: dict[str, str] = {
         f"{API_V1_STR}/login/access-token": "登录",
         f"{API_V1_STR}/login/test-token": "测试Token",
+        f"{API_V1_STR}/login/refresh-token": "刷新Token",
         f"{API_V1_STR}/operation-logs/submit": "query_params.rule_name",
     }
     USER_HOME_FEATURES_EXCLUDE_PATHS: Sequence[str] = [
         f"{API_V1_STR}/login/access-token",
         f"{API_V1_STR}/login/test-token",
+        f"{API_V1_STR}/login/refresh-token",
         f"{API_V1_STR}/users/home",
         f"{API_V1_STR}/users/me",
         f"{API_V1_STR}/users/operation-logs",
     ]
+    # 主页统计读取每日活动汇总表，为 False 时直接统计操作日志
+    USER_HOME_FROM_ROLLUPS: bool = True
+
+    # 操作日志异步写入队列
+    OPERATION_LOG_QUEUE_MAX_SIZE: int = 10000
+    OPERATION_LOG_BATCH_SIZE: int = 500
+    # 单位：秒
+    OPERATION_LOG_FLUSH_INTERVAL: float = 1.0
+    # 队列满时的处理策略，sample 时按 OPERATION_LOG_SAMPLE_RATE 的概率保留新记录
+    OPERATION_LOG_OVERFLOW_POLICY: Literal["drop_oldest", "block", "sample"] = (
+        "drop_oldest"
+    )
+    OPERATION_LOG_SAMPLE_RATE: float = 0.1
+    # 操作日志列表最多计数的行数，超出时返回的总数为该值并标记 total_capped
+    # （None 表示精确计数，操作日志较多时每页都需要扫描全部匹配的行）
+    OPERATION_LOG_TOTAL_CAP: int | None = 10000
+    # 操作日志按月分区：预先创建的未来分区月数，及保留的月数（None 表示不删除）
+    OPERATION_LOG_PARTITION_MONTHS_AHEAD: int = 3
+    OPERATION_LOG_RETENTION_MONTHS: int | None = None
+    # 单位：秒
+    OPERATION_LOG_PARTITION_MAINTENANCE_INTERVAL: float = 60 * 60
+
+    # 已认证用户的缓存，单位：秒（为 0 时不缓存）
+    PRINCIPAL_CACHE_TTL: float = 30
+    PRINCIPAL_CACHE_MAX_SIZE: int = 1024
+    # 用户权限集合的缓存（刷新令牌时使用），用户、角色或规则变更时清除，单位：秒
+    USER_PERMISSIONS_CACHE_TTL: float = 300
+    # 规则树缓存：检查规则版本号的间隔（缓存失效监听断开时；监听正常时为 MAX_AGE，
+    # 兜底丢失的通知），单位：秒；按权限集合缓存的菜单树数量
+    RULE_CACHE_VERSION_CHECK_INTERVAL: float = 1.0
+    RULE_CACHE_VERSION_MAX_AGE: float = 60.0
+    RULE_CACHE_MAX_SIZE: int = 256
+    # 基于 LISTEN/NOTIFY 的跨进程缓存失效，单位：秒
+    CACHE_INVALIDATION_CHANNEL: str = "cache_invalidation"
+    CACHE_INVALIDATION_RECONNECT_INTERVAL: float = 5.0
+    CACHE_INVALIDATION_HEALTH_CHECK_INTERVAL: float = 30.0
+
+    # 记录每个请求执行的 SQL 语句数和耗时，写入 Server-Timing 响应头及日志
+    SQL_INSTRUMENTATION: bool = True
+    # 每个请求允许执行的 SQL 语句数（None 表示不限制），SQL_QUERY_BUDGETS 按路由名称覆盖；
+    # 严格模式下超出时抛出异常（用于测试），否则记录警告日志
+    SQL_QUERY_BUDGET: int | None = None
+    SQL_QUERY_BUDGETS: dict[str, int] = {
+        "read_users": 3,
+        "read_roles": 4,
+        "read_rules": 3,
+        "read_permissions": 3,
+        "read_user_home": 3,
+        "read_user_me": 5,
+        "read_user_operation_logs": 3,
+        "read_operation_logs": 3,
+        "read_operation_log_by_id": 2,
+    }
+    SQL_QUERY_BUDGET_STRICT: bool = False
+
+    # Prometheus 指标中缓存、连接池等进程内统计的同步间隔，单位：秒
+    METRICS_SAMPLE_INTERVAL: float = 5.0
+    # 访问 /metrics 需要携带的 Bearer 令牌，未设置时不提供指标
+    METRICS_TOKEN: str | None = None
+
+    # 使用异步实现的路由名称，这些路由不占用线程池，如 ["read_operation_logs"]
+    ASYNC_ROUTES: list[str] = []
 
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
@@ -1,16 +1,72 @@
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, create_engine, select
 
 from app.core.config import settings
+from app.core.instrumentation import instrument_engine
+from app.core.pool import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    instrument_pool,
+)
 from app.core.security import ApiPermissions
 from app.models.rule import MenuItemType, Rule, RuleCreate, RuleType
 from app.models.user import User, UserCreate
 
 engine = create_engine(
     str(settings.SQLALCHEMY_DATABASE_URI),
-    pool_size=20,
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.POOL_SIZE,
+    max_overflow=settings.POOL_MAX_OVERFLOW,
+    pool_timeout=settings.POOL_TIMEOUT,
     pool_recycle=300,
     pool_pre_ping=True,
 )
+# 异步路由使用的引擎，psycopg 同时支持同步和异步驱动
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=settings.POOL_SIZE,
+    max_overflow=settings.POOL_MAX_OVERFLOW,
+    pool_timeout=settings.POOL_TIMEOUT,
+    pool_recycle=300,
+    pool_pre_ping=True,
+)
+# 只读副本的引擎，未配置副本时使用主库的引擎
+if settings.SQLALCHEMY_REPLICA_DATABASE_URI:
+    replica_engine = create_engine(
+        str(settings.SQLALCHEMY_REPLICA_DATABASE_URI),
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.POOL_SIZE,
+        max_overflow=settings.POOL_MAX_OVERFLOW,
+        pool_timeout=settings.POOL_TIMEOUT,
+        pool_recycle=300,
+        pool_pre_ping=True,
+    )
+    async_replica_engine = create_async_engine(
+        str(settings.SQLALCHEMY_REPLICA_DATABASE_URI),
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.POOL_SIZE,
+        max_overflow=settings.POOL_MAX_OVERFLOW,
+        pool_timeout=settings.POOL_TIMEOUT,
+        pool_recycle=300,
+        pool_pre_ping=True,
+    )
+    instrument_pool(replica_engine, "replica")
+    instrument_pool(async_replica_engine.sync_engine, "async_replica")
+else:
+    replica_engine = engine
+    async_replica_engine = async_engine
+instrument_pool(engine, "primary")
+instrument_pool(async_engine.sync_engine, "async_primary")
+
+# 统计每个请求执行的 SQL 语句
+for _engine in {
+    engine,
+    replica_engine,
+    async_engine.sync_engine,
+    async_replica_engine.sync_engine,
+}:
+    instrument_engine(_engine)
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
@@ -45,6 +101,20 @@ def init_db(session: Session) -> None:
     # 初始化规则
     init_rule(session=session)
 
+    # 初始化操作日志分区
+    init_operation_log_partitions(session=session)
+
+
+def init_operation_log_partitions(session: Session) -> None:
+    # app.crud.operation_log 也依赖于 app.core.db，为了避免循环导入，在这个位置导入
+    from app.crud import operation_log as crud_operation_log
+
+    crud_operation_log.maintain_operation_log_partitions(
+        session=session,
+        months_ahead=settings.OPERATION_LOG_PARTITION_MONTHS_AHEAD,
+        retention_months=settings.OPERATION_LOG_RETENTION_MONTHS,
+    )
+
 
 def init_rule(session: Session) -> None:
     # app.crud.rule 也依赖于 app.core.db，为了避免循环导入，在这个位置导入app.crud.rule
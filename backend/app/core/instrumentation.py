@@ -0,0 +1,84 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+
+
+@dataclass
+class QueryStats:
+    """
+    单个请求执行的 SQL 语句统计，时间单位：秒。
+    """
+
+    count: int = 0
+    duration: float = 0.0
+    slowest_duration: float = 0.0
+    slowest_statement: str | None = None
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        if self.slowest_statement is None or duration > self.slowest_duration:
+            self.slowest_duration = duration
+            self.slowest_statement = statement
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.duration * 1000:.2f};desc="{self.count} queries", '
+            f"db-slowest;dur={self.slowest_duration * 1000:.2f}"
+        )
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+# 当前请求的统计，请求之外（后台任务等）为 None，不记录
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(
+    conn: Connection,
+    _cursor: Any,
+    _statement: str,
+    _parameters: Any,
+    _context: Any,
+    _executemany: bool,
+) -> None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    _cursor: Any,
+    statement: str,
+    _parameters: Any,
+    _context: Any,
+    _executemany: bool,
+) -> None:
+    duration = time.perf_counter() - conn.info["query_start_time"].pop()
+    stats = query_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def get_query_budget(route_name: str) -> int | None:
+    return settings.SQL_QUERY_BUDGETS.get(route_name, settings.SQL_QUERY_BUDGET)
+
+
+def check_query_budget(route_name: str, stats: QueryStats) -> None:
+    budget = get_query_budget(route_name)
+    if budget is not None and stats.count > budget:
+        raise QueryBudgetExceeded(
+            f"{route_name} executed {stats.count} queries, budget is {budget}"
+        )
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from collections.abc import Callable
+
+import psycopg
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+
+logger = logging.getLogger(__name__)
+
+# 通配键，表示清除该缓存的所有条目
+ALL_KEYS = "*"
+
+# 缓存名称 -> 失效处理函数，处理函数接收失效的键
+_handlers: dict[str, list[Callable[[str], None]]] = {}
+
+
+def register_invalidation_handler(name: str, handler: Callable[[str], None]) -> None:
+    _handlers.setdefault(name, []).append(handler)
+
+
+def publish_invalidation(*, session: Session, name: str, key: str = ALL_KEYS) -> None:
+    """
+    通过 pg_notify 通知所有工作进程清除缓存。通知在事务提交后才会送达，需要调用方提交事务。
+    """
+    session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": settings.CACHE_INVALIDATION_CHANNEL, "payload": f"{name}:{key}"},
+    )
+
+
+def dispatch_invalidation(name: str, key: str = ALL_KEYS) -> None:
+    for handler in _handlers.get(name, []):
+        try:
+            handler(key)
+        except Exception:
+            logger.exception(f"Failed to invalidate cache {name}:{key}")
+
+
+def dispatch_all_invalidations() -> None:
+    for name in list(_handlers):
+        dispatch_invalidation(name)
+
+
+class InvalidationListener:
+    """
+    监听缓存失效通知并清除本进程的缓存，断开后自动重连。
+
+    未连接期间缓存依赖各自的过期时间（TTL、版本号检查间隔）失效。
+    """
+
+    def __init__(
+        self,
+        *,
+        conninfo: str,
+        channel: str,
+        reconnect_interval: float,
+        health_check_interval: float,
+    ) -> None:
+        self.conninfo = conninfo
+        self.channel = channel
+        self.reconnect_interval = reconnect_interval
+        self.health_check_interval = health_check_interval
+        self.connected = False
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Cache invalidation listener disconnected")
+            finally:
+                self.connected = False
+            await asyncio.sleep(self.reconnect_interval)
+
+    async def _listen(self) -> None:
+        async with await psycopg.AsyncConnection.connect(
+            self.conninfo, autocommit=True, application_name=f"listen:{self.channel}"
+        ) as conn:
+            await conn.execute(f'LISTEN "{self.channel}"')
+            self.connected = True
+            # 未连接期间可能错过了通知，清除所有缓存
+            dispatch_all_invalidations()
+            while True:
+                async for notify in conn.notifies(timeout=self.health_check_interval):
+                    name, _, key = notify.payload.partition(":")
+                    dispatch_invalidation(name, key or ALL_KEYS)
+                # 定期检查连接，及时发现断开的连接
+                await conn.execute("SELECT 1")
+
+
+invalidation_listener = InvalidationListener(
+    conninfo=engine.url.set(drivername="postgresql").render_as_string(
+        hide_password=False
+    ),
+    channel=settings.CACHE_INVALIDATION_CHANNEL,
+    reconnect_interval=settings.CACHE_INVALIDATION_RECONNECT_INTERVAL,
+    health_check_interval=settings.CACHE_INVALIDATION_HEALTH_CHECK_INTERVAL,
+)
@@ -0,0 +1,138 @@
+import os
+import threading
+from typing import Any
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from app.core.cache import caches
+from app.core.pool import pool_metrics
+from app.core.write_behind import WriteBehindQueue
+
+# 设置 PROMETHEUS_MULTIPROC_DIR 环境变量后，多个工作进程通过该目录下的共享内存文件汇总指标，
+# 需要在进程启动前设置并清空该目录
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+HTTP_REQUESTS = Counter("http_requests", "HTTP requests", ["method", "route", "status"])
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"]
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests in progress",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+OPERATION_LOG_QUEUE_DEPTH = Gauge(
+    "operation_log_queue_depth",
+    "Operation logs waiting to be written",
+    multiprocess_mode="livesum",
+)
+OPERATION_LOG_RECORDS = Counter(
+    "operation_log_records", "Operation logs by write result", ["result"]
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests", "Cache lookups by result", ["cache", "result"]
+)
+CACHE_SIZE = Gauge(
+    "cache_size", "Cached entries", ["cache"], multiprocess_mode="livesum"
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Database pool connections by state",
+    ["pool", "state"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAITS = Counter("db_pool_waits", "Database pool checkouts", ["pool"])
+DB_POOL_WAIT_SECONDS = Counter(
+    "db_pool_wait_seconds", "Time spent waiting for a checkout", ["pool"]
+)
+DB_POOL_ERRORS = Counter(
+    "db_pool_errors", "Database pool checkout errors", ["pool", "error"]
+)
+
+
+def observe_request(method: str, route: str, status: int, duration: float) -> None:
+    HTTP_REQUESTS.labels(method, route, str(status)).inc()
+    HTTP_REQUEST_DURATION.labels(method, route).observe(duration)
+
+
+class MetricsSampler:
+    """
+    定期把进程内的统计（缓存、连接池、操作日志队列）同步到指标，计数类统计按增量累加。
+    """
+
+    def __init__(self) -> None:
+        self._last: dict[tuple[Any, ...], float] = {}
+        # /metrics 接口在线程池中采样，定期采样在事件循环中执行，需要加锁
+        self._lock = threading.Lock()
+
+    def _inc(self, counter: Counter, labels: tuple[str, ...], value: float) -> None:
+        key = (counter, labels)
+        delta = value - self._last.get(key, 0)
+        # 统计被重置（如连接池重建）时从新值开始累加
+        if delta < 0:
+            delta = value
+        if delta:
+            counter.labels(*labels).inc(delta)
+        self._last[key] = value
+
+    def sample(self, operation_log_queue: WriteBehindQueue[Any]) -> None:
+        with self._lock:
+            self._sample(operation_log_queue)
+
+    def _sample(self, operation_log_queue: WriteBehindQueue[Any]) -> None:
+        OPERATION_LOG_QUEUE_DEPTH.set(operation_log_queue.depth)
+        for result in ["written", "dropped", "failed"]:
+            self._inc(
+                OPERATION_LOG_RECORDS,
+                (result,),
+                getattr(operation_log_queue, result),
+            )
+
+        for name, cache in caches.items():
+            stats = cache.stats()
+            self._inc(CACHE_REQUESTS, (name, "hit"), stats["hits"])
+            self._inc(CACHE_REQUESTS, (name, "miss"), stats["misses"])
+            CACHE_SIZE.labels(name).set(stats["size"])
+
+        for engine, metrics in pool_metrics.values():
+            snapshot = metrics.snapshot(engine.pool)  # type: ignore[arg-type]
+            for state in ["size", "checked_out", "overflow", "waiting"]:
+                DB_POOL_CONNECTIONS.labels(snapshot.name, state).set(
+                    getattr(snapshot, state)
+                )
+            self._inc(DB_POOL_WAITS, (snapshot.name,), snapshot.wait_count)
+            self._inc(DB_POOL_WAIT_SECONDS, (snapshot.name,), snapshot.wait_seconds_sum)
+            self._inc(DB_POOL_ERRORS, (snapshot.name, "timeout"), snapshot.timeouts)
+            self._inc(
+                DB_POOL_ERRORS,
+                (snapshot.name, "pre_ping"),
+                snapshot.pre_ping_failures,
+            )
+
+
+metrics_sampler = MetricsSampler()
+
+
+def generate_metrics() -> bytes:
+    if not MULTIPROCESS:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+    return generate_latest(registry)
+
+
+def mark_process_dead() -> None:
+    """
+    工作进程退出时调用，清除该进程的 livesum 指标。
+    """
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())  # type: ignore[no-untyped-call]
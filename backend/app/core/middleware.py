@@ -0,0 +1,176 @@
+import json
+import logging
+import time
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders, QueryParams
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.instrumentation import (
+    QueryBudgetExceeded,
+    QueryStats,
+    check_query_budget,
+    query_stats,
+)
+from app.core.metrics import HTTP_REQUESTS_IN_PROGRESS, observe_request
+from app.core.pool import admission_control
+from app.core.write_behind import WriteBehindQueue
+from app.models.operation_log import OperationLog, OperationLogCreate
+
+logger = logging.getLogger(__name__)
+
+# 以下均为纯 ASGI 中间件，不读取、不缓冲响应体，不影响流式响应
+
+
+def build_operation_log(scope: Scope, status_code: int) -> OperationLog | None:
+    method, path = scope["method"], scope["path"]
+    if path in settings.LOG_EXCLUDE_PATHS or method == "OPTIONS":
+        return None
+
+    # 路由依赖写入 request.state 的用户信息
+    state = scope.get("state", {})
+    user = state.get("user")
+    if user:
+        user_id, username = user.id, user.username
+    else:
+        user_id, username = None, None
+
+    # 获取标题
+    query_params = QueryParams(scope["query_string"])
+    name, title = None, None
+    if path in settings.LOG_STATIC_PATHS.keys():
+        title = settings.LOG_STATIC_PATHS[path]
+        if title == "query_params.rule_name":
+            # 标题在写入时解析
+            name, title = query_params.get("rule_name"), None
+
+    else:
+        scopes = state.get("scopes", [])
+        if scopes:
+            name = scopes[0]
+
+    return OperationLog.model_validate(
+        OperationLogCreate(
+            user_id=user_id,
+            username=username,
+            name=name,
+            title=title,
+            request_method=method,
+            request_path=path,
+            request_query_params=json.dumps(query_params._dict, ensure_ascii=False),
+            response_status_code=status_code,
+        )
+    )
+
+
+class OperationLogMiddleware:
+    """
+    记录操作日志及请求指标，从 http.response.start 消息中获取响应状态码。
+    """
+
+    def __init__(self, app: ASGIApp, *, queue: WriteBehindQueue[OperationLog]) -> None:
+        self.app = app
+        self.queue = queue
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        method = scope["method"]
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+        # 按路由模板统计，如 /api/v1/users/{id}
+        route = getattr(scope.get("route"), "path_format", "unmatched")
+        observe_request(method, route, status_code, time.perf_counter() - start)
+
+        operation_log = build_operation_log(scope, status_code)
+        if operation_log is not None:
+            await self.queue.put(operation_log)
+
+
+class SQLInstrumentationMiddleware:
+    """
+    统计请求执行的 SQL 语句，写入 Server-Timing 响应头及日志，并检查语句数预算。
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.SQL_INSTRUMENTATION:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # 流式响应开始后执行的语句不计入响应头
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        token = query_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            query_stats.reset(token)
+
+        route = scope.get("route")
+        route_name = route.name if isinstance(route, APIRoute) else scope["path"]
+        message = (
+            f"{scope['method']} {route_name}: {stats.count} queries "
+            f"in {stats.duration * 1000:.2f}ms"
+        )
+        if stats.slowest_statement is not None:
+            message += (
+                f", slowest {stats.slowest_duration * 1000:.2f}ms: "
+                f"{stats.slowest_statement}"
+            )
+        logger.info(message)
+        try:
+            check_query_budget(route_name, stats)
+        except QueryBudgetExceeded as e:
+            if settings.SQL_QUERY_BUDGET_STRICT:
+                raise
+            logger.warning(str(e))
+
+
+class AdmissionControlMiddleware:
+    """
+    连接池等待过多时直接返回 503，应注册在 CORS 以内的最外层。
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] == "http"
+            and scope["path"] not in settings.ADMISSION_EXCLUDE_PATHS
+            and admission_control.should_reject()
+        ):
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Service temporarily overloaded"},
+                headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,137 @@
+import threading
+import time
+from collections.abc import Callable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.interfaces import ExceptionContext
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, QueuePool
+
+from app.core.config import settings
+from app.models.pool import PoolMetricsPublic
+
+# 获取连接等待时间的直方图分桶上限，单位：秒
+WAIT_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class PoolMetrics:
+    """
+    连接池的获取连接等待、超时及 pre-ping 失败统计。
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.waiting = 0
+        self.wait_count = 0
+        self.wait_sum = 0.0
+        self.wait_buckets = [0] * len(WAIT_TIME_BUCKETS)
+        self.timeouts = 0
+        self.pre_ping_failures = 0
+        self._lock = threading.Lock()
+
+    def get(self, do_get: Callable[[], ConnectionPoolEntry]) -> ConnectionPoolEntry:
+        with self._lock:
+            self.waiting += 1
+        start = time.perf_counter()
+        try:
+            return do_get()
+        except TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                self.waiting -= 1
+                self.wait_count += 1
+                self.wait_sum += duration
+                for i, bucket in enumerate(WAIT_TIME_BUCKETS):
+                    if duration <= bucket:
+                        self.wait_buckets[i] += 1
+                        break
+
+    def handle_error(self, context: ExceptionContext) -> None:
+        if context.is_pre_ping:
+            with self._lock:
+                self.pre_ping_failures += 1
+
+    def snapshot(self, pool: QueuePool) -> PoolMetricsPublic:
+        with self._lock:
+            cumulative, buckets = 0, {}
+            for bucket, count in zip(WAIT_TIME_BUCKETS, self.wait_buckets, strict=True):
+                cumulative += count
+                buckets[str(bucket)] = cumulative
+            buckets["+Inf"] = self.wait_count
+            return PoolMetricsPublic(
+                name=self.name,
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                overflow=max(pool.overflow(), 0),
+                waiting=self.waiting,
+                wait_count=self.wait_count,
+                wait_seconds_sum=self.wait_sum,
+                wait_seconds_buckets=buckets,
+                timeouts=self.timeouts,
+                pre_ping_failures=self.pre_ping_failures,
+            )
+
+
+class InstrumentedQueuePool(QueuePool):
+    metrics: PoolMetrics | None = None
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        if self.metrics is None:
+            return super()._do_get()
+        return self.metrics.get(super()._do_get)
+
+    def recreate(self) -> QueuePool:
+        # dispose() 时会重建连接池，保留统计
+        pool = super().recreate()
+        pool.metrics = self.metrics  # type: ignore[attr-defined]
+        return pool
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    pass
+
+
+# 名称 -> (引擎, 统计)
+pool_metrics: dict[str, tuple[Engine, PoolMetrics]] = {}
+
+
+def instrument_pool(engine: Engine, name: str) -> None:
+    metrics = PoolMetrics(name)
+    engine.pool.metrics = metrics  # type: ignore[attr-defined]
+    event.listen(engine, "handle_error", metrics.handle_error)
+    pool_metrics[name] = (engine, metrics)
+
+
+def get_pool_metrics() -> list[PoolMetricsPublic]:
+    return [
+        metrics.snapshot(engine.pool)  # type: ignore[arg-type]
+        for engine, metrics in pool_metrics.values()
+    ]
+
+
+def get_max_waiting() -> int:
+    return max((metrics.waiting for _, metrics in pool_metrics.values()), default=0)
+
+
+class AdmissionControl:
+    """
+    等待获取数据库连接的请求数超过 max_waiting 时拒绝新请求，避免请求堆积直到连接池超时。
+    """
+
+    def __init__(self, *, max_waiting: int | None) -> None:
+        self.max_waiting = max_waiting
+        self.rejected = 0
+
+    def should_reject(self) -> bool:
+        if self.max_waiting is None or get_max_waiting() <= self.max_waiting:
+            return False
+        self.rejected += 1
+        return True
+
+
+admission_control = AdmissionControl(max_waiting=settings.ADMISSION_MAX_WAITING)
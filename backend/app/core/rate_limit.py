@@ -0,0 +1,86 @@
+import ipaddress
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import settings
+
+
+class TokenBucketLimiter:
+    """
+    进程内的令牌桶限流，每个键最多 capacity 个令牌，每秒补充 rate 个，
+    超过 max_keys 时淘汰最久未使用的键。
+    """
+
+    def __init__(self, *, capacity: float, rate: float, max_keys: int) -> None:
+        self.capacity = capacity
+        self.rate = rate
+        self.max_keys = max_keys
+        self.rejected = 0
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> float:
+        """
+        获取一个令牌，成功时返回 0，否则返回需要等待的秒数。
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                self.rejected += 1
+                retry_after = (1 - tokens) / self.rate if self.rate > 0 else 60.0
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+# 登录限流，分别按用户名和客户端 IP 限制
+login_username_limiter = TokenBucketLimiter(
+    capacity=settings.LOGIN_RATE_LIMIT_USERNAME_BURST,
+    rate=settings.LOGIN_RATE_LIMIT_USERNAME_RATE,
+    max_keys=settings.LOGIN_RATE_LIMIT_MAX_KEYS,
+)
+login_ip_limiter = TokenBucketLimiter(
+    capacity=settings.LOGIN_RATE_LIMIT_IP_BURST,
+    rate=settings.LOGIN_RATE_LIMIT_IP_RATE,
+    max_keys=settings.LOGIN_RATE_LIMIT_MAX_KEYS,
+)
+
+
+trusted_proxies = [
+    ipaddress.ip_network(proxy, strict=False) for proxy in settings.TRUSTED_PROXIES
+]
+
+
+def is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in trusted_proxies)
+
+
+def get_client_ip(client_host: str | None, forwarded_for: str | None) -> str:
+    """
+    获取客户端 IP。直接连接的地址是受信任的代理时，从 X-Forwarded-For 中
+    从右向左取第一个不受信任的地址（左侧的地址可以由客户端伪造）。
+    """
+    host = client_host or "unknown"
+    if not forwarded_for or not is_trusted_proxy(host):
+        return host
+    for forwarded_host in reversed(forwarded_for.split(",")):
+        host = forwarded_host.strip()
+        if not is_trusted_proxy(host):
+            break
+    return host
@@ -0,0 +1,40 @@
+from sqlmodel import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.invalidation import (
+    ALL_KEYS,
+    publish_invalidation,
+    register_invalidation_handler,
+)
+
+RECENT_WRITERS_NAME = "recent_writer"
+
+# 最近写入过的用户，这些用户的读取使用主库
+recent_writers: TTLCache[int, bool] = TTLCache(
+    max_size=settings.REPLICA_RECENT_WRITERS_MAX_SIZE,
+    ttl=settings.REPLICA_READ_YOUR_WRITES_WINDOW,
+)
+
+
+def _handle_recent_write(key: str) -> None:
+    # 重连时的全量通知不对应具体用户，忽略
+    if key != ALL_KEYS:
+        recent_writers.set(int(key), True)
+
+
+register_invalidation_handler(RECENT_WRITERS_NAME, _handle_recent_write)
+
+
+def mark_recent_write(*, session: Session, user_id: int) -> None:
+    """
+    记录用户的写入，并通知其他工作进程。通知随 session 的事务提交送达，写入失败回滚时不会通知。
+    """
+    if not settings.SQLALCHEMY_REPLICA_DATABASE_URI:
+        return
+    recent_writers.set(user_id, True)
+    publish_invalidation(session=session, name=RECENT_WRITERS_NAME, key=str(user_id))
+
+
+def is_recent_writer(user_id: int) -> bool:
+    return recent_writers.get(user_id) is not None
@@ -1,7 +1,11 @@
-from collections.abc import Sequence
+import base64
+import hashlib
+import threading
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from enum import Enum
-from typing import Any
+from typing import Any, TypeVar
 
 import jwt
 from passlib.context import CryptContext
@@ -9,7 +13,56 @@ from passlib.context import CryptContext
 from app.core.config import settings
 from app.models.security import ApiPermission
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# cost 与 BCRYPT_ROUNDS 不同的哈希均需要更新
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+T = TypeVar("T")
+
+
+class PasswordHashingBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    """
+    在独立的有界线程池中计算密码哈希，限制 bcrypt 占用的 CPU，避免占满处理请求的共享线程池。
+    执行中及等待中的任务超过 max_workers + max_pending 时直接拒绝，不再排队。
+    """
+
+    def __init__(self, *, max_workers: int, max_pending: int) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hashing"
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+
+    def run(self, func: Callable[..., T], *args: Any) -> T:
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusy()
+
+        def task() -> T:
+            try:
+                return func(*args)
+            finally:
+                self._slots.release()
+
+        try:
+            future = self._executor.submit(task)
+        except BaseException:
+            self._slots.release()
+            raise
+        return future.result()
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASHING_WORKERS,
+    max_pending=settings.PASSWORD_HASHING_MAX_PENDING,
+)
 
 
 ALGORITHM = "HS256"
@@ -21,17 +74,33 @@ def create_access_token(subject: str | Any, scopes: Sequence[str] | None = None)
     expire = datetime.now(timezone.utc) + timedelta(
         minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
     )
-    to_encode = {"exp": expire, "sub": str(subject), "scopes": scopes}
+    to_encode: dict[str, Any] = {"exp": expire, "sub": str(subject)}
+    if settings.COMPACT_TOKEN_SCOPES:
+        to_encode["sb"] = encode_scopes(scopes)
+        to_encode["sv"] = SCOPES_VERSION
+    else:
+        to_encode["scopes"] = scopes
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.run(pwd_context.verify, plain_password, hashed_password)
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    校验密码，哈希需要更新（如 cost 变化）时同时返回新的哈希。
+    """
+    return password_hasher.run(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.run(pwd_context.hash, password)
 
 
 def decode_token(token: str) -> Any:
@@ -59,3 +128,36 @@ for p in ApiPermissions:
     oauth2_scopes[p.value.read.name] = p.value.read.description
     oauth2_scopes[p.value.update.name] = p.value.update.description
     oauth2_scopes[p.value.delete.name] = p.value.delete.description
+
+# 紧凑编码使用的作用域序号，版本号随 oauth2_scopes 的内容及顺序变化
+_scope_names = list(oauth2_scopes)
+_scope_indexes = {name: i for i, name in enumerate(_scope_names)}
+SCOPES_VERSION = hashlib.sha256("\n".join(_scope_names).encode()).hexdigest()[:8]
+
+
+def encode_scopes(scopes: Sequence[str]) -> str:
+    bits = 0
+    for scope in scopes:
+        index = _scope_indexes.get(scope)
+        if index is not None:
+            bits |= 1 << index
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def decode_scopes(encoded: str) -> frozenset[str]:
+    data = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+    bits = int.from_bytes(data, "little")
+    return frozenset(name for i, name in enumerate(_scope_names) if bits >> i & 1)
+
+
+def get_token_scopes(payload: dict[str, Any]) -> frozenset[str]:
+    """
+    解析令牌中的作用域，兼容紧凑编码和作用域列表两种格式。
+    """
+    if "sb" not in payload:
+        return frozenset(payload.get("scopes", []))
+    if payload.get("sv") != SCOPES_VERSION:
+        # 作用域注册表已变化，序号不再可靠，需要重新登录
+        return frozenset()
+    return decode_scopes(payload["sb"])
@@ -0,0 +1,141 @@
+import asyncio
+import contextlib
+import logging
+import random
+from collections import deque
+from collections.abc import Callable, Sequence
+from typing import Generic, Literal, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+OverflowPolicy = Literal["drop_oldest", "block", "sample"]
+
+
+class WriteBehindQueue(Generic[T]):
+    """
+    有界的进程内写入队列，后台任务按批次调用 sink 写入。
+
+    队列满时的处理策略：
+    - drop_oldest: 丢弃最旧的记录
+    - block: 等待后台任务腾出空间
+    - sample: 按 sample_rate 的概率保留新记录（替换最旧的记录），否则丢弃新记录
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[Sequence[T]], None],
+        *,
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        overflow_policy: OverflowPolicy = "drop_oldest",
+        sample_rate: float = 0.1,
+    ) -> None:
+        self.sink = sink
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.sample_rate = sample_rate
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._buffer: deque[T] = deque()
+        self._task: asyncio.Task[None] | None = None
+        self._closing = False
+        # 事件对象在 start() 中创建，以绑定到当前运行的事件循环
+        self._batch_ready: asyncio.Event | None = None
+        self._space_available: asyncio.Event | None = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._buffer)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._closing = False
+        self._batch_ready = asyncio.Event()
+        self._space_available = asyncio.Event()
+        self._space_available.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        停止后台任务，并写入队列中剩余的全部记录。
+        """
+        if self._task is None:
+            return
+        self._closing = True
+        if self._batch_ready is not None:
+            self._batch_ready.set()
+        if self._space_available is not None:
+            self._space_available.set()
+        await self._task
+        self._task = None
+
+    async def put(self, item: T) -> None:
+        # 后台任务未运行（如未触发 lifespan），直接写入
+        if not self.running or self._closing:
+            await self._write([item])
+            return
+
+        if len(self._buffer) >= self.max_size:
+            if self.overflow_policy == "block":
+                while len(self._buffer) >= self.max_size and self.running:
+                    assert self._space_available is not None
+                    self._space_available.clear()
+                    await self._space_available.wait()
+            elif self.overflow_policy == "sample":
+                if random.random() >= self.sample_rate:
+                    self.dropped += 1
+                    return
+                self._buffer.popleft()
+                self.dropped += 1
+            else:
+                self._buffer.popleft()
+                self.dropped += 1
+
+        self._buffer.append(item)
+        if len(self._buffer) >= self.batch_size and self._batch_ready is not None:
+            self._batch_ready.set()
+
+    async def _run(self) -> None:
+        assert self._batch_ready is not None
+        while not (self._closing and not self._buffer):
+            if len(self._buffer) < self.batch_size and not self._closing:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(
+                        self._batch_ready.wait(), timeout=self.flush_interval
+                    )
+            if not self._closing:
+                self._batch_ready.clear()
+            await self._flush()
+
+    async def _flush(self) -> None:
+        count = min(len(self._buffer), self.batch_size)
+        if count == 0:
+            return
+        batch = [self._buffer.popleft() for _ in range(count)]
+        if self._space_available is not None:
+            self._space_available.set()
+        await self._write(batch)
+
+    async def _write(self, batch: Sequence[T]) -> None:
+        try:
+            await run_in_threadpool(self.sink, batch)
+        except Exception:
+            self.failed += len(batch)
+            logger.exception("Failed to write %d queued records", len(batch))
+        else:
+            self.written += len(batch)
@@ -0,0 +1,22 @@
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from app.models.cache_version import CacheVersion
+
+
+def get_cache_version(*, session: Session, name: str) -> int:
+    statement = select(CacheVersion.version).where(CacheVersion.name == name)
+    return session.exec(statement).first() or 0
+
+
+def bump_cache_version(*, session: Session, name: str) -> None:
+    """
+    递增版本号。需要调用方提交事务，以便与数据变更一起生效。
+    """
+    statement = insert(CacheVersion).values(name=name, version=1)
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["name"],
+            set_={"version": CacheVersion.version + 1},
+        )
+    )
@@ -1,11 +1,22 @@
 from collections.abc import Sequence
 from datetime import datetime
+from typing import Any, TypeVar
 
-from sqlalchemy import true
+from sqlalchemy import literal, true
+from sqlalchemy.sql.base import ExecutableOption
 from sqlalchemy.sql.elements import ColumnElement
-from sqlmodel import SQLModel, or_
+from sqlmodel import Session, SQLModel, func, or_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select, SelectOfScalar
 
-from app.models.query import CommonSearchParam, Operator
+from app.models.query import (
+    CommonSearchParam,
+    Operator,
+    OrderDirection,
+    PaginationParams,
+)
+
+T = TypeVar("T", bound=SQLModel)
 
 
 def build_where_clause(
@@ -86,3 +97,187 @@ def handle_search_params(
                 )
             )
     return where_clause
+
+
+def build_order_by(
+    model_class: type[SQLModel], field: str, order_direction: OrderDirection
+) -> Sequence[ColumnElement[Any]]:
+    column = getattr(model_class, field)
+    return [column.desc() if order_direction == OrderDirection.desc else column.asc()]
+
+
+def build_page_statements(
+    *,
+    model_class: type[T],
+    where_clause: Sequence[ColumnElement[bool]],
+    order_by: Sequence[ColumnElement[Any]],
+    pagination: PaginationParams,
+    seek_clause: ColumnElement[bool] | None = None,
+    total_cap: int | None = None,
+    options: Sequence[ExecutableOption] = (),
+) -> tuple[SelectOfScalar[T], Select[tuple[T, int]], SelectOfScalar[int]]:
+    """
+    构建分页查询的语句：(不计数的分页查询, 附带总数的分页查询, 总数查询)。
+
+    不计数时多取一行，用于判断是否还有下一页。
+    """
+    page_where_clause = [*where_clause]
+    offset = (pagination.skip - 1) * pagination.limit
+    if seek_clause is not None:
+        page_where_clause.append(seek_clause)
+        offset = 0
+
+    if total_cap is None:
+        total_statement = (
+            select(func.count()).select_from(model_class).where(*where_clause)
+        )
+    else:
+        capped = (
+            select(literal(1))
+            .select_from(model_class)
+            .where(*where_clause)
+            .limit(total_cap + 1)
+            .subquery()
+        )
+        total_statement = select(func.count()).select_from(capped)
+
+    page_statement = (
+        select(model_class)
+        .options(*options)
+        .where(*page_where_clause)
+        .order_by(*order_by)
+        .offset(offset)
+        .limit(pagination.limit + 1)
+    )
+    counted_page_statement = (
+        select(model_class, total_statement.scalar_subquery())
+        .options(*options)
+        .where(*page_where_clause)
+        .order_by(*order_by)
+        .offset(offset)
+        .limit(pagination.limit)
+    )
+    return page_statement, counted_page_statement, total_statement
+
+
+def should_count_total(
+    pagination: PaginationParams, seek_clause: ColumnElement[bool] | None
+) -> bool:
+    # 未指定时按游标分页不计数，游标分页通常用于大表，避免每页执行完整的 COUNT
+    if pagination.with_total is None:
+        return seek_clause is None
+    return pagination.with_total
+
+
+def build_page(
+    items: Sequence[T],
+    total: int | None,
+    *,
+    pagination: PaginationParams,
+    seek_clause: ColumnElement[bool] | None = None,
+    total_cap: int | None = None,
+) -> tuple[Sequence[T], int, bool]:
+    if total is None:
+        # 未计数，items 多取了一行；总数只是已知的下限，始终标记为下限：
+        # 按游标分页时不知道游标之前的行数，超出末页时不知道实际的行数
+        has_more = len(items) > pagination.limit
+        items = items[: pagination.limit]
+        if not items:
+            return items, 0, True
+        offset = (
+            0 if seek_clause is not None else (pagination.skip - 1) * pagination.limit
+        )
+        return items, offset + len(items) + int(has_more), True
+    if total_cap is not None and total > total_cap:
+        return items, total_cap, True
+    return items, total, False
+
+
+def get_page(
+    *,
+    session: Session,
+    model_class: type[T],
+    where_clause: Sequence[ColumnElement[bool]],
+    order_by: Sequence[ColumnElement[Any]],
+    pagination: PaginationParams,
+    seek_clause: ColumnElement[bool] | None = None,
+    total_cap: int | None = None,
+    options: Sequence[ExecutableOption] = (),
+) -> tuple[Sequence[T], int, bool]:
+    """
+    在一条语句中查询一页数据和总数，返回 (数据, 总数, 总数是否为下限)。
+
+    总数作为不相关子查询随分页查询一起执行。total_cap 限制最多计数的行数，
+    超出时总数为 total_cap；pagination.with_total 为 False（未指定时按游标分页）时不计数，
+    总数为已知的下限（没有数据时为 0），总数始终标记为下限。传入 seek_clause 时按游标分页，忽略 pagination.skip。
+    options 用于批量加载关联关系，如 selectinload。
+    """
+    page_statement, counted_page_statement, total_statement = build_page_statements(
+        model_class=model_class,
+        where_clause=where_clause,
+        order_by=order_by,
+        pagination=pagination,
+        seek_clause=seek_clause,
+        total_cap=total_cap,
+        options=options,
+    )
+
+    if not should_count_total(pagination, seek_clause):
+        items = session.exec(page_statement).all()
+        return build_page(items, None, pagination=pagination, seek_clause=seek_clause)
+
+    rows = session.exec(counted_page_statement).all()
+    if rows:
+        total = rows[0][1]
+    else:
+        # 当前页没有数据时，总数需要单独查询
+        total = session.exec(total_statement).one()
+    return build_page(
+        [item for item, _ in rows],
+        total,
+        pagination=pagination,
+        seek_clause=seek_clause,
+        total_cap=total_cap,
+    )
+
+
+async def get_page_async(
+    *,
+    session: AsyncSession,
+    model_class: type[T],
+    where_clause: Sequence[ColumnElement[bool]],
+    order_by: Sequence[ColumnElement[Any]],
+    pagination: PaginationParams,
+    seek_clause: ColumnElement[bool] | None = None,
+    total_cap: int | None = None,
+    options: Sequence[ExecutableOption] = (),
+) -> tuple[Sequence[T], int, bool]:
+    """
+    get_page 的异步版本。
+    """
+    page_statement, counted_page_statement, total_statement = build_page_statements(
+        model_class=model_class,
+        where_clause=where_clause,
+        order_by=order_by,
+        pagination=pagination,
+        seek_clause=seek_clause,
+        total_cap=total_cap,
+        options=options,
+    )
+
+    if not should_count_total(pagination, seek_clause):
+        items = (await session.exec(page_statement)).all()
+        return build_page(items, None, pagination=pagination, seek_clause=seek_clause)
+
+    rows = (await session.exec(counted_page_statement)).all()
+    if rows:
+        total = rows[0][1]
+    else:
+        total = (await session.exec(total_statement)).one()
+    return build_page(
+        [item for item, _ in rows],
+        total,
+        pagination=pagination,
+        seek_clause=seek_clause,
+        total_cap=total_cap,
+    )
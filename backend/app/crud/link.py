@@ -0,0 +1,68 @@
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy import ARRAY, Integer, any_, func, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, SQLModel, col, delete, select
+
+from app.models.role import Role
+from app.models.rule import Rule
+from app.models.user import User
+
+
+def id_array(ids: Iterable[int]) -> Any:
+    # 以单个数组参数传递ID，不受语句参数个数的限制
+    return literal(sorted(ids), ARRAY(Integer))
+
+
+def get_existing_ids(
+    *,
+    session: Session,
+    model_class: type[Role] | type[Rule] | type[User],
+    ids: Iterable[int] | None,
+) -> set[int]:
+    """
+    用一条查询过滤出存在的记录ID，忽略不存在的ID。
+    """
+    ids = set(ids or [])
+    if not ids:
+        return set()
+    statement = select(model_class.id).where(col(model_class.id) == any_(id_array(ids)))
+    return {id for id in session.exec(statement).all() if id is not None}
+
+
+def set_links(
+    *,
+    session: Session,
+    link_model: type[SQLModel],
+    owner_field: str,
+    owner_id: int,
+    target_field: str,
+    target_ids: set[int],
+) -> tuple[set[int], set[int]]:
+    """
+    将 owner 关联的目标更新为 target_ids，只写入差异：一条批量 INSERT 及一条批量 DELETE。
+    返回 (新增的目标ID, 删除的目标ID)。需要调用方提交事务，
+    已加载的关联关系不会更新，提交事务后重新加载。
+    """
+    owner_column: Any = col(getattr(link_model, owner_field))
+    target_column: Any = col(getattr(link_model, target_field))
+    statement = select(target_column).where(owner_column == owner_id)
+    existing_ids = set(session.exec(statement).all())
+    added, removed = target_ids - existing_ids, existing_ids - target_ids
+    if removed:
+        session.execute(
+            delete(link_model).where(
+                owner_column == owner_id, target_column == any_(id_array(removed))
+            )
+        )
+    if added:
+        session.execute(
+            insert(link_model)
+            .from_select(
+                [owner_field, target_field],
+                select(literal(owner_id), func.unnest(id_array(added))),
+            )
+            .on_conflict_do_nothing()
+        )
+    return added, removed
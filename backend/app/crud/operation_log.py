@@ -1,12 +1,26 @@
+import uuid
 from collections.abc import Sequence
+from datetime import date
+from typing import Any
 
-from sqlmodel import Session, func, select
+from sqlalchemy import insert, literal, text, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.config import settings
 from app.core.db import engine
-from app.crud.common import handle_search_params
+from app.crud.common import (
+    build_order_by,
+    get_page,
+    get_page_async,
+    handle_search_params,
+)
+from app.crud.user_activity import add_user_activities
 from app.models.operation_log import (
     OperationLog,
     OperationLogCreate,
+    OperationLogCursor,
     OperationLogPublic,
     OperationLogsPublic,
 )
@@ -16,21 +30,83 @@ from app.models.query import (
     PaginationParams,
 )
 
+# 按月分区的分区表名前缀，如 operationlog_p202601
+PARTITION_PREFIX = "operationlog_p"
+# 分区维护使用的 advisory lock，避免多个进程同时维护分区
+PARTITION_MAINTENANCE_LOCK_ID = 7203124001
+
 
 def create_operation_log(operation_log_create: OperationLogCreate) -> OperationLog:
     db_obj = OperationLog.model_validate(operation_log_create)
     with Session(engine) as session:
         session.add(db_obj)
+        add_user_activities(session=session, operation_logs=[db_obj])
         session.commit()
         session.refresh(db_obj)
     return db_obj
 
 
+def create_operation_logs(operation_logs: Sequence[OperationLog]) -> None:
+    if not operation_logs:
+        return
+    # 多行 INSERT 批量写入
+    with Session(engine) as session:
+        session.execute(
+            insert(OperationLog), [log.model_dump() for log in operation_logs]
+        )
+        add_user_activities(session=session, operation_logs=operation_logs)
+        session.commit()
+
+
+def get_operation_log(*, session: Session, id: uuid.UUID) -> OperationLog | None:
+    statement = select(OperationLog).where(OperationLog.id == id)
+    return session.exec(statement).first()
+
+
+async def get_operation_log_async(
+    *, session: AsyncSession, id: uuid.UUID
+) -> OperationLog | None:
+    statement = select(OperationLog).where(OperationLog.id == id)
+    return (await session.exec(statement)).first()
+
+
 def delete_operation_log(*, session: Session, operation_log: OperationLog) -> None:
     session.delete(operation_log)
+    add_user_activities(session=session, operation_logs=[operation_log], sign=-1)
     session.commit()
 
 
+def build_operation_log_order_by(
+    order_direction: OrderDirection,
+) -> Sequence[ColumnElement[Any]]:
+    created_at, id = col(OperationLog.created_at), col(OperationLog.id)
+    if order_direction == OrderDirection.desc:
+        return [created_at.desc(), id.desc()]
+    return [created_at.asc(), id.asc()]
+
+
+def build_operation_log_seek_clause(
+    cursor: OperationLogCursor | None, order_direction: OrderDirection
+) -> ColumnElement[bool] | None:
+    """
+    游标分页的条件，按 (created_at, id) 的行比较定位到上一页之后。
+    """
+    if cursor is None:
+        return None
+    key = tuple_(col(OperationLog.created_at), col(OperationLog.id))
+    position = tuple_(literal(cursor.created_at), literal(cursor.id))
+    return key < position if order_direction == OrderDirection.desc else key > position
+
+
+def build_next_cursor(
+    logs: Sequence[OperationLog], pagination: PaginationParams
+) -> str | None:
+    if len(logs) < pagination.limit:
+        return None
+    last = logs[-1]
+    return OperationLogCursor(created_at=last.created_at, id=last.id).encode()
+
+
 def get_operation_logs(
     *,
     session: Session,
@@ -39,29 +115,176 @@ def get_operation_logs(
     order_direction: OrderDirection,
     quick_search: str,
     common_search: Sequence[CommonSearchParam],
+    cursor: OperationLogCursor | None = None,
 ) -> OperationLogsPublic:
     where_clause = handle_search_params(
         OperationLog, quick_search, ["title"], common_search
     )
 
-    total_statement = (
-        select(func.count()).select_from(OperationLog).where(*where_clause)
+    # 按 created_at 排序时支持游标分页
+    keyset = order_by == "created_at"
+    logs, total, total_capped = get_page(
+        session=session,
+        model_class=OperationLog,
+        where_clause=where_clause,
+        order_by=(
+            build_operation_log_order_by(order_direction)
+            if keyset
+            else build_order_by(OperationLog, order_by, order_direction)
+        ),
+        pagination=pagination,
+        seek_clause=(
+            build_operation_log_seek_clause(cursor, order_direction) if keyset else None
+        ),
+        total_cap=settings.OPERATION_LOG_TOTAL_CAP,
     )
-    total = session.exec(total_statement).one()
-
-    statement = (
-        select(OperationLog)
-        .where(*where_clause)
-        .order_by(
-            getattr(OperationLog, order_by).desc()
-            if order_direction == OrderDirection.desc
-            else getattr(OperationLog, order_by).asc()
-        )
-        .offset((pagination.skip - 1) * pagination.limit)
-        .limit(pagination.limit)
+
+    return OperationLogsPublic(
+        data=[OperationLogPublic.model_validate(log) for log in logs],
+        total=total,
+        total_capped=total_capped,
+        next_cursor=build_next_cursor(logs, pagination) if keyset else None,
+    )
+
+
+async def get_operation_logs_async(
+    *,
+    session: AsyncSession,
+    pagination: PaginationParams,
+    order_by: str,
+    order_direction: OrderDirection,
+    quick_search: str,
+    common_search: Sequence[CommonSearchParam],
+    cursor: OperationLogCursor | None = None,
+) -> OperationLogsPublic:
+    where_clause = handle_search_params(
+        OperationLog, quick_search, ["title"], common_search
+    )
+
+    keyset = order_by == "created_at"
+    logs, total, total_capped = await get_page_async(
+        session=session,
+        model_class=OperationLog,
+        where_clause=where_clause,
+        order_by=(
+            build_operation_log_order_by(order_direction)
+            if keyset
+            else build_order_by(OperationLog, order_by, order_direction)
+        ),
+        pagination=pagination,
+        seek_clause=(
+            build_operation_log_seek_clause(cursor, order_direction) if keyset else None
+        ),
+        total_cap=settings.OPERATION_LOG_TOTAL_CAP,
     )
-    logs = session.exec(statement).all()
 
     return OperationLogsPublic(
-        data=[OperationLogPublic.model_validate(log) for log in logs], total=total
+        data=[OperationLogPublic.model_validate(log) for log in logs],
+        total=total,
+        total_capped=total_capped,
+        next_cursor=build_next_cursor(logs, pagination) if keyset else None,
     )
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def is_operation_log_partitioned(*, session: Session) -> bool:
+    statement = text(
+        "SELECT 1 FROM pg_partitioned_table "
+        "WHERE partrelid = to_regclass('operationlog')"
+    )
+    return session.execute(statement).first() is not None
+
+
+def get_operation_log_partitions(*, session: Session) -> dict[date, str]:
+    statement = text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('operationlog')"
+    )
+    partitions = {}
+    for (name,) in session.execute(statement).all():
+        suffix = name.removeprefix(PARTITION_PREFIX)
+        if name.startswith(PARTITION_PREFIX) and len(suffix) == 6 and suffix.isdigit():
+            partitions[date(int(suffix[:4]), int(suffix[4:]), 1)] = name
+    return partitions
+
+
+def create_operation_log_partition(*, session: Session, month: date) -> str:
+    """
+    创建 month 所在月份的分区，并迁入兜底分区中该月份的数据。需要调用方提交事务。
+    """
+    month = month.replace(day=1)
+    name = f"{PARTITION_PREFIX}{month:%Y%m}"
+    start, end = f"{month:%Y-%m-%d}", f"{_add_months(month, 1):%Y-%m-%d}"
+    session.execute(
+        text(
+            f"CREATE TABLE {name} "
+            "(LIKE operationlog INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+    )
+    session.execute(
+        text(
+            "WITH moved AS (DELETE FROM operationlog_default "
+            f"WHERE created_at >= '{start}' AND created_at < '{end}' RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        )
+    )
+    session.execute(
+        text(
+            f"ALTER TABLE operationlog ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    )
+    return name
+
+
+def drop_expired_operation_log_partitions(
+    *, session: Session, retention_months: int
+) -> Sequence[str]:
+    """
+    删除整月都早于保留期的分区，及兜底分区中早于保留期的数据。需要调用方提交事务。
+    """
+    today = date.today()
+    cutoff = _add_months(date(today.year, today.month, 1), -retention_months)
+    dropped = []
+    for month, name in sorted(get_operation_log_partitions(session=session).items()):
+        if _add_months(month, 1) <= cutoff:
+            session.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    # 对应分区删除后写入的过期数据会落在兜底分区
+    session.execute(
+        text(f"DELETE FROM operationlog_default WHERE created_at < '{cutoff:%Y-%m-%d}'")
+    )
+    return dropped
+
+
+def maintain_operation_log_partitions(
+    *, session: Session, months_ahead: int, retention_months: int | None = None
+) -> None:
+    """
+    创建当前及未来 months_ahead 个月的分区，并按 retention_months 删除过期分区。
+    """
+    if not is_operation_log_partitioned(session=session):
+        return
+    locked = session.execute(
+        text("SELECT pg_try_advisory_xact_lock(:id)"),
+        {"id": PARTITION_MAINTENANCE_LOCK_ID},
+    ).scalar()
+    if not locked:
+        return
+
+    partitions = get_operation_log_partitions(session=session)
+    today = date.today()
+    this_month = date(today.year, today.month, 1)
+    for i in range(months_ahead + 1):
+        month = _add_months(this_month, i)
+        if month not in partitions:
+            create_operation_log_partition(session=session, month=month)
+    if retention_months is not None:
+        drop_expired_operation_log_partitions(
+            session=session, retention_months=retention_months
+        )
+    session.commit()
@@ -0,0 +1,107 @@
+import hashlib
+import logging
+import secrets
+import uuid
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, col, delete, or_, select, update
+
+from app.core.config import settings
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+def hash_refresh_token(token: str) -> str:
+    # 令牌本身是高熵随机串，使用 sha256 即可，无需 bcrypt
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def create_refresh_token(
+    *, session: Session, user_id: int, family_id: uuid.UUID | None = None
+) -> str:
+    """
+    创建刷新令牌，返回令牌明文。需要调用方提交事务。
+    """
+    token = secrets.token_urlsafe(32)
+    session.add(
+        RefreshToken(
+            user_id=user_id,
+            family_id=family_id or uuid.uuid4(),
+            token_hash=hash_refresh_token(token),
+            expires_at=datetime.now()
+            + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+    )
+    return token
+
+
+def revoke_refresh_tokens(
+    *, session: Session, user_id: int | None = None, family_id: uuid.UUID | None = None
+) -> None:
+    """
+    撤销用户或 family 的所有刷新令牌。需要调用方提交事务。
+    """
+    statement = update(RefreshToken).where(col(RefreshToken.revoked_at).is_(None))
+    if user_id is not None:
+        statement = statement.where(col(RefreshToken.user_id) == user_id)
+    if family_id is not None:
+        statement = statement.where(col(RefreshToken.family_id) == family_id)
+    session.execute(statement.values(revoked_at=datetime.now()))
+
+
+def rotate_refresh_token(*, session: Session, token: str) -> tuple[User, str] | None:
+    """
+    使用刷新令牌换取新的刷新令牌，返回 (用户, 新令牌明文)，令牌无效或用户已禁用时返回 None。
+    """
+    statement = (
+        select(RefreshToken)
+        .where(RefreshToken.token_hash == hash_refresh_token(token))
+        # 锁定令牌，避免并发的请求重复使用同一个令牌
+        .with_for_update()
+    )
+    db_token = session.exec(statement).first()
+    now = datetime.now()
+    if db_token is None or db_token.revoked_at is not None:
+        return None
+    if db_token.used_at is not None:
+        logger.warning(
+            f"Refresh token reuse detected for user {db_token.user_id}, "
+            f"revoking family {db_token.family_id}"
+        )
+        revoke_refresh_tokens(session=session, family_id=db_token.family_id)
+        session.commit()
+        return None
+    if db_token.expires_at <= now:
+        return None
+    # 先检查用户，已禁用的用户不轮换令牌
+    user = session.get(User, db_token.user_id)
+    if not user or not user.is_active:
+        return None
+
+    db_token.used_at = now
+    session.add(db_token)
+    new_token = create_refresh_token(
+        session=session, user_id=db_token.user_id, family_id=db_token.family_id
+    )
+    session.commit()
+    return user, new_token
+
+
+def prune_refresh_tokens(*, session: Session) -> int:
+    """
+    删除已过期的令牌，以及超过重用检测期限的已使用或已撤销的令牌，返回删除的行数。
+    """
+    now = datetime.now()
+    cutoff = now - timedelta(days=settings.REFRESH_TOKEN_REUSE_DETECTION_DAYS)
+    statement = delete(RefreshToken).where(
+        or_(
+            col(RefreshToken.expires_at) < now,
+            col(RefreshToken.used_at) < cutoff,
+            col(RefreshToken.revoked_at) < cutoff,
+        )
+    )
+    pruned = session.execute(statement.returning(col(RefreshToken.id))).all()
+    session.commit()
+    return len(pruned)
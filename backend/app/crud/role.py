@@ -1,32 +1,79 @@
+from collections.abc import Sequence
 from datetime import datetime
 
-from sqlmodel import Session, func, select
-
-from app.crud.common import handle_search_params
-from app.models.query import OrderDirection, PaginationParams
+from sqlalchemy import any_
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, col, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.crud.common import (
+    build_order_by,
+    get_page,
+    get_page_async,
+    handle_search_params,
+)
+from app.crud.link import get_existing_ids, id_array, set_links
+from app.crud.user import invalidate_principals, publish_principals_invalidation
+from app.crud.user_permission import refresh_user_permissions
+from app.models.link import RoleRuleLink, UserRoleLink
+from app.models.query import CommonSearchParam, OrderDirection, PaginationParams
 from app.models.role import Role, RoleCreate, RolePublic, RolesPublic, RoleUpdate
 from app.models.rule import Rule
 from app.models.user import User
 
 
-def create_role(*, session: Session, role_create: RoleCreate) -> Role:
-    db_role = Role.model_validate(
-        role_create,
-        update={
-            "permissions": (
-                [session.get(Rule, id) for id in role_create.permissions]
-                if role_create.permissions
-                else []
-            ),
-            "users": (
-                [session.get(User, id) for id in role_create.users]
-                if role_create.users
-                else []
-            ),
-        },
+def set_role_links(
+    *,
+    session: Session,
+    role_id: int,
+    permissions: Sequence[int] | None,
+    users: Sequence[int] | None,
+) -> tuple[bool, set[int]]:
+    """
+    只写入角色权限及成员的差异，返回 (权限是否变化, 需要重建有效权限的用户ID)。
+    """
+    added_rules, removed_rules = set_links(
+        session=session,
+        link_model=RoleRuleLink,
+        owner_field="role_id",
+        owner_id=role_id,
+        target_field="rule_id",
+        target_ids=get_existing_ids(session=session, model_class=Rule, ids=permissions),
+    )
+    user_ids = get_existing_ids(session=session, model_class=User, ids=users)
+    added_users, removed_users = set_links(
+        session=session,
+        link_model=UserRoleLink,
+        owner_field="role_id",
+        owner_id=role_id,
+        target_field="user_id",
+        target_ids=user_ids,
+    )
+    permissions_changed = bool(added_rules or removed_rules)
+    # 权限变化时所有成员都需要重建，否则只重建加入及移出的成员
+    affected_user_ids = (
+        user_ids | removed_users if permissions_changed else added_users | removed_users
     )
+    return permissions_changed, affected_user_ids
+
+
+def create_role(*, session: Session, role_create: RoleCreate) -> Role:
+    db_role = Role.model_validate(role_create, update={"permissions": [], "users": []})
     session.add(db_role)
+    session.flush()
+    assert db_role.id is not None
+    _, user_ids = set_role_links(
+        session=session,
+        role_id=db_role.id,
+        permissions=role_create.permissions,
+        users=role_create.users,
+    )
+    if user_ids:
+        refresh_user_permissions(session=session, user_ids=list(user_ids))
+        publish_principals_invalidation(session=session)
     session.commit()
+    if user_ids:
+        invalidate_principals()
     session.refresh(db_role)
     return db_role
 
@@ -36,39 +83,70 @@ def update_role(*, session: Session, db_role: Role, role_update: RoleUpdate) ->
         exclude_unset=True, exclude={"permissions", "users"}
     )
     db_role.sqlmodel_update(role_data)
-
-    # 更新权限
-    new_permissions = []
-    if role_update.permissions:
-        for id in role_update.permissions:
-            rule = session.get(Rule, id)
-            if rule:
-                new_permissions.append(rule)
-    if new_permissions != db_role.permissions:
-        db_role.permissions = new_permissions
-        db_role.updated_at = datetime.now()
-    # 更新用户
-    new_users = []
-    if role_update.users:
-        for id in role_update.users:
-            user = session.get(User, id)
-            if user:
-                new_users.append(user)
-    if new_users != db_role.users:
-        db_role.users = new_users
+    assert db_role.id is not None
+    permissions_changed, user_ids = set_role_links(
+        session=session,
+        role_id=db_role.id,
+        permissions=role_update.permissions,
+        users=role_update.users,
+    )
+    if permissions_changed or user_ids:
         db_role.updated_at = datetime.now()
 
     session.add(db_role)
+    # 成员的有效权限变化后清除认证缓存（包括缓存的权限集合）
+    if user_ids:
+        refresh_user_permissions(session=session, user_ids=list(user_ids))
+        publish_principals_invalidation(session=session)
     session.commit()
+    if user_ids:
+        invalidate_principals()
     session.refresh(db_role)
     return db_role
 
 
 def delete_role(*, session: Session, role: Role) -> None:
-    role.permissions = []
-    role.users = []
-    session.delete(role)
+    assert role.id is not None
+    delete_roles(session=session, ids=[role.id])
+
+
+def delete_roles(
+    *,
+    session: Session,
+    ids: Sequence[int] | None = None,
+    common_search: Sequence[CommonSearchParam] = (),
+) -> int:
+    """
+    批量删除角色，直接删除关联表中的行，不加载权限及成员。返回删除的角色数。
+    """
+    where_clause = list(handle_search_params(Role, "", [], common_search))
+    if ids is not None:
+        where_clause.append(col(Role.id) == any_(id_array(ids)))
+    role_ids = select(Role.id).where(*where_clause)
+    session.execute(delete(RoleRuleLink).where(col(RoleRuleLink.role_id).in_(role_ids)))
+    user_ids = set(
+        session.execute(
+            delete(UserRoleLink)
+            .where(col(UserRoleLink.role_id).in_(role_ids))
+            .returning(col(UserRoleLink.user_id))
+        )
+        .scalars()
+        .all()
+    )
+    count = len(
+        session.execute(delete(Role).where(*where_clause).returning(col(Role.id)))
+        .scalars()
+        .all()
+    )
+    if not count:
+        return 0
+    # 原成员的有效权限需要重建
+    if user_ids:
+        refresh_user_permissions(session=session, user_ids=list(user_ids))
+    publish_principals_invalidation(session=session)
     session.commit()
+    invalidate_principals()
+    return count
 
 
 def get_roles(
@@ -81,25 +159,79 @@ def get_roles(
 ) -> RolesPublic:
     where_clause = handle_search_params(Role, quick_search, ["name"])
 
-    total_statement = select(func.count()).select_from(Role).where(*where_clause)
-    total = session.exec(total_statement).one()
+    roles, total, total_capped = get_page(
+        session=session,
+        model_class=Role,
+        where_clause=where_clause,
+        order_by=build_order_by(Role, order_by, order_direction),
+        pagination=pagination,
+        # 批量加载权限和用户，避免序列化时逐行查询
+        options=[
+            selectinload(Role.permissions),  # type: ignore[arg-type]
+            selectinload(Role.users),  # type: ignore[arg-type]
+        ],
+    )
+
+    return RolesPublic(
+        data=[RolePublic.model_validate(role) for role in roles],
+        total=total,
+        total_capped=total_capped,
+    )
+
+
+async def get_roles_async(
+    *,
+    session: AsyncSession,
+    pagination: PaginationParams,
+    order_by: str,
+    order_direction: OrderDirection,
+    quick_search: str,
+) -> RolesPublic:
+    where_clause = handle_search_params(Role, quick_search, ["name"])
+
+    roles, total, total_capped = await get_page_async(
+        session=session,
+        model_class=Role,
+        where_clause=where_clause,
+        order_by=build_order_by(Role, order_by, order_direction),
+        pagination=pagination,
+        options=[
+            selectinload(Role.permissions),  # type: ignore[arg-type]
+            selectinload(Role.users),  # type: ignore[arg-type]
+        ],
+    )
+
+    return RolesPublic(
+        data=[RolePublic.model_validate(role) for role in roles],
+        total=total,
+        total_capped=total_capped,
+    )
+
 
+def get_role(*, session: Session, id: int) -> RolePublic | None:
     statement = (
         select(Role)
-        .where(*where_clause)
-        .order_by(
-            getattr(Role, order_by).desc()
-            if order_direction == OrderDirection.desc
-            else getattr(Role, order_by).asc()
+        .where(Role.id == id)
+        .options(
+            selectinload(Role.permissions),  # type: ignore[arg-type]
+            selectinload(Role.users),  # type: ignore[arg-type]
         )
-        .offset((pagination.skip - 1) * pagination.limit)
-        .limit(pagination.limit)
     )
-    roles = session.exec(statement).all()
+    role = session.exec(statement).first()
+    return RolePublic.model_validate(role) if role else None
 
-    return RolesPublic(
-        data=[RolePublic.model_validate(role) for role in roles], total=total
+
+async def get_role_async(*, session: AsyncSession, id: int) -> RolePublic | None:
+    statement = (
+        select(Role)
+        .where(Role.id == id)
+        .options(
+            selectinload(Role.permissions),  # type: ignore[arg-type]
+            selectinload(Role.users),  # type: ignore[arg-type]
+        )
     )
+    role = (await session.exec(statement)).first()
+    return RolePublic.model_validate(role) if role else None
 
 
 def get_role_by_name(*, session: Session, name: str) -> Role | None:
@@ -1,9 +1,21 @@
+import threading
+import time
 from collections.abc import Sequence
 
-from sqlmodel import Session, col, select
+from sqlmodel import Session, col, delete, select
 
+from app.core.cache import VersionedCache, register_cache
+from app.core.config import settings
 from app.core.db import engine
+from app.core.invalidation import (
+    invalidation_listener,
+    publish_invalidation,
+    register_invalidation_handler,
+)
+from app.crud.cache_version import bump_cache_version, get_cache_version
 from app.crud.common import handle_search_params
+from app.crud.user_permission import refresh_superuser_permissions
+from app.models.link import RoleRuleLink
 from app.models.rule import (
     Rule,
     RuleCreate,
@@ -13,11 +25,62 @@ from app.models.rule import (
     RuleUpdate,
 )
 
+RULES_CACHE_NAME = "rule"
+
+# 当前进程已知的规则版本号及检查时间，超过检查间隔后重新读取
+_rules_version: tuple[int, float] | None = None
+# 每次失效时递增，读取版本号期间发生失效时不保存读到的旧版本号
+_rules_version_generation = 0
+_rules_version_lock = threading.Lock()
+
+# 以下缓存均按规则版本号失效
+# 规则名称 -> 完整标题 的索引
+full_titles_cache: VersionedCache[None, dict[str, str]] = VersionedCache(max_size=1)
+# 管理端的规则树，键为 only_menus
+rule_trees_cache: VersionedCache[bool, RuleTreesPublic] = VersionedCache(max_size=2)
+register_cache("rule_full_titles", full_titles_cache)
+register_cache("rule_trees", rule_trees_cache)
+
+
+def invalidate_rules_version() -> None:
+    global _rules_version, _rules_version_generation
+    with _rules_version_lock:
+        _rules_version_generation += 1
+        _rules_version = None
+
+
+register_invalidation_handler(RULES_CACHE_NAME, lambda _: invalidate_rules_version())
+
+
+def get_rules_version(*, session: Session) -> int:
+    global _rules_version
+    now = time.monotonic()
+    known = _rules_version
+    # 监听正常时规则变更会通过通知清除已知版本号，只需按较长的间隔检查
+    interval = (
+        settings.RULE_CACHE_VERSION_MAX_AGE
+        if invalidation_listener.connected
+        else settings.RULE_CACHE_VERSION_CHECK_INTERVAL
+    )
+    if known is not None and now - known[1] < interval:
+        return known[0]
+    generation = _rules_version_generation
+    version = get_cache_version(session=session, name=RULES_CACHE_NAME)
+    with _rules_version_lock:
+        if generation == _rules_version_generation:
+            _rules_version = (version, now)
+    return version
+
 
 def create_rule(*, session: Session, rule_create: RuleCreate) -> Rule:
     db_obj = Rule.model_validate(rule_create)
     session.add(db_obj)
+    # 超级管理员拥有所有规则，删除规则时由外键级联删除
+    refresh_superuser_permissions(session=session)
+    bump_cache_version(session=session, name=RULES_CACHE_NAME)
+    publish_invalidation(session=session, name=RULES_CACHE_NAME)
     session.commit()
+    invalidate_rules_version()
     session.refresh(db_obj)
     return db_obj
 
@@ -26,15 +89,23 @@ def update_rule(*, session: Session, db_rule: Rule, rule_update: RuleUpdate) ->
     rule_data = rule_update.model_dump(exclude_unset=True)
     db_rule.sqlmodel_update(rule_data)
     session.add(db_rule)
+    bump_cache_version(session=session, name=RULES_CACHE_NAME)
+    publish_invalidation(session=session, name=RULES_CACHE_NAME)
     session.commit()
+    invalidate_rules_version()
     session.refresh(db_rule)
     return db_rule
 
 
 def delete_rule(*, session: Session, rule: Rule) -> None:
-    rule.roles = []
-    session.delete(rule)
+    # 直接删除关联表中的行，不加载关联的角色及子规则；
+    # 子规则的 parent_id、用户的有效权限由外键处理
+    session.execute(delete(RoleRuleLink).where(col(RoleRuleLink.rule_id) == rule.id))
+    session.execute(delete(Rule).where(col(Rule.id) == rule.id))
+    bump_cache_version(session=session, name=RULES_CACHE_NAME)
+    publish_invalidation(session=session, name=RULES_CACHE_NAME)
     session.commit()
+    invalidate_rules_version()
 
 
 def get_rules(*, session: Session) -> Sequence[Rule]:
@@ -45,59 +116,74 @@ def get_rules(*, session: Session) -> Sequence[Rule]:
 def get_rule_trees(
     *, session: Session, only_menus: bool = False, quick_search: str | None = None
 ) -> RuleTreesPublic:
-    data = []
-    menu_types = [RuleType.menu_dir, RuleType.menu_item]
     if quick_search:
+        menu_types = [RuleType.menu_dir, RuleType.menu_item]
         where_clause = [col(Rule.type).in_(menu_types)] if only_menus else []
         statement = select(Rule).where(
             *where_clause, *handle_search_params(Rule, quick_search, ["title"])
         )
         rules = session.exec(statement).all()
-        data = [
-            RuleTreePublic(**rule.model_dump(exclude={"children"})) for rule in rules
-        ]
-    else:
-        statement = (
-            select(Rule)
-            .where(col(Rule.parent_id).is_(None))
-            .order_by(col(Rule.weight).desc())
+        return RuleTreesPublic(
+            data=[
+                RuleTreePublic(**rule.model_dump(exclude={"children"}))
+                for rule in rules
+            ]
         )
-        rules = session.exec(statement).all()
 
-        if only_menus:
-
-            def build_trees(
-                rules: Sequence[Rule],
-                menus: list[RuleTreePublic],
-                level: int = 0,
-            ) -> list[RuleTreePublic]:
-                for index, rule in enumerate(rules):
-                    if rule.type in menu_types:
-                        title_prefix = ""
-                        if level > 0:
-                            title_prefix = "".join(
-                                [
-                                    " " * level * 4,
-                                    "└" if index == len(rules) - 1 else "├",
-                                ]
-                            )
-                        title = "".join([title_prefix, rule.title])
-                        menus.append(
-                            RuleTreePublic(
-                                **rule.model_dump(exclude={"title", "children"}),
-                                title=title,
-                            )
+    version = get_rules_version(session=session)
+    trees = rule_trees_cache.get(version, only_menus)
+    if trees is None:
+        trees = build_rule_trees(session=session, only_menus=only_menus)
+        rule_trees_cache.set(version, only_menus, trees)
+    return trees
+
+
+def build_rule_trees(*, session: Session, only_menus: bool = False) -> RuleTreesPublic:
+    menu_types = [RuleType.menu_dir, RuleType.menu_item]
+    # 一次查询所有规则，在内存中按父节点索引组装树
+    statement = select(Rule).order_by(col(Rule.weight).desc(), col(Rule.id))
+    children: dict[int | None, list[Rule]] = {}
+    for rule in session.exec(statement).all():
+        children.setdefault(rule.parent_id, []).append(rule)
+
+    if only_menus:
+
+        def build_trees(
+            rules: Sequence[Rule],
+            menus: list[RuleTreePublic],
+            level: int = 0,
+        ) -> list[RuleTreePublic]:
+            for index, rule in enumerate(rules):
+                if rule.type in menu_types:
+                    title_prefix = ""
+                    if level > 0:
+                        title_prefix = "".join(
+                            [
+                                " " * level * 4,
+                                "└" if index == len(rules) - 1 else "├",
+                            ]
                         )
-                        if rule.children:
-                            build_trees(rule.children, menus, level + 1)
-                return menus
-
-            data = build_trees(rules, [])
-        else:
-            data = [
-                RuleTreePublic.model_validate(rule, update={"children": rule.children})
-                for rule in rules
-            ]
+                    title = "".join([title_prefix, rule.title])
+                    menus.append(
+                        RuleTreePublic(
+                            **rule.model_dump(exclude={"title", "children"}),
+                            title=title,
+                        )
+                    )
+                    if rule.id in children:
+                        build_trees(children[rule.id], menus, level + 1)
+            return menus
+
+        data = build_trees(children.get(None, []), [])
+    else:
+
+        def build_tree(rule: Rule) -> RuleTreePublic:
+            return RuleTreePublic(
+                **rule.model_dump(exclude={"children"}),
+                children=[build_tree(child) for child in children.get(rule.id, [])],
+            )
+
+        data = [build_tree(rule) for rule in children.get(None, [])]
     return RuleTreesPublic(data=data)
 
 
@@ -108,17 +194,36 @@ def get_rules_by_type(
     return session.exec(statement).all()
 
 
+def build_full_titles(*, session: Session) -> dict[str, str]:
+    statement = select(Rule.id, Rule.parent_id, Rule.name, Rule.title)
+    rows = session.exec(statement).all()
+    rule_dict = {id: (parent_id, title) for id, parent_id, _, title in rows}
+
+    full_titles = {}
+    for id, _, name, _ in rows:
+        titles: list[str] = []
+        visited: set[int] = set()
+        current = id
+        # 防止错误数据中出现环导致死循环
+        while current is not None and current in rule_dict and current not in visited:
+            visited.add(current)
+            parent_id, title = rule_dict[current]
+            titles.append(title)
+            current = parent_id
+        full_titles[name] = "-".join(titles[::-1])
+    return full_titles
+
+
 def get_full_title(rule_name: str | None) -> str | None:
     if rule_name is None:
         return None
     with Session(engine) as session:
-        statement = select(Rule).where(Rule.name == rule_name)
-        rule = session.exec(statement).first()
-        titles = []
-        while rule:
-            titles.append(rule.title)
-            rule = rule.parent
-        return "-".join(titles[::-1])
+        version = get_rules_version(session=session)
+        full_titles = full_titles_cache.get(version, None)
+        if full_titles is None:
+            full_titles = build_full_titles(session=session)
+            full_titles_cache.set(version, None, full_titles)
+    return full_titles.get(rule_name, "")
 
 
 def get_rule_by_name(*, session: Session, name: str) -> Rule | None:
@@ -1,6 +1,6 @@
 from sqlmodel import Session
 
-from app.core.security import verify_password
+from app.core.security import verify_and_update_password
 from app.crud.user import get_user_by_username
 from app.models.user import User
 
@@ -9,6 +9,15 @@ def authenticate(*, session: Session, username: str, password: str) -> User | No
     db_user = get_user_by_username(session=session, username=username)
     if not db_user:
         return None
-    if not verify_password(password, db_user.hashed_password):
+    verified, new_hashed_password = verify_and_update_password(
+        password, db_user.hashed_password
+    )
+    if not verified:
         return None
+    if new_hashed_password:
+        # 按当前的 cost 重新计算的哈希
+        db_user.hashed_password = new_hashed_password
+        session.add(db_user)
+        session.commit()
+        session.refresh(db_user)
     return db_user
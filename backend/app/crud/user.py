@@ -1,15 +1,46 @@
+import hashlib
+from collections import Counter
 from collections.abc import Sequence
 from datetime import date, datetime, timedelta
 from typing import Any
 
-from sqlmodel import Session, case, col, func, select
+from sqlalchemy import all_, any_
+from sqlalchemy.orm import make_transient_to_detached, selectinload
+from sqlmodel import Session, case, col, delete, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.cache import TTLCache, VersionedCache, register_cache
 from app.core.config import settings
+from app.core.invalidation import (
+    ALL_KEYS,
+    publish_invalidation,
+    register_invalidation_handler,
+)
 from app.core.security import get_password_hash, oauth2_scopes
-from app.crud.common import handle_search_params
-from app.crud.rule import get_rules
+from app.crud.common import (
+    build_order_by,
+    get_page,
+    get_page_async,
+    handle_search_params,
+)
+from app.crud.link import get_existing_ids, id_array, set_links
+from app.crud.operation_log import (
+    build_next_cursor,
+    build_operation_log_order_by,
+    build_operation_log_seek_clause,
+)
+from app.crud.refresh_token import revoke_refresh_tokens
+from app.crud.rule import get_rules_version
+from app.crud.user_activity import LOGIN_PATH
+from app.crud.user_permission import (
+    build_user_permissions_statement,
+    read_user_permissions,
+    refresh_user_permissions,
+)
+from app.models.link import UserRoleLink
 from app.models.operation_log import (
     OperationLog,
+    OperationLogCursor,
     OperationLogPublic,
     OperationLogsPublic,
 )
@@ -31,6 +62,93 @@ from app.models.user import (
     UserUpdate,
     UserUpdateMe,
 )
+from app.models.user_activity import UserDailyActivity, UserDailyMenuActivity
+
+PRINCIPALS_CACHE_NAME = "principal"
+
+# 已认证用户的快照，键为 (用户ID, token)
+principal_cache: TTLCache[tuple[int, str], dict[str, Any]] = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL
+)
+
+# 按权限集合缓存的菜单树，键为权限集合的哈希（超级管理员为 "*"），按规则版本号失效
+user_rule_trees_cache: VersionedCache[str, Sequence[UserRuleTreePublic]] = (
+    VersionedCache(max_size=settings.RULE_CACHE_MAX_SIZE)
+)
+# 用户的权限集合，键为 (用户ID, 规则版本号)，用户或角色变更时随认证缓存一起清除
+user_permissions_cache: TTLCache[tuple[int, int], Sequence[str]] = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.USER_PERMISSIONS_CACHE_TTL,
+)
+register_cache("principal", principal_cache)
+register_cache("user_rule_trees", user_rule_trees_cache)
+register_cache("user_permissions", user_permissions_cache)
+
+
+def invalidate_principals(user_id: int | None = None) -> None:
+    """
+    清除用户的认证缓存，user_id 为 None 时全部清除。
+    """
+    if user_id is None:
+        principal_cache.clear()
+        user_permissions_cache.clear()
+    else:
+        principal_cache.delete_where(lambda key: key[0] == user_id)
+        user_permissions_cache.delete_where(lambda key: key[0] == user_id)
+
+
+register_invalidation_handler(
+    PRINCIPALS_CACHE_NAME,
+    lambda key: invalidate_principals(None if key == ALL_KEYS else int(key)),
+)
+
+
+def publish_principals_invalidation(
+    *, session: Session, user_id: int | None = None
+) -> None:
+    """
+    通知其他工作进程清除用户的认证缓存，需要调用方提交事务。
+    """
+    publish_invalidation(
+        session=session,
+        name=PRINCIPALS_CACHE_NAME,
+        key=ALL_KEYS if user_id is None else str(user_id),
+    )
+
+
+def _build_principal_snapshot(user: User) -> dict[str, Any]:
+    # 快照不包含密码哈希，校验密码时从数据库重新加载
+    return user.model_dump(exclude={"hashed_password"})
+
+
+def get_principal(*, session: Session, user_id: int, token: str) -> User | None:
+    snapshot = principal_cache.get((user_id, token))
+    if snapshot is None:
+        user = session.get(User, user_id)
+        if user is not None:
+            principal_cache.set((user_id, token), _build_principal_snapshot(user))
+        return user
+    # 以快照构造已持久化状态的对象并关联到会话，不查询数据库，关联关系仍可按需加载
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return session.merge(user, load=False)
+
+
+async def get_principal_async(
+    *, session: AsyncSession, user_id: int, token: str
+) -> User | None:
+    """
+    get_principal 的异步版本，异步会话中不能按需加载关联关系。
+    """
+    snapshot = principal_cache.get((user_id, token))
+    if snapshot is None:
+        user = await session.get(User, user_id)
+        if user is not None:
+            principal_cache.set((user_id, token), _build_principal_snapshot(user))
+        return user
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return await session.merge(user, load=False)
 
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
@@ -38,14 +156,23 @@ def create_user(*, session: Session, user_create: UserCreate) -> User:
         user_create,
         update={
             "hashed_password": get_password_hash(user_create.password),
-            "roles": (
-                [session.get(Role, id) for id in user_create.roles]
-                if user_create.roles
-                else []
-            ),
+            "roles": [],
         },
     )
     session.add(db_obj)
+    session.flush()
+    assert db_obj.id is not None
+    set_links(
+        session=session,
+        link_model=UserRoleLink,
+        owner_field="user_id",
+        owner_id=db_obj.id,
+        target_field="role_id",
+        target_ids=get_existing_ids(
+            session=session, model_class=Role, ids=user_create.roles
+        ),
+    )
+    refresh_user_permissions(session=session, user_ids=[db_obj.id])
     session.commit()
     session.refresh(db_obj)
     return db_obj
@@ -60,21 +187,31 @@ def update_user(*, session: Session, db_user: User, user_update: UserUpdate) ->
         password = user_data["password"]
         hashed_password = get_password_hash(password)
         extra_data["hashed_password"] = hashed_password
+        # 修改密码后已签发的刷新令牌失效
+        if db_user.id is not None:
+            revoke_refresh_tokens(session=session, user_id=db_user.id)
     db_user.sqlmodel_update(user_data, update=extra_data)
 
-    # 更新用户角色
-    new_roles = []
-    if user_update.roles:
-        for id in user_update.roles:
-            role = session.get(Role, id)
-            if role:
-                new_roles.append(role)
-    if new_roles != db_user.roles:
-        db_user.roles = new_roles
+    assert db_user.id is not None
+    # 更新用户角色，只写入差异
+    added, removed = set_links(
+        session=session,
+        link_model=UserRoleLink,
+        owner_field="user_id",
+        owner_id=db_user.id,
+        target_field="role_id",
+        target_ids=get_existing_ids(
+            session=session, model_class=Role, ids=user_update.roles
+        ),
+    )
+    if added or removed:
         db_user.updated_at = datetime.now()
 
     session.add(db_user)
+    refresh_user_permissions(session=session, user_ids=[db_user.id])
+    publish_principals_invalidation(session=session, user_id=db_user.id)
     session.commit()
+    invalidate_principals(db_user.id)
     session.refresh(db_user)
     return db_user
 
@@ -88,14 +225,35 @@ def update_user_me(
         password = user_data["password"]
         hashed_password = get_password_hash(password)
         extra_data["hashed_password"] = hashed_password
+        # 修改密码后已签发的刷新令牌失效
+        if db_user.id is not None:
+            revoke_refresh_tokens(session=session, user_id=db_user.id)
     db_user.sqlmodel_update(user_data, update=extra_data)
 
     session.add(db_user)
+    publish_principals_invalidation(session=session, user_id=db_user.id)
     session.commit()
+    invalidate_principals(db_user.id)
     session.refresh(db_user)
     return db_user
 
 
+def get_user(*, session: Session, id: int) -> UserPublic | None:
+    statement = (
+        select(User).where(User.id == id).options(selectinload(User.roles))  # type: ignore[arg-type]
+    )
+    user = session.exec(statement).first()
+    return UserPublic.model_validate(user) if user else None
+
+
+async def get_user_async(*, session: AsyncSession, id: int) -> UserPublic | None:
+    statement = (
+        select(User).where(User.id == id).options(selectinload(User.roles))  # type: ignore[arg-type]
+    )
+    user = (await session.exec(statement)).first()
+    return UserPublic.model_validate(user) if user else None
+
+
 def get_user_by_username(*, session: Session, username: str) -> User | None:
     statement = select(User).where(User.username == username)
     user = session.exec(statement).first()
@@ -103,9 +261,43 @@ def get_user_by_username(*, session: Session, username: str) -> User | None:
 
 
 def delete_user(*, session: Session, user: User) -> None:
-    user.roles = []
-    session.delete(user)
+    assert user.id is not None
+    delete_users(session=session, ids=[user.id])
+
+
+def delete_users(
+    *,
+    session: Session,
+    ids: Sequence[int] | None = None,
+    common_search: Sequence[CommonSearchParam] = (),
+    exclude_ids: Sequence[int] = (),
+) -> int:
+    """
+    批量删除用户，直接删除关联表中的行，不加载关联关系。返回删除的用户数。
+    """
+    where_clause = list(handle_search_params(User, "", [], common_search))
+    if ids is not None:
+        where_clause.append(col(User.id) == any_(id_array(ids)))
+    if exclude_ids:
+        where_clause.append(col(User.id) != all_(id_array(exclude_ids)))
+    session.execute(
+        delete(UserRoleLink).where(
+            col(UserRoleLink.user_id).in_(select(User.id).where(*where_clause))
+        )
+    )
+    # 有效权限、刷新令牌由外键级联删除
+    user_ids = (
+        session.execute(delete(User).where(*where_clause).returning(col(User.id)))
+        .scalars()
+        .all()
+    )
+    if not user_ids:
+        return 0
+    user_id = user_ids[0] if len(user_ids) == 1 else None
+    publish_principals_invalidation(session=session, user_id=user_id)
     session.commit()
+    invalidate_principals(user_id)
+    return len(user_ids)
 
 
 def get_users(
@@ -121,45 +313,98 @@ def get_users(
         User, quick_search, ["username", "full_name"], common_search
     )
 
-    total_statement = select(func.count()).select_from(User).where(*where_clause)
-    total = session.exec(total_statement).one()
+    users, total, total_capped = get_page(
+        session=session,
+        model_class=User,
+        where_clause=where_clause,
+        order_by=build_order_by(User, order_by, order_direction),
+        pagination=pagination,
+        # 批量加载角色，避免序列化时逐行查询
+        options=[selectinload(User.roles)],  # type: ignore[arg-type]
+    )
 
-    statement = (
-        select(User)
-        .where(*where_clause)
-        .order_by(
-            getattr(User, order_by).desc()
-            if order_direction == OrderDirection.desc
-            else getattr(User, order_by).asc()
-        )
-        .offset((pagination.skip - 1) * pagination.limit)
-        .limit(pagination.limit)
+    return UsersPublic(
+        data=[UserPublic.model_validate(user) for user in users],
+        total=total,
+        total_capped=total_capped,
+    )
+
+
+async def get_users_async(
+    *,
+    session: AsyncSession,
+    pagination: PaginationParams,
+    order_by: str,
+    order_direction: OrderDirection,
+    quick_search: str,
+    common_search: Sequence[CommonSearchParam],
+) -> UsersPublic:
+    where_clause = handle_search_params(
+        User, quick_search, ["username", "full_name"], common_search
+    )
+
+    users, total, total_capped = await get_page_async(
+        session=session,
+        model_class=User,
+        where_clause=where_clause,
+        order_by=build_order_by(User, order_by, order_direction),
+        pagination=pagination,
+        options=[selectinload(User.roles)],  # type: ignore[arg-type]
     )
-    users = session.exec(statement).all()
 
     return UsersPublic(
-        data=[UserPublic.model_validate(user) for user in users], total=total
+        data=[UserPublic.model_validate(user) for user in users],
+        total=total,
+        total_capped=total_capped,
     )
 
 
 def get_user_permissions(*, session: Session, user: User) -> Sequence[str]:
-    permissions = set()
-    if user.is_superuser:
-        for rule in get_rules(session=session):
-            permissions.add(rule.name)
-    else:
-        for role in user.roles:
-            for permission in role.permissions:
-                permissions.add(permission.name)
-    return list(permissions)
+    # 读取维护好的有效权限，不再逐个加载角色及规则
+    assert user.id is not None
+    return read_user_permissions(session=session, user_id=user.id)
+
+
+def get_cached_user_permissions(*, session: Session, user: User) -> Sequence[str]:
+    """
+    get_user_permissions 的缓存版本，刷新令牌时使用。
+    """
+    assert user.id is not None
+    key = (user.id, get_rules_version(session=session))
+    permissions = user_permissions_cache.get(key)
+    if permissions is None:
+        permissions = get_user_permissions(session=session, user=user)
+        user_permissions_cache.set(key, permissions)
+    return permissions
 
 
 def get_user_rules(*, session: Session, user: User) -> Sequence[UserRuleTreePublic]:
+    # 菜单树只取决于权限集合，拥有相同权限的用户共享同一棵树
+    permissions = (
+        None if user.is_superuser else get_user_permissions(session=session, user=user)
+    )
+    key = (
+        "*"
+        if permissions is None
+        else hashlib.sha256("\n".join(sorted(permissions)).encode()).hexdigest()
+    )
+    version = get_rules_version(session=session)
+    rules = user_rule_trees_cache.get(version, key)
+    if rules is None:
+        rules = build_user_rules(session=session, permissions=permissions)
+        user_rule_trees_cache.set(version, key, rules)
+    return rules
+
+
+def build_user_rules(
+    *, session: Session, permissions: Sequence[str] | None = None
+) -> Sequence[UserRuleTreePublic]:
+    """
+    构建权限范围内的菜单树，permissions 为 None 时包含所有规则。
+    """
     where_clause = [col(Rule.status).is_(True)]
-    if not user.is_superuser:
-        where_clause.append(
-            col(Rule.name).in_(get_user_permissions(session=session, user=user))
-        )
+    if permissions is not None:
+        where_clause.append(col(Rule.name).in_(permissions))
     statement = select(Rule).where(*where_clause)
     rules = session.exec(statement).all()
     # 构建规则字典，每个规则对象排除children属性
@@ -196,171 +441,207 @@ def get_user_logs(
     session: Session,
     pagination: PaginationParams,
     user_id: int,
+    cursor: OperationLogCursor | None = None,
 ) -> OperationLogsPublic:
-    where_clause = [OperationLog.user_id == user_id]
+    where_clause = [col(OperationLog.user_id) == user_id]
+
+    logs, total, total_capped = get_page(
+        session=session,
+        model_class=OperationLog,
+        where_clause=where_clause,
+        order_by=build_operation_log_order_by(OrderDirection.desc),
+        pagination=pagination,
+        seek_clause=build_operation_log_seek_clause(cursor, OrderDirection.desc),
+        total_cap=settings.OPERATION_LOG_TOTAL_CAP,
+    )
 
-    count_statement = (
-        select(func.count()).select_from(OperationLog).where(*where_clause)
+    return OperationLogsPublic(
+        data=[OperationLogPublic.model_validate(log) for log in logs],
+        total=total,
+        total_capped=total_capped,
+        next_cursor=build_next_cursor(logs, pagination),
     )
-    count = session.exec(count_statement).one()
 
-    statement = (
-        select(OperationLog)
-        .where(*where_clause)
-        .order_by(col(OperationLog.created_at).desc())
-        .offset((pagination.skip - 1) * pagination.limit)
-        .limit(pagination.limit)
+
+async def get_user_logs_async(
+    *,
+    session: AsyncSession,
+    pagination: PaginationParams,
+    user_id: int,
+    cursor: OperationLogCursor | None = None,
+) -> OperationLogsPublic:
+    where_clause = [col(OperationLog.user_id) == user_id]
+
+    logs, total, total_capped = await get_page_async(
+        session=session,
+        model_class=OperationLog,
+        where_clause=where_clause,
+        order_by=build_operation_log_order_by(OrderDirection.desc),
+        pagination=pagination,
+        seek_clause=build_operation_log_seek_clause(cursor, OrderDirection.desc),
+        total_cap=settings.OPERATION_LOG_TOTAL_CAP,
     )
-    logs = session.exec(statement).all()
 
     return OperationLogsPublic(
-        data=[OperationLogPublic.model_validate(log) for log in logs], total=count
+        data=[OperationLogPublic.model_validate(log) for log in logs],
+        total=total,
+        total_capped=total_capped,
+        next_cursor=build_next_cursor(logs, pagination),
     )
 
 
-def get_user_home(*, session: Session, user: User) -> UserHome:
-    common_where_clause = [OperationLog.user_id == user.id]
-    where_clause_1w = [
-        func.date(OperationLog.created_at) > date.today() - timedelta(weeks=1),
-    ]
-    where_clause_previous_1w = [
-        func.date(OperationLog.created_at) <= date.today() - timedelta(weeks=1),
-        func.date(OperationLog.created_at) > date.today() - timedelta(weeks=2),
-    ]
-    where_clause_1m = [
-        func.date(OperationLog.created_at) > date.today() - timedelta(days=30),
-    ]
-    where_clause_previous_1m = [
-        func.date(OperationLog.created_at) <= date.today() - timedelta(days=30),
-        func.date(OperationLog.created_at) > date.today() - timedelta(days=60),
-    ]
-
-    def get_count(where_clause: Sequence[bool] | None = None) -> Sequence[int]:
-        where_clause = where_clause or []
-        result = []
-        for clause in [
-            where_clause_1w,
-            where_clause_previous_1w,
-            where_clause_1m,
-            where_clause_previous_1m,
-        ]:
-            statement = (
-                select(func.count())
-                .select_from(OperationLog)
-                .where(*common_where_clause, *clause, *where_clause)
-            )
-            result.append(session.exec(statement).one())
-        return result
-
-    logins_where_clause = [
-        OperationLog.request_path == f"{settings.API_V1_STR}/login/access-token"
-    ]
-    logins_1w, previous_logins_1w, logins_1m, previous_logins_1m = get_count(
-        logins_where_clause
+def build_behavior_data(
+    logins_detail: Sequence[tuple[date, int]],
+    operations_detail: Sequence[tuple[date, int]],
+    days: int = 7,
+) -> Sequence[UserBehaviorCount]:
+    behavior = []
+    logins_dict = {i[0]: i[1] for i in logins_detail}
+    operations_dict = {i[0]: i[1] for i in operations_detail}
+    for i in range(days):
+        dt = date.today() - timedelta(days=days - i - 1)
+        behavior.extend(
+            [
+                UserBehaviorCount(
+                    dt=dt,
+                    behavior="登录",
+                    count=logins_dict.get(dt, 0),
+                ),
+                UserBehaviorCount(
+                    dt=dt,
+                    behavior="操作",
+                    count=operations_dict.get(dt, 0),
+                ),
+            ]
+        )
+    return behavior
+
+
+def build_user_home(
+    logins: dict[date, int], operations: dict[date, int], menus: Counter[str]
+) -> UserHome:
+    today = date.today()
+
+    def count_window(
+        daily: dict[date, int], after_days: int, until_days: int | None = None
+    ) -> int:
+        # 统计 (today - after_days, today - until_days] 区间内的次数
+        return sum(
+            count
+            for dt, count in daily.items()
+            if dt > today - timedelta(days=after_days)
+            and (until_days is None or dt <= today - timedelta(days=until_days))
+        )
+
+    return UserHome(
+        logins_1w=count_window(logins, 7),
+        previous_logins_1w=count_window(logins, 14, 7),
+        logins_1m=count_window(logins, 30),
+        previous_logins_1m=count_window(logins, 60, 30),
+        operations_1w=count_window(operations, 7),
+        previous_operations_1w=count_window(operations, 14, 7),
+        operations_1m=count_window(operations, 30),
+        previous_operations_1m=count_window(operations, 60, 30),
+        behavior_1w=build_behavior_data(list(logins.items()), list(operations.items())),
+        behavior_1m=build_behavior_data(
+            list(logins.items()), list(operations.items()), days=30
+        ),
+        menus=[
+            UserMenuCount(menu=menu, count=count)
+            for menu, count in menus.most_common()
+            if count > 0
+        ],
     )
 
-    operations_1w, previous_operations_1w, operations_1m, previous_operations_1m = (
-        get_count()
+
+def get_user_home(*, session: Session, user: User) -> UserHome:
+    if settings.USER_HOME_FROM_ROLLUPS:
+        return get_user_home_from_rollups(session=session, user=user)
+    return get_user_home_from_logs(session=session, user=user)
+
+
+def get_user_home_from_rollups(*, session: Session, user: User) -> UserHome:
+    assert user.id is not None
+    today = date.today()
+    statement = select(UserDailyActivity).where(
+        UserDailyActivity.user_id == user.id,
+        col(UserDailyActivity.dt) > today - timedelta(days=60),
     )
+    activities = session.exec(statement).all()
 
-    def get_detail(
-        where_clause: Sequence[bool] | None = None,
-    ) -> Sequence[Sequence[tuple[date, int]]]:
-        where_clause = where_clause or []
-        result = []
-        for clause in [where_clause_1w, where_clause_1m]:
-            statement = (
-                select(
-                    func.date(OperationLog.created_at).label("dt"),
-                    func.count().label("count"),
-                )
-                .where(
-                    *common_where_clause,
-                    *clause,
-                    *where_clause,
-                )
-                .group_by("dt")
-                .order_by("dt")
-            )
-            result.append(session.exec(statement).all())
-        return result
-
-    logins_1w_detail, logins_1m_detail = get_detail(logins_where_clause)
-    operations_1w_detail, operations_1m_detail = get_detail()
-
-    def build_behavior_data(
-        logins_detail: Sequence[tuple[date, int]],
-        operations_detail: Sequence[tuple[date, int]],
-        days: int = 7,
-    ) -> Sequence[UserBehaviorCount]:
-        behavior = []
-        logins_dict = {i[0]: i[1] for i in logins_detail}
-        operations_dict = {i[0]: i[1] for i in operations_detail}
-        for i in range(days):
-            dt = date.today() - timedelta(days=days - i - 1)
-            behavior.extend(
-                [
-                    UserBehaviorCount(
-                        dt=dt,
-                        behavior="登录",
-                        count=logins_dict.get(dt, 0),
-                    ),
-                    UserBehaviorCount(
-                        dt=dt,
-                        behavior="操作",
-                        count=operations_dict.get(dt, 0),
-                    ),
-                ]
-            )
-        return behavior
-
-    behavior_1w = build_behavior_data(logins_1w_detail, operations_1w_detail)
-    behavior_1m = build_behavior_data(logins_1m_detail, operations_1m_detail, days=30)
-
-    menus_where_clause = [
-        col(OperationLog.name).in_(get_user_permissions(session=session, user=user)),
-        col(OperationLog.response_status_code) >= 200,
-        col(OperationLog.response_status_code) < 300,
-        col(OperationLog.request_path).not_in(
-            settings.USER_HOME_FEATURES_EXCLUDE_PATHS
-        ),
-    ]
     menus_statement = (
         select(
-            case(
-                (
-                    col(OperationLog.name).in_(oauth2_scopes.keys()),
-                    func.split_part(OperationLog.name, ":", 1),
-                ),
-                else_=OperationLog.name,
-            ).label("menu"),
-            func.count().label("count"),
+            col(UserDailyMenuActivity.name), func.sum(col(UserDailyMenuActivity.count))
         )
         .where(
-            *common_where_clause,
-            *where_clause_1m,
-            *menus_where_clause,
+            UserDailyMenuActivity.user_id == user.id,
+            col(UserDailyMenuActivity.dt) > today - timedelta(days=30),
+            col(UserDailyMenuActivity.name).in_(
+                build_user_permissions_statement(user.id)
+            ),
         )
-        .group_by("menu")
-        .order_by(func.count().desc())
+        .group_by(UserDailyMenuActivity.name)
+    )
+    menus: Counter[str] = Counter()
+    for name, count in session.exec(menus_statement).all():
+        menu = name.split(":", 1)[0] if name in oauth2_scopes else name
+        menus[menu] += count
+
+    return build_user_home(
+        {activity.dt: activity.logins for activity in activities},
+        {activity.dt: activity.operations for activity in activities},
+        menus,
     )
-    menus = [
-        UserMenuCount(menu=menu, count=count)
-        for menu, count in session.exec(menus_statement).all()
-    ]
-
-    home = UserHome(
-        logins_1w=logins_1w,
-        previous_logins_1w=previous_logins_1w,
-        logins_1m=logins_1m,
-        previous_logins_1m=previous_logins_1m,
-        operations_1w=operations_1w,
-        previous_operations_1w=previous_operations_1w,
-        operations_1m=operations_1m,
-        previous_operations_1m=previous_operations_1m,
-        behavior_1w=behavior_1w,
-        behavior_1m=behavior_1m,
-        menus=menus,
+
+
+def get_user_home_from_logs(*, session: Session, user: User) -> UserHome:
+    assert user.id is not None
+    # 使用 created_at 的范围条件，以便使用索引并裁剪分区
+    today = datetime.combine(date.today(), datetime.min.time())
+
+    # 一次按天分组统计 60 天内的登录和操作次数，各时间窗口的数据在内存中汇总
+    dt = func.date(OperationLog.created_at).label("dt")
+    daily_statement = (
+        select(
+            dt,
+            func.count()
+            .filter(col(OperationLog.request_path) == LOGIN_PATH)
+            .label("logins"),
+            func.count().label("operations"),
+        )
+        .where(
+            OperationLog.user_id == user.id,
+            col(OperationLog.created_at) >= today - timedelta(days=59),
+        )
+        .group_by(dt)
+    )
+    logins, operations = {}, {}
+    for day, login_count, operation_count in session.exec(daily_statement).all():
+        logins[day] = login_count
+        operations[day] = operation_count
+
+    menu = case(
+        (
+            col(OperationLog.name).in_(oauth2_scopes.keys()),
+            func.split_part(OperationLog.name, ":", 1),
+        ),
+        else_=OperationLog.name,
+    ).label("menu")
+    menus_statement = (
+        select(menu, func.count().label("count"))
+        .where(
+            OperationLog.user_id == user.id,
+            col(OperationLog.created_at) >= today - timedelta(days=29),
+            # 权限作为子查询过滤，不单独读取
+            col(OperationLog.name).in_(build_user_permissions_statement(user.id)),
+            col(OperationLog.response_status_code) >= 200,
+            col(OperationLog.response_status_code) < 300,
+            col(OperationLog.request_path).not_in(
+                settings.USER_HOME_FEATURES_EXCLUDE_PATHS
+            ),
+        )
+        .group_by(menu)
     )
+    menus: Counter[str] = Counter(dict(session.exec(menus_statement).all()))
 
-    return home
+    return build_user_home(logins, operations, menus)
@@ -0,0 +1,83 @@
+from collections import Counter
+from collections.abc import Sequence
+from datetime import date
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models.operation_log import OperationLog
+from app.models.user_activity import UserDailyActivity, UserDailyMenuActivity
+
+LOGIN_PATH = f"{settings.API_V1_STR}/login/access-token"
+
+
+def is_menu_operation(operation_log: OperationLog) -> bool:
+    # 与主页常用功能统计的条件保持一致，权限过滤在读取时进行。
+    # SQL 中 NULL NOT IN (...) 不成立，request_path 为空的日志不计入
+    return (
+        operation_log.name is not None
+        and operation_log.response_status_code is not None
+        and 200 <= operation_log.response_status_code < 300
+        and operation_log.request_path is not None
+        and operation_log.request_path not in settings.USER_HOME_FEATURES_EXCLUDE_PATHS
+    )
+
+
+def add_user_activities(
+    *, session: Session, operation_logs: Sequence[OperationLog], sign: int = 1
+) -> None:
+    """
+    将操作日志累加到每日活动汇总中，sign=-1 时扣减。需要调用方提交事务。
+    """
+    activities: Counter[tuple[int, date]] = Counter()
+    logins: Counter[tuple[int, date]] = Counter()
+    menus: Counter[tuple[int, date, str]] = Counter()
+    for log in operation_logs:
+        if log.user_id is None:
+            continue
+        key = (log.user_id, log.created_at.date())
+        activities[key] += 1
+        if log.request_path == LOGIN_PATH:
+            logins[key] += 1
+        if log.name is not None and is_menu_operation(log):
+            menus[(*key, log.name)] += 1
+
+    # 按主键排序写入，避免并发写入时死锁
+    if activities:
+        statement = insert(UserDailyActivity).values(
+            [
+                {
+                    "user_id": user_id,
+                    "dt": dt,
+                    "logins": sign * logins[(user_id, dt)],
+                    "operations": sign * count,
+                }
+                for (user_id, dt), count in sorted(activities.items())
+            ]
+        )
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["user_id", "dt"],
+                set_={
+                    "logins": UserDailyActivity.logins + statement.excluded.logins,
+                    "operations": UserDailyActivity.operations
+                    + statement.excluded.operations,
+                },
+            )
+        )
+    if menus:
+        menu_statement = insert(UserDailyMenuActivity).values(
+            [
+                {"user_id": user_id, "dt": dt, "name": name, "count": sign * count}
+                for (user_id, dt, name), count in sorted(menus.items())
+            ]
+        )
+        session.execute(
+            menu_statement.on_conflict_do_update(
+                index_elements=["user_id", "dt", "name"],
+                set_={
+                    "count": UserDailyMenuActivity.count + menu_statement.excluded.count
+                },
+            )
+        )
@@ -0,0 +1,131 @@
+from collections.abc import Sequence
+
+from sqlalchemy import any_, true, union
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, col, delete, select
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.crud.link import id_array
+from app.models.link import RoleRuleLink, UserRoleLink
+from app.models.role import Role
+from app.models.rule import Rule
+from app.models.user import User
+from app.models.user_permission import UserPermission
+
+
+def refresh_user_permissions(
+    *, session: Session, user_ids: Sequence[int] | None = None
+) -> None:
+    """
+    重建用户的有效权限，user_ids 为 None 时重建所有用户。需要调用方提交事务。
+    """
+    # 关联关系的变更需要先写入数据库
+    session.flush()
+    role_permissions = (
+        select(col(UserRoleLink.user_id), col(RoleRuleLink.rule_id))
+        .join(RoleRuleLink, col(RoleRuleLink.role_id) == UserRoleLink.role_id)
+        .join(User, col(User.id) == UserRoleLink.user_id)
+        .where(col(User.is_superuser).is_(False))
+    )
+    # 超级管理员拥有所有规则，显式交叉连接
+    superuser_permissions = (
+        select(col(User.id), col(Rule.id))
+        .select_from(User)
+        .join(Rule, true())
+        .where(col(User.is_superuser).is_(True))
+    )
+    delete_statement = delete(UserPermission)
+    if user_ids is not None:
+        if not user_ids:
+            return
+        # 以数组参数传递，角色成员较多时不受参数个数限制
+        ids = id_array(user_ids)
+        role_permissions = role_permissions.where(
+            col(UserRoleLink.user_id) == any_(ids)
+        )
+        superuser_permissions = superuser_permissions.where(col(User.id) == any_(ids))
+        delete_statement = delete_statement.where(
+            col(UserPermission.user_id) == any_(ids)
+        )
+    session.execute(delete_statement)
+    session.execute(
+        insert(UserPermission)
+        .from_select(
+            ["user_id", "rule_id"], union(role_permissions, superuser_permissions)
+        )
+        # 并发重建同一用户时忽略已插入的行
+        .on_conflict_do_nothing()
+    )
+
+
+def refresh_superuser_permissions(*, session: Session) -> None:
+    """
+    重建超级管理员的有效权限，新增规则时使用。需要调用方提交事务。
+    """
+    statement = select(User.id).where(col(User.is_superuser).is_(True))
+    user_ids = [user_id for user_id in session.exec(statement).all() if user_id]
+    refresh_user_permissions(session=session, user_ids=user_ids)
+
+
+def build_user_permissions_statement(user_id: int) -> SelectOfScalar[str]:
+    """
+    用户有效权限名称的查询，也可作为子查询嵌入其他语句，省去单独读取权限的查询。
+    """
+    return (
+        select(Rule.name)
+        .join(UserPermission, col(UserPermission.rule_id) == Rule.id)
+        .where(UserPermission.user_id == user_id)
+    )
+
+
+def read_user_permissions(*, session: Session, user_id: int) -> Sequence[str]:
+    return session.exec(build_user_permissions_statement(user_id)).all()
+
+
+def build_user_permissions(*, session: Session, user: User) -> Sequence[str]:
+    """
+    根据用户的角色及规则计算有效权限，不读取 userpermission 表。
+    """
+    permissions = set()
+    if user.is_superuser:
+        for name in session.exec(select(Rule.name)).all():
+            permissions.add(name)
+    else:
+        for role in user.roles:
+            for permission in role.permissions:
+                permissions.add(permission.name)
+    return list(permissions)
+
+
+def check_user_permissions(
+    *, session: Session, user_ids: Sequence[int] | None = None
+) -> dict[int, tuple[set[str], set[str]]]:
+    """
+    对比 userpermission 表与实时计算的有效权限，
+    返回不一致的用户：用户ID -> (缺少的权限, 多余的权限)。
+    """
+    statement = select(User).options(
+        selectinload(User.roles).selectinload(Role.permissions)  # type: ignore[arg-type]
+    )
+    if user_ids is not None:
+        statement = statement.where(col(User.id).in_(user_ids))
+    materialized: dict[int, set[str]] = {}
+    permissions_statement = select(UserPermission.user_id, Rule.name).join(
+        Rule, col(Rule.id) == UserPermission.rule_id
+    )
+    if user_ids is not None:
+        permissions_statement = permissions_statement.where(
+            col(UserPermission.user_id).in_(user_ids)
+        )
+    for user_id, name in session.exec(permissions_statement).all():
+        materialized.setdefault(user_id, set()).add(name)
+
+    mismatches = {}
+    for user in session.exec(statement).all():
+        assert user.id is not None
+        expected = set(build_user_permissions(session=session, user=user))
+        actual = materialized.get(user.id, set())
+        if expected != actual:
+            mismatches[user.id] = (expected - actual, actual - expected)
+    return mismatches
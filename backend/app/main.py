@@ -1,21 +1,47 @@
-import json
-from collections.abc import Awaitable, Callable
-
-from fastapi import FastAPI, Request, Response
+import asyncio
+import contextlib
+import logging
+import secrets
+from collections.abc import AsyncGenerator, Sequence
+from contextlib import asynccontextmanager
+from typing import Annotated
+
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.openapi.docs import (
     get_swagger_ui_html,
     get_swagger_ui_oauth2_redirect_html,
 )
 from fastapi.routing import APIRoute
 from fastapi.utils import generate_unique_id
+from prometheus_client import CONTENT_TYPE_LATEST
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.cors import CORSMiddleware
-from starlette.responses import HTMLResponse
+from starlette.responses import HTMLResponse, JSONResponse
 
 from app.api.main import api_router
 from app.core.config import settings
+from app.core.db import (
+    async_engine,
+    async_replica_engine,
+    engine,
+    init_operation_log_partitions,
+)
+from app.core.invalidation import invalidation_listener
+from app.core.metrics import generate_metrics, mark_process_dead, metrics_sampler
+from app.core.middleware import (
+    AdmissionControlMiddleware,
+    OperationLogMiddleware,
+    SQLInstrumentationMiddleware,
+)
+from app.core.security import PasswordHashingBusy
+from app.core.write_behind import WriteBehindQueue
 from app.crud import operation_log as operation_log_crud
+from app.crud import refresh_token as refresh_token_crud
 from app.crud.rule import get_full_title
-from app.models.operation_log import OperationLogCreate
+from app.models.operation_log import OperationLog
+
+logger = logging.getLogger(__name__)
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -24,23 +50,100 @@ def custom_generate_unique_id(route: APIRoute) -> str:
     return generate_unique_id(route)
 
 
+def write_operation_logs(operation_logs: Sequence[OperationLog]) -> None:
+    # 在后台线程中解析标题，避免请求路径上的数据库查询
+    for log in operation_logs:
+        if log.title is None and log.name is not None:
+            log.title = get_full_title(log.name)
+    operation_log_crud.create_operation_logs(operation_logs)
+
+
+operation_log_queue = WriteBehindQueue(
+    write_operation_logs,
+    max_size=settings.OPERATION_LOG_QUEUE_MAX_SIZE,
+    batch_size=settings.OPERATION_LOG_BATCH_SIZE,
+    flush_interval=settings.OPERATION_LOG_FLUSH_INTERVAL,
+    overflow_policy=settings.OPERATION_LOG_OVERFLOW_POLICY,
+    sample_rate=settings.OPERATION_LOG_SAMPLE_RATE,
+)
+
+
+def maintain_operation_log_partitions() -> None:
+    with Session(engine) as session:
+        init_operation_log_partitions(session=session)
+
+
+def prune_refresh_tokens() -> None:
+    with Session(engine) as session:
+        pruned = refresh_token_crud.prune_refresh_tokens(session=session)
+    if pruned:
+        logger.info(f"Pruned {pruned} refresh tokens")
+
+
+async def run_operation_log_partition_maintenance() -> None:
+    while True:
+        try:
+            await run_in_threadpool(maintain_operation_log_partitions)
+        except Exception:
+            logger.exception("Failed to maintain operation log partitions")
+        await asyncio.sleep(settings.OPERATION_LOG_PARTITION_MAINTENANCE_INTERVAL)
+
+
+async def run_refresh_token_pruning() -> None:
+    while True:
+        try:
+            await run_in_threadpool(prune_refresh_tokens)
+        except Exception:
+            logger.exception("Failed to prune refresh tokens")
+        await asyncio.sleep(settings.REFRESH_TOKEN_PRUNE_INTERVAL)
+
+
+async def run_metrics_sampler() -> None:
+    while True:
+        try:
+            metrics_sampler.sample(operation_log_queue)
+        except Exception:
+            logger.exception("Failed to sample metrics")
+        await asyncio.sleep(settings.METRICS_SAMPLE_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncGenerator[None, None]:
+    await operation_log_queue.start()
+    partition_maintenance = asyncio.create_task(
+        run_operation_log_partition_maintenance()
+    )
+    # 每个工作进程监听缓存失效通知
+    cache_invalidation = asyncio.create_task(invalidation_listener.run())
+    metrics_sampling = asyncio.create_task(run_metrics_sampler())
+    refresh_token_pruning = asyncio.create_task(run_refresh_token_pruning())
+    yield
+    for task in [
+        partition_maintenance,
+        cache_invalidation,
+        metrics_sampling,
+        refresh_token_pruning,
+    ]:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    # 关闭时写入队列中剩余的操作日志
+    await operation_log_queue.stop()
+    await async_engine.dispose()
+    if async_replica_engine is not async_engine:
+        await async_replica_engine.dispose()
+    mark_process_dead()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
     docs_url=None,
     redoc_url=None,
+    lifespan=lifespan,
 )
-
-# Set all CORS enabled origins
-if settings.all_cors_origins:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=settings.all_cors_origins,
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
+app.state.operation_log_queue = operation_log_queue
 
 
 @app.get("/docs", include_in_schema=False)
@@ -62,51 +165,41 @@ async def swagger_ui_redirect() -> HTMLResponse:
     return get_swagger_ui_oauth2_redirect_html()
 
 
-@app.middleware("http")
-async def save_operation_log(
-    request: Request, call_next: Callable[[Request], Awaitable[Response]]
-) -> Response:
-    response = await call_next(request)
-
-    method, path = request.method, request.url.path
-    if path not in settings.LOG_EXCLUDE_PATHS and method != "OPTIONS":
-        # 获取用户信息
-        user = getattr(request.state, "user", None)
-        if user:
-            user_id, username = user.id, user.username
-        else:
-            user_id, username = None, None
-
-        # 获取标题
-        name, title = None, None
-        if path in settings.LOG_STATIC_PATHS.keys():
-            title = settings.LOG_STATIC_PATHS[path]
-            if title == "query_params.rule_name":
-                name = request.query_params.get("rule_name")
-                title = get_full_title(name)
-
-        else:
-            scopes = getattr(request.state, "scopes", [])
-            if scopes:
-                name = scopes[0]
-                title = get_full_title(name)
-
-        operation_log_crud.create_operation_log(
-            OperationLogCreate(
-                user_id=user_id,
-                username=username,
-                name=name,
-                title=title,
-                request_method=method,
-                request_path=path,
-                request_query_params=json.dumps(
-                    request.query_params._dict, ensure_ascii=False
-                ),
-                response_status_code=response.status_code,
-            )
-        )
-
-    return response
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(
+    _request: Request, _exc: PasswordHashingBusy
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service temporarily overloaded"},
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(authorization: Annotated[str | None, Header()] = None) -> Response:
+    # 指标与 API 使用相同的端口，需要令牌才能访问
+    if not settings.METRICS_TOKEN or not secrets.compare_digest(
+        authorization or "", f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        raise HTTPException(status_code=404)
+    metrics_sampler.sample(operation_log_queue)
+    return Response(generate_metrics(), media_type=CONTENT_TYPE_LATEST)
+
 
+app.add_middleware(SQLInstrumentationMiddleware)
+app.add_middleware(OperationLogMiddleware, queue=operation_log_queue)
+# 后注册的中间件先执行，拒绝的请求不经过其他中间件
+app.add_middleware(AdmissionControlMiddleware)
+# Set all CORS enabled origins
+# 最后注册，作为最外层中间件，拒绝请求的 503 响应也带有 CORS 响应头，浏览器可以读取并重试
+if settings.all_cors_origins:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.all_cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
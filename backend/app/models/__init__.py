@@ -1,7 +1,18 @@
 from sqlmodel import SQLModel
 
 # for 'alembic autogenerate' support
-from . import link, operation_log, role, rule, security, user  # noqa
+from . import (  # noqa
+    cache_version,
+    link,
+    operation_log,
+    refresh_token,
+    role,
+    rule,
+    security,
+    user,
+    user_activity,
+    user_permission,
+)
 
 
 # Generic message
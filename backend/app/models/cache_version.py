@@ -0,0 +1,7 @@
+from sqlmodel import Field, SQLModel
+
+
+# 缓存数据的版本号，数据变更时在同一事务中递增，各工作进程据此使缓存失效
+class CacheVersion(SQLModel, table=True):
+    name: str = Field(primary_key=True)
+    version: int = Field(default=0)
@@ -1,3 +1,4 @@
+import base64
 import uuid
 from collections.abc import Sequence
 from datetime import datetime
@@ -20,10 +21,13 @@ class OperationLogCreate(OperationLogBase):
     pass
 
 
+# 数据库中按 created_at 按月分区，主键为 (id, created_at)，见 alembic 迁移 3b1f5c7e9a2d。
+# 按 id 查询使用 crud.operation_log.get_operation_log
 class OperationLog(OperationLogBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(),
+        primary_key=True,
         sa_column_kwargs={"server_default": text("CURRENT_TIMESTAMP")},
         index=True,
     )
@@ -37,3 +41,19 @@ class OperationLogPublic(OperationLogBase):
 class OperationLogsPublic(SQLModel):
     data: Sequence[OperationLogPublic]
     total: int
+    # 为 True 时 total 为下限（超过计数上限或未计数）
+    total_capped: bool = Field(default=False)
+    next_cursor: str | None = Field(default=None)
+
+
+# 游标分页的位置，编码为不透明的字符串
+class OperationLogCursor(SQLModel):
+    created_at: datetime
+    id: uuid.UUID
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(self.model_dump_json().encode()).decode()
+
+    @classmethod
+    def decode(cls, cursor: str) -> "OperationLogCursor":
+        return cls.model_validate_json(base64.urlsafe_b64decode(cursor.encode()))
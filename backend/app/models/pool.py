@@ -0,0 +1,22 @@
+from sqlmodel import SQLModel
+
+
+class PoolMetricsPublic(SQLModel):
+    name: str
+    size: int
+    checked_out: int
+    overflow: int
+    # 正在等待获取连接的数量
+    waiting: int
+    wait_count: int
+    wait_seconds_sum: float
+    # 累计直方图，键为分桶上限（秒）
+    wait_seconds_buckets: dict[str, int]
+    timeouts: int
+    pre_ping_failures: int
+
+
+class PoolsMetricsPublic(SQLModel):
+    data: list[PoolMetricsPublic]
+    # 准入控制拒绝的请求数
+    rejected_requests: int
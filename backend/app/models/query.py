@@ -7,6 +7,11 @@ from sqlmodel import SQLModel
 class PaginationParams(SQLModel):
     skip: int = Query(1, ge=1, description="The number of pages to skip")
     limit: int = Query(10, ge=1, le=1000, description="The number of items to return")
+    with_total: bool | None = Query(
+        None,
+        description="Whether to count the total number of items, "
+        "defaults to true except for cursor pages",
+    )
 
 
 class OrderDirection(str, Enum):
@@ -0,0 +1,22 @@
+import uuid
+from datetime import datetime
+
+from sqlmodel import Field, SQLModel
+
+
+# 刷新令牌，只保存令牌的哈希。每次刷新时轮换，同一次登录轮换出的令牌属于同一个 family，
+# 已使用的令牌再次出现时视为泄露，撤销整个 family
+class RefreshToken(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", ondelete="CASCADE", index=True)
+    family_id: uuid.UUID = Field(index=True)
+    token_hash: str = Field(unique=True)
+    # 定期维护按过期时间和使用时间删除令牌
+    expires_at: datetime = Field(index=True)
+    used_at: datetime | None = Field(default=None, index=True)
+    revoked_at: datetime | None = Field(default=None, index=True)
+    created_at: datetime = Field(default_factory=lambda: datetime.now())
+
+
+class RefreshTokenRequest(SQLModel):
+    refresh_token: str
@@ -64,3 +64,5 @@ class RolePublic(RoleBase):
 class RolesPublic(SQLModel):
     data: Sequence[RolePublic]
     total: int
+    # 为 True 时 total 为下限（超过计数上限或未计数）
+    total_capped: bool = Field(default=False)
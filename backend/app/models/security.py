@@ -1,4 +1,3 @@
-from collections.abc import Sequence
 from enum import Enum
 
 from sqlmodel import SQLModel
@@ -8,12 +7,13 @@ from sqlmodel import SQLModel
 class Token(SQLModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: str | None = None
 
 
 # Contents of JWT token
 class TokenPayload(SQLModel):
     sub: str | None = None
-    scopes: Sequence[str] = []
+    scopes: frozenset[str] = frozenset()
 
 
 class Permission(SQLModel):
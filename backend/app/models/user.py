@@ -84,6 +84,8 @@ class UserPublic(UserBase):
 class UsersPublic(SQLModel):
     data: Sequence[UserPublic]
     total: int
+    # 为 True 时 total 为下限（超过计数上限或未计数）
+    total_capped: bool = Field(default=False)
 
 
 class UserMePublic(UserPublic):
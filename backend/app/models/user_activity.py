@@ -0,0 +1,19 @@
+from datetime import date
+
+from sqlmodel import Field, SQLModel
+
+
+# 用户每日活动汇总，随操作日志写入增量维护，供主页统计使用
+class UserDailyActivity(SQLModel, table=True):
+    user_id: int = Field(primary_key=True)
+    dt: date = Field(primary_key=True)
+    logins: int = Field(default=0)
+    operations: int = Field(default=0)
+
+
+# 用户每日各规则（菜单/权限）的成功操作次数
+class UserDailyMenuActivity(SQLModel, table=True):
+    user_id: int = Field(primary_key=True)
+    dt: date = Field(primary_key=True)
+    name: str = Field(primary_key=True)
+    count: int = Field(default=0)
@@ -0,0 +1,7 @@
+from sqlmodel import Field, SQLModel
+
+
+# 用户的有效权限（角色权限的并集，超级管理员为所有规则），由用户、角色及规则的 crud 维护
+class UserPermission(SQLModel, table=True):
+    user_id: int = Field(foreign_key="user.id", primary_key=True, ondelete="CASCADE")
+    rule_id: int = Field(foreign_key="rule.id", primary_key=True, ondelete="CASCADE")
@@ -1,7 +1,12 @@
+from unittest.mock import patch
+
+import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 
+from app.core import rate_limit
 from app.core.config import settings
+from app.core.rate_limit import login_ip_limiter, login_username_limiter
 from app.core.security import create_access_token
 from app.tests.utils.user import create_random_user
 from app.tests.utils.utils import random_lower_string
@@ -84,3 +89,110 @@ def test_access_token_with_inactive_user(client: TestClient, db: Session) -> Non
     msg = r.json()
     assert r.status_code == 400
     assert msg["detail"] == "Inactive user"
+
+
+def test_get_access_token_rate_limited_by_username(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(login_username_limiter, "capacity", 1)
+    login_data = {"username": random_lower_string(), "password": "incorrect"}
+
+    r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    assert r.status_code == 400
+    # 超出限流时不再校验密码
+    with patch("app.crud.security.verify_and_update_password") as verify_password:
+        r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) > 0
+    verify_password.assert_not_called()
+
+
+def test_get_access_token_rate_limited_by_forwarded_ip(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # TestClient 的地址作为受信任的代理
+    monkeypatch.setattr(
+        rate_limit, "is_trusted_proxy", lambda host: host == "testclient"
+    )
+    monkeypatch.setattr(login_ip_limiter, "capacity", 1)
+    first_ip, second_ip = "198.51.100.1", "198.51.100.2"
+
+    for client_ip, status_code in [
+        (first_ip, 400),
+        (first_ip, 429),
+        # 同一个代理之后的其他客户端不受影响
+        (second_ip, 400),
+    ]:
+        r = client.post(
+            f"{settings.API_V1_STR}/login/access-token",
+            # 每次使用不同的用户名，不触发按用户名的限流
+            data={"username": random_lower_string(), "password": "incorrect"},
+            headers={"X-Forwarded-For": client_ip},
+        )
+        assert r.status_code == status_code
+
+
+def _login(client: TestClient, username: str, password: str) -> dict[str, str]:
+    login_data = {"username": username, "password": password}
+    r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    assert r.status_code == 200
+    tokens: dict[str, str] = r.json()
+    return tokens
+
+
+def test_refresh_token(client: TestClient, db: Session) -> None:
+    password = random_lower_string()
+    user = create_random_user(db, password=password)
+    tokens = _login(client, user.username, password)
+    assert tokens["refresh_token"]
+
+    # 刷新时不校验密码
+    with patch("app.crud.security.verify_and_update_password") as verify_password:
+        r = client.post(
+            f"{settings.API_V1_STR}/login/refresh-token",
+            json={"refresh_token": tokens["refresh_token"]},
+        )
+    verify_password.assert_not_called()
+    assert r.status_code == 200
+    refreshed = r.json()
+    assert refreshed["refresh_token"] != tokens["refresh_token"]
+
+    r = client.post(
+        f"{settings.API_V1_STR}/login/test-token",
+        headers={"Authorization": f"Bearer {refreshed['access_token']}"},
+    )
+    assert r.status_code == 200
+    assert r.json()["username"] == user.username
+
+
+def test_refresh_token_reuse_revokes_family(client: TestClient, db: Session) -> None:
+    password = random_lower_string()
+    user = create_random_user(db, password=password)
+    tokens = _login(client, user.username, password)
+    r = client.post(
+        f"{settings.API_V1_STR}/login/refresh-token",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert r.status_code == 200
+    new_refresh_token = r.json()["refresh_token"]
+
+    # 重复使用已轮换的令牌，整个 family 被撤销
+    r = client.post(
+        f"{settings.API_V1_STR}/login/refresh-token",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert r.status_code == 401
+    assert r.json()["detail"] == "Invalid refresh token"
+    r = client.post(
+        f"{settings.API_V1_STR}/login/refresh-token",
+        json={"refresh_token": new_refresh_token},
+    )
+    assert r.status_code == 401
+
+
+def test_refresh_token_invalid(client: TestClient) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/login/refresh-token",
+        json={"refresh_token": random_lower_string()},
+    )
+    assert r.status_code == 401
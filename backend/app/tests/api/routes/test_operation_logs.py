@@ -1,11 +1,12 @@
 import time
 import uuid
+from datetime import datetime
 
 from fastapi.testclient import TestClient
 
 from app.core.config import settings
 from app.crud import operation_log as crud
-from app.models.operation_log import OperationLogCreate
+from app.models.operation_log import OperationLogCreate, OperationLogCursor
 from app.tests.utils.operation_log import create_random_operation_log
 from app.tests.utils.utils import random_lower_string
 
@@ -152,6 +153,66 @@ def test_read_operation_logs_with_error_order_params(
     assert msg["detail"] == "Invalid order field"
 
 
+def test_read_operation_logs_with_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    prefix = random_lower_string()[:12]
+    for _ in range(3):
+        crud.create_operation_log(
+            OperationLogCreate(username=settings.FIRST_SUPERUSER, title=prefix)
+        )
+
+    r = client.get(
+        f"{settings.API_V1_STR}/operation-logs/",
+        params={"quick_search": prefix, "limit": 2},
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    first_page = r.json()
+    assert first_page["next_cursor"]
+
+    r = client.get(
+        f"{settings.API_V1_STR}/operation-logs/",
+        params={
+            "quick_search": prefix,
+            "limit": 2,
+            "cursor": first_page["next_cursor"],
+        },
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    second_page = r.json()
+    assert len(second_page["data"]) == 1
+    assert second_page["next_cursor"] is None
+    ids = {log["id"] for log in first_page["data"] + second_page["data"]}
+    assert len(ids) == 3
+
+
+def test_read_operation_logs_with_invalid_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/operation-logs/",
+        params={"cursor": random_lower_string()},
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Invalid cursor"
+
+
+def test_read_operation_logs_with_cursor_and_order_params(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    cursor = OperationLogCursor(created_at=datetime.now(), id=uuid.uuid4())
+    r = client.get(
+        f"{settings.API_V1_STR}/operation-logs/",
+        params={"cursor": cursor.encode(), "order_by": "title"},
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Cursor pagination requires ordering by created_at"
+
+
 def test_delete_operation_log(
     client: TestClient, superuser_token_headers: dict[str, str]
 ) -> None:
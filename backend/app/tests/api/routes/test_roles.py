@@ -1,7 +1,11 @@
+import json
+
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 
 from app.core.config import settings
+from app.crud import role as crud
+from app.models.role import RoleCreate
 from app.tests.utils.role import create_random_role
 from app.tests.utils.utils import random_lower_string
 
@@ -242,3 +246,36 @@ def test_delete_role_not_enough_permissions(
     assert r.status_code == 401
     msg = r.json()
     assert msg["detail"] == "Not enough permissions"
+
+
+def test_delete_roles_by_common_search(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    prefix = random_lower_string()
+    for i in range(3):
+        crud.create_role(session=db, role_create=RoleCreate(name=f"{prefix}_{i}"))
+    r = client.delete(
+        f"{settings.API_V1_STR}/roles/",
+        headers=superuser_token_headers,
+        params={
+            "common_search": json.dumps(
+                [{"field": "name", "value": prefix, "operator": "LIKE"}]
+            )
+        },
+    )
+    assert r.status_code == 200
+    assert r.json()["message"] == "3 roles deleted successfully"
+    assert crud.get_role_by_name(session=db, name=f"{prefix}_0") is None
+
+
+def test_delete_roles_not_enough_permissions(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    role = create_random_role(db)
+    r = client.delete(
+        f"{settings.API_V1_STR}/roles/",
+        headers=normal_user_token_headers,
+        params={"ids": [role.id]},
+    )
+    assert r.status_code == 401
+    assert r.json()["detail"] == "Not enough permissions"
@@ -1,5 +1,7 @@
+import json
+
 from fastapi.testclient import TestClient
-from sqlmodel import Session, select
+from sqlmodel import Session, col, select
 
 from app.core.config import settings
 from app.core.security import verify_password
@@ -237,6 +239,35 @@ def test_update_user_me(client: TestClient, db: Session) -> None:
     assert user_db.full_name == full_name
 
 
+def test_update_user_invalidates_cached_principal(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    username = random_lower_string()
+    headers = authentication_token_from_username(
+        client=client,
+        username=username,
+        permissions=[f"{settings.API_V1_STR}/users/me:read"],
+        db=db,
+    )
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 200
+    hits = crud.principal_cache.hits
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 200
+    assert crud.principal_cache.hits == hits + 1
+
+    user_id = r.json()["id"]
+    r = client.put(
+        f"{settings.API_V1_STR}/users/{user_id}",
+        headers=superuser_token_headers,
+        json={"is_active": False},
+    )
+    assert r.status_code == 200
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Inactive user"
+
+
 def test_register_user(client: TestClient, db: Session) -> None:
     settings.OPEN_REGISTRATION = True
 
@@ -481,3 +512,99 @@ def test_get_user_operation_logs(
         headers=superuser_token_headers,
     )
     assert r.status_code == 200
+
+
+def test_delete_users_by_ids(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    users = [
+        crud.create_user(
+            session=db,
+            user_create=UserCreate(
+                username=random_lower_string(), password=random_lower_string()
+            ),
+        )
+        for _ in range(2)
+    ]
+    user_ids = [user.id for user in users]
+    r = client.delete(
+        f"{settings.API_V1_STR}/users/",
+        headers=superuser_token_headers,
+        params={"ids": user_ids},
+    )
+    assert r.status_code == 200
+    assert r.json()["message"] == "2 users deleted successfully"
+    result = db.exec(select(User).where(col(User.id).in_(user_ids))).all()
+    assert result == []
+
+
+def test_delete_users_by_common_search_skips_current_user(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    # 查询条件同时匹配当前用户和其他用户
+    user_ids = [
+        crud.create_user(
+            session=db,
+            user_create=UserCreate(
+                username=f"{settings.FIRST_SUPERUSER}_{random_lower_string()[:12]}",
+                password=random_lower_string(),
+            ),
+        ).id
+        for _ in range(2)
+    ]
+    statement = select(User.id).where(
+        col(User.username).like(f"%{settings.FIRST_SUPERUSER}%")
+    )
+    matched_count = len(db.exec(statement).all())
+    assert matched_count >= 3
+    r = client.delete(
+        f"{settings.API_V1_STR}/users/",
+        headers=superuser_token_headers,
+        params={
+            "common_search": json.dumps(
+                [
+                    {
+                        "field": "username",
+                        "value": settings.FIRST_SUPERUSER,
+                        "operator": "LIKE",
+                    }
+                ]
+            )
+        },
+    )
+    assert r.status_code == 200
+    assert r.json()["message"] == f"{matched_count - 1} users deleted successfully"
+    db.expire_all()
+    assert db.exec(select(User).where(col(User.id).in_(user_ids))).all() == []
+    current_user = crud.get_user_by_username(
+        session=db, username=settings.FIRST_SUPERUSER
+    )
+    assert current_user
+    assert db.exec(statement).all() == [current_user.id]
+
+
+def test_delete_users_requires_filter(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.delete(
+        f"{settings.API_V1_STR}/users/",
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "ids or common_search is required"
+
+
+def test_delete_users_current_user_error(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    super_user = crud.get_user_by_username(
+        session=db, username=settings.FIRST_SUPERUSER
+    )
+    assert super_user
+    r = client.delete(
+        f"{settings.API_V1_STR}/users/",
+        headers=superuser_token_headers,
+        params={"ids": [super_user.id]},
+    )
+    assert r.status_code == 403
+    assert r.json()["detail"] == "Users are not allowed to delete themselves"
@@ -0,0 +1,162 @@
+from collections.abc import Generator
+from typing import Any
+
+import pytest
+from fastapi import FastAPI, Request, Security
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api import deps
+from app.core.config import settings
+from app.core.db import async_engine
+from app.main import app
+from app.tests.utils.user import authentication_token_from_username
+from app.tests.utils.utils import get_superuser_token_headers
+
+READ_ROUTES = [
+    "read_operation_logs",
+    "read_operation_log_by_id",
+    "read_roles",
+    "read_role",
+    "read_users",
+    "read_user_by_id",
+    "read_user_operation_logs",
+]
+
+context_app = FastAPI()
+
+
+@context_app.get("/context")
+async def read_context(
+    request: Request,
+    context: deps.ReadContext = Security(deps.get_read_context, scopes=["user:list"]),
+) -> dict[str, Any]:
+    return {
+        "user_id": context.user.id,
+        "state_user_id": request.state.user.id,
+        "state_scopes": request.state.scopes,
+        "is_async": isinstance(context.session, AsyncSession),
+    }
+
+
+def dispose_async_engines(client: TestClient, *engines: AsyncEngine) -> None:
+    # 异步引擎的连接绑定事件循环，在客户端的事件循环中释放
+    assert client.portal is not None
+    for engine in engines:
+        client.portal.call(engine.dispose)
+
+
+@pytest.fixture
+def async_client(
+    monkeypatch: pytest.MonkeyPatch,
+) -> Generator[TestClient, None, None]:
+    monkeypatch.setattr(settings, "ASYNC_ROUTES", READ_ROUTES)
+    with TestClient(app) as c:
+        yield c
+        dispose_async_engines(c, async_engine)
+
+
+@pytest.fixture
+def async_statements() -> Generator[list[str], None, None]:
+    statements: list[str] = []
+
+    def before_cursor_execute(*args: Any) -> None:
+        statements.append(args[2])
+
+    event.listen(
+        async_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+    )
+    yield statements
+    event.remove(
+        async_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+    )
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/operation-logs/",
+        "/roles/",
+        "/users/",
+        "/users/operation-logs",
+    ],
+)
+def test_async_read_routes(
+    async_client: TestClient, async_statements: list[str], path: str
+) -> None:
+    headers = get_superuser_token_headers(async_client)
+    async_statements.clear()
+    r = async_client.get(f"{settings.API_V1_STR}{path}", headers=headers)
+    assert r.status_code == 200
+    assert "data" in r.json()
+    assert async_statements
+
+
+def test_async_read_by_id_routes(
+    async_client: TestClient, async_statements: list[str]
+) -> None:
+    headers = get_superuser_token_headers(async_client)
+    me = async_client.get(f"{settings.API_V1_STR}/users/me", headers=headers).json()
+    async_statements.clear()
+    r = async_client.get(f"{settings.API_V1_STR}/users/{me['id']}", headers=headers)
+    assert r.status_code == 200
+    assert r.json()["username"] == settings.FIRST_SUPERUSER
+    assert async_statements
+
+    r = async_client.get(f"{settings.API_V1_STR}/roles/0", headers=headers)
+    assert r.status_code == 404
+
+
+def test_async_read_routes_not_enough_permissions(
+    async_client: TestClient, db: Session
+) -> None:
+    headers = authentication_token_from_username(
+        client=async_client, username=settings.TEST_USER, db=db
+    )
+    r = async_client.get(f"{settings.API_V1_STR}/users/", headers=headers)
+    assert r.status_code == 401
+    assert r.json()["detail"] == "Not enough permissions"
+
+
+@pytest.mark.parametrize("is_async", [True, False])
+def test_read_context_sets_request_state(
+    monkeypatch: pytest.MonkeyPatch, is_async: bool
+) -> None:
+    if is_async:
+        monkeypatch.setattr(settings, "ASYNC_ROUTES", ["read_context"])
+    with TestClient(app) as client:
+        headers = get_superuser_token_headers(client)
+    with TestClient(context_app) as client:
+        r = client.get("/context", headers=headers)
+        dispose_async_engines(client, async_engine)
+    assert r.status_code == 200
+    data = r.json()
+    assert data["user_id"] == data["state_user_id"]
+    assert data["state_scopes"] == ["user:list"]
+    assert data["is_async"] is is_async
+
+
+def test_async_read_routes_use_replica(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "ASYNC_ROUTES", READ_ROUTES)
+    replica_engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+    async_replica_engine = create_async_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+    monkeypatch.setattr(deps, "replica_engine", replica_engine)
+    monkeypatch.setattr(deps, "async_replica_engine", async_replica_engine)
+    replica_statements: list[str] = []
+
+    def before_cursor_execute(*args: Any) -> None:
+        replica_statements.append(args[2])
+
+    event.listen(
+        async_replica_engine.sync_engine, "before_cursor_execute", before_cursor_execute
+    )
+    with TestClient(app) as client:
+        headers = get_superuser_token_headers(client)
+        r = client.get(f"{settings.API_V1_STR}/roles/", headers=headers)
+        dispose_async_engines(client, async_replica_engine, async_engine)
+    replica_engine.dispose()
+    assert r.status_code == 200
+    assert replica_statements
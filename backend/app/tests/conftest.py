@@ -7,12 +7,14 @@ from sqlmodel import Session
 
 from app.core.config import settings
 from app.core.db import engine, init_db
+from app.core.rate_limit import login_ip_limiter, login_username_limiter
 from app.main import app
 from app.models.link import RoleRuleLink, UserRoleLink
 from app.models.operation_log import OperationLog
 from app.models.role import Role
 from app.models.rule import Rule
 from app.models.user import User
+from app.models.user_activity import UserDailyActivity, UserDailyMenuActivity
 from app.tests.utils.user import authentication_token_from_username
 from app.tests.utils.utils import get_superuser_token_headers
 
@@ -34,9 +36,31 @@ def db() -> Generator[Session, None, None]:
         session.execute(statement)
         statement = delete(OperationLog)
         session.execute(statement)
+        statement = delete(UserDailyActivity)
+        session.execute(statement)
+        statement = delete(UserDailyMenuActivity)
+        session.execute(statement)
         session.commit()
 
 
+@pytest.fixture(scope="session", autouse=True)
+def strict_query_budget() -> Generator[None, None, None]:
+    # 请求执行的 SQL 语句数超出预算时测试失败
+    strict = settings.SQL_QUERY_BUDGET_STRICT
+    settings.SQL_QUERY_BUDGET_STRICT = True
+    yield
+    settings.SQL_QUERY_BUDGET_STRICT = strict
+
+
+@pytest.fixture(scope="session", autouse=True)
+def login_rate_limit() -> Generator[None, None, None]:
+    # 测试中频繁登录，放宽限流
+    capacities = login_ip_limiter.capacity, login_username_limiter.capacity
+    login_ip_limiter.capacity = login_username_limiter.capacity = 10000
+    yield
+    login_ip_limiter.capacity, login_username_limiter.capacity = capacities
+
+
 @pytest.fixture(scope="module")
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
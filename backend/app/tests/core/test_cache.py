@@ -0,0 +1,57 @@
+import time
+
+from app.core.cache import TTLCache, VersionedCache
+
+
+def test_ttl_cache_hits_and_misses() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=10, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_ttl_cache_expires() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.size == 0
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_delete_where() -> None:
+    cache: TTLCache[tuple[int, str], int] = TTLCache(max_size=10, ttl=60)
+    cache.set((1, "x"), 1)
+    cache.set((1, "y"), 2)
+    cache.set((2, "x"), 3)
+    cache.delete_where(lambda key: key[0] == 1)
+    assert cache.size == 1
+    assert cache.get((2, "x")) == 3
+
+
+def test_versioned_cache_clears_on_new_version() -> None:
+    cache: VersionedCache[str, int] = VersionedCache(max_size=10)
+    cache.set(1, "a", 1)
+    assert cache.get(1, "a") == 1
+    assert cache.get(2, "a") is None
+    cache.set(2, "b", 2)
+    assert cache.get(2, "a") is None
+    assert cache.get(2, "b") == 2
+
+
+def test_versioned_cache_ignores_stale_values() -> None:
+    cache: VersionedCache[str, int] = VersionedCache(max_size=10)
+    cache.set(2, "a", 2)
+    cache.set(1, "a", 1)
+    assert cache.get(2, "a") == 2
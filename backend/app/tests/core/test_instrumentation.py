@@ -0,0 +1,46 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.instrumentation import (
+    QueryBudgetExceeded,
+    QueryStats,
+    check_query_budget,
+)
+
+
+def test_query_stats_records_slowest_statement() -> None:
+    stats = QueryStats()
+    stats.record("SELECT 1", 0.002)
+    stats.record("SELECT 2", 0.005)
+    stats.record("SELECT 3", 0.001)
+
+    assert stats.count == 3
+    assert stats.slowest_statement == "SELECT 2"
+    assert stats.server_timing() == (
+        'db;dur=8.00;desc="3 queries", db-slowest;dur=5.00'
+    )
+
+
+def test_check_query_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "SQL_QUERY_BUDGET", None)
+    monkeypatch.setattr(settings, "SQL_QUERY_BUDGETS", {"read_users": 1})
+    stats = QueryStats(count=2)
+
+    check_query_budget("read_roles", stats)
+    with pytest.raises(QueryBudgetExceeded):
+        check_query_budget("read_users", stats)
+
+
+def test_request_reports_server_timing(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    r = client.get(f"{settings.API_V1_STR}/users/", headers=superuser_token_headers)
+    assert r.status_code == 200
+    assert r.headers["Server-Timing"].startswith("db;dur=")
+
+    monkeypatch.setattr(settings, "SQL_QUERY_BUDGETS", {"read_users": 0})
+    with pytest.raises(QueryBudgetExceeded):
+        client.get(f"{settings.API_V1_STR}/users/", headers=superuser_token_headers)
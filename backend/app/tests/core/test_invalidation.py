@@ -0,0 +1,94 @@
+import asyncio
+from collections.abc import Callable
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.core.invalidation import (
+    ALL_KEYS,
+    InvalidationListener,
+    dispatch_invalidation,
+    invalidation_listener,
+    register_invalidation_handler,
+)
+from app.tests.utils.utils import random_lower_string
+
+
+def _build_listener(channel: str) -> InvalidationListener:
+    return InvalidationListener(
+        conninfo=invalidation_listener.conninfo,
+        channel=channel,
+        reconnect_interval=0.1,
+        health_check_interval=0.1,
+    )
+
+
+async def _wait_for(condition: Callable[[], bool], timeout: float = 5) -> None:
+    async def wait() -> None:
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(wait(), timeout)
+
+
+def test_dispatch_invalidation() -> None:
+    name = random_lower_string()
+    keys: list[str] = []
+    register_invalidation_handler(name, keys.append)
+    dispatch_invalidation(name, "1")
+    dispatch_invalidation(name)
+    assert keys == ["1", ALL_KEYS]
+
+
+def test_listener_dispatches_after_commit() -> None:
+    name = random_lower_string()
+    channel = random_lower_string()
+    keys: list[str] = []
+    register_invalidation_handler(name, keys.append)
+    listener = _build_listener(channel)
+
+    async def run() -> None:
+        task = asyncio.create_task(listener.run())
+        # 连接后会清除所有缓存
+        await _wait_for(lambda: listener.connected and keys == [ALL_KEYS])
+
+        with Session(engine) as session:
+            session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": channel, "payload": f"{name}:1"},
+            )
+            await asyncio.sleep(0.2)
+            # 事务提交前不会送达
+            assert keys == [ALL_KEYS]
+            session.commit()
+        await _wait_for(lambda: keys == [ALL_KEYS, "1"])
+        task.cancel()
+
+    asyncio.run(run())
+    assert listener.connected is False
+
+
+def test_listener_reconnects() -> None:
+    name = random_lower_string()
+    channel = random_lower_string()
+    keys: list[str] = []
+    register_invalidation_handler(name, keys.append)
+    listener = _build_listener(channel)
+
+    async def run() -> None:
+        task = asyncio.create_task(listener.run())
+        await _wait_for(lambda: listener.connected and len(keys) == 1)
+        with Session(engine) as session:
+            session.execute(
+                text(
+                    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                    "WHERE application_name = :application_name"
+                ),
+                {"application_name": f"listen:{channel}"},
+            )
+        # 重新连接后再次清除所有缓存
+        await _wait_for(lambda: listener.connected and len(keys) == 2)
+        task.cancel()
+
+    asyncio.run(run())
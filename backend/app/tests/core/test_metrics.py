@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.cache import TTLCache, caches, register_cache
+from app.core.config import settings
+from app.core.metrics import MetricsSampler
+from app.main import operation_log_queue
+from app.tests.utils.utils import random_lower_string
+
+
+def test_sampler_increments_cache_counters_by_delta() -> None:
+    name = random_lower_string()
+    cache: TTLCache[str, int] = TTLCache(max_size=10, ttl=60)
+    register_cache(name, cache)
+    sampler = MetricsSampler()
+    try:
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+        sampler.sample(operation_log_queue)
+        cache.get("a")
+        sampler.sample(operation_log_queue)
+    finally:
+        del caches[name]
+
+    def sample(result: str) -> float | None:
+        return REGISTRY.get_sample_value(
+            "cache_requests_total", {"cache": name, "result": result}
+        )
+
+    assert sample("hit") == 2
+    assert sample("miss") == 1
+    assert REGISTRY.get_sample_value("cache_size", {"cache": name}) == 1
+
+
+def test_sampler_concurrent_samples_do_not_double_count() -> None:
+    name = random_lower_string()
+    cache: TTLCache[str, int] = TTLCache(max_size=10, ttl=60)
+    register_cache(name, cache)
+    sampler = MetricsSampler()
+
+    def sample_many() -> None:
+        for _ in range(50):
+            cache.get("a")
+            sampler.sample(operation_log_queue)
+
+    try:
+        # 模拟 /metrics 接口和定期采样同时执行
+        threads = [threading.Thread(target=sample_many) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        del caches[name]
+
+    assert (
+        REGISTRY.get_sample_value(
+            "cache_requests_total", {"cache": name, "result": "miss"}
+        )
+        == 200
+    )
+
+
+def test_metrics_reports_route_templates(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "metrics-token")
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=superuser_token_headers)
+    user_id = r.json()["id"]
+    client.get(
+        f"{settings.API_V1_STR}/users/{user_id}", headers=superuser_token_headers
+    )
+
+    r = client.get("/metrics", headers={"Authorization": "Bearer metrics-token"})
+    assert r.status_code == 200
+    assert (
+        'http_requests_total{method="GET",route="/api/v1/users/{id}",status="200"}'
+        in r.text
+    )
+    assert 'db_pool_connections{pool="primary",state="size"}' in r.text
+    assert 'cache_requests_total{cache="principal",result="hit"}' in r.text
+    assert "operation_log_queue_depth" in r.text
+
+
+def test_metrics_requires_token(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "metrics-token")
+    assert client.get("/metrics").status_code == 404
+    r = client.get("/metrics", headers={"Authorization": "Bearer incorrect"})
+    assert r.status_code == 404
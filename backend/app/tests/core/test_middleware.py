@@ -0,0 +1,51 @@
+import asyncio
+from collections.abc import AsyncGenerator, Sequence
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.middleware import OperationLogMiddleware
+from app.core.write_behind import WriteBehindQueue
+from app.models.operation_log import OperationLog
+
+
+def test_operation_log_middleware_passes_streaming_responses_through() -> None:
+    operation_logs: list[OperationLog] = []
+
+    def sink(batch: Sequence[OperationLog]) -> None:
+        operation_logs.extend(batch)
+
+    queue = WriteBehindQueue(sink, max_size=10, batch_size=10, flush_interval=0.01)
+    app = FastAPI()
+    app.add_middleware(OperationLogMiddleware, queue=queue)
+    chunks_sent: list[str] = []
+
+    @app.get("/stream")
+    async def stream(request: Request) -> StreamingResponse:
+        request.state.scopes = ["/api/v1/stream:read"]
+
+        async def generate() -> AsyncGenerator[str, None]:
+            for chunk in ["a", "b", "c"]:
+                chunks_sent.append(chunk)
+                yield chunk
+
+        return StreamingResponse(generate(), status_code=201)
+
+    async def run() -> httpx.Response:
+        await queue.start()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            response = await c.get("/stream", params={"q": "1"})
+        await queue.stop()
+        return response
+
+    response = asyncio.run(run())
+    assert response.status_code == 201
+    assert response.text == "abc"
+    assert chunks_sent == ["a", "b", "c"]
+    assert len(operation_logs) == 1
+    assert operation_logs[0].name == "/api/v1/stream:read"
+    assert operation_logs[0].request_path == "/stream"
+    assert operation_logs[0].request_query_params == '{"q": "1"}'
+    assert operation_logs[0].response_status_code == 201
@@ -0,0 +1,89 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import TimeoutError
+from sqlmodel import create_engine
+
+from app.core.config import settings
+from app.core.pool import (
+    InstrumentedQueuePool,
+    admission_control,
+    instrument_pool,
+    pool_metrics,
+)
+from app.tests.utils.utils import random_lower_string
+
+
+def test_pool_metrics_records_waits_and_timeouts() -> None:
+    name = random_lower_string()
+    engine = create_engine(
+        str(settings.SQLALCHEMY_DATABASE_URI),
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    instrument_pool(engine, name)
+    try:
+        with engine.connect():
+            with pytest.raises(TimeoutError):
+                engine.connect()
+            metrics = pool_metrics[name][1].snapshot(engine.pool)  # type: ignore[arg-type]
+        assert metrics.checked_out == 1
+        assert metrics.waiting == 0
+        assert metrics.wait_count == 2
+        assert metrics.timeouts == 1
+        assert metrics.wait_seconds_buckets["+Inf"] == 2
+        assert metrics.wait_seconds_buckets["30.0"] == 2
+
+        # dispose() 重建连接池后保留统计
+        engine.dispose()
+        with engine.connect():
+            pass
+        assert pool_metrics[name][1].wait_count == 3
+    finally:
+        del pool_metrics[name]
+        engine.dispose()
+
+
+def test_read_pool_metrics(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/pool-metrics/", headers=superuser_token_headers
+    )
+    assert r.status_code == 200
+    assert "primary" in [pool["name"] for pool in r.json()["data"]]
+
+    r = client.get(
+        f"{settings.API_V1_STR}/utils/pool-metrics/", headers=normal_user_token_headers
+    )
+    assert r.status_code == 403
+
+
+def test_admission_control_sheds_load(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # 模拟等待获取连接的请求数超过阈值
+    monkeypatch.setattr(admission_control, "max_waiting", -1)
+    rejected = admission_control.rejected
+
+    r = client.get(f"{settings.API_V1_STR}/users/", headers=superuser_token_headers)
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == str(settings.ADMISSION_RETRY_AFTER)
+    assert admission_control.rejected == rejected + 1
+
+    # 浏览器可以读取拒绝的响应
+    origin = settings.all_cors_origins[0]
+    r = client.get(
+        f"{settings.API_V1_STR}/users/",
+        headers={**superuser_token_headers, "Origin": origin},
+    )
+    assert r.status_code == 503
+    assert r.headers["Access-Control-Allow-Origin"] == origin
+
+    r = client.get(f"{settings.API_V1_STR}/utils/health-check/")
+    assert r.status_code == 200
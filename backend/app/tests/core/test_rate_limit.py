@@ -0,0 +1,49 @@
+import ipaddress
+import time
+
+import pytest
+
+from app.core import rate_limit
+from app.core.rate_limit import TokenBucketLimiter, get_client_ip
+
+
+def test_token_bucket_limiter_refills(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 100.0
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    limiter = TokenBucketLimiter(capacity=2, rate=0.5, max_keys=10)
+
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") == 2
+    # 其他键不受影响
+    assert limiter.acquire("b") == 0
+
+    now += 2
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") == 2
+    assert limiter.rejected == 2
+
+
+def test_token_bucket_limiter_evicts_least_recently_used_keys() -> None:
+    limiter = TokenBucketLimiter(capacity=1, rate=0, max_keys=2)
+    for key in ["a", "b", "c"]:
+        assert limiter.acquire(key) == 0
+    assert limiter.acquire("c") > 0
+    # "a" 已被淘汰，重新获得完整的令牌桶
+    assert limiter.acquire("a") == 0
+
+
+def test_get_client_ip_from_trusted_proxy(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        rate_limit, "trusted_proxies", [ipaddress.ip_network("172.16.0.0/12")]
+    )
+
+    # 不受信任的直接连接忽略 X-Forwarded-For
+    assert get_client_ip("203.0.113.9", "198.51.100.1") == "203.0.113.9"
+    assert get_client_ip("172.18.0.2", None) == "172.18.0.2"
+    assert get_client_ip("172.18.0.2", "198.51.100.1") == "198.51.100.1"
+    # 客户端伪造的最左侧地址被忽略，跳过受信任的代理
+    assert (
+        get_client_ip("172.18.0.2", "10.0.0.1, 198.51.100.1, 172.18.0.3")
+        == "198.51.100.1"
+    )
@@ -0,0 +1,49 @@
+import random
+
+import pytest
+from fastapi import Request
+from sqlmodel import Session
+
+from app.api import deps
+from app.core.config import settings
+from app.core.db import engine
+from app.core.invalidation import ALL_KEYS, dispatch_invalidation
+from app.core.replica import (
+    RECENT_WRITERS_NAME,
+    is_recent_writer,
+    mark_recent_write,
+)
+from app.core.security import create_access_token
+
+
+def _random_user_id() -> int:
+    return random.randint(10**8, 10**9)
+
+
+def _build_request(method: str) -> Request:
+    return Request({"type": "http", "method": method, "headers": []})
+
+
+def test_recent_write_notification_marks_user() -> None:
+    user_id = _random_user_id()
+    dispatch_invalidation(RECENT_WRITERS_NAME, ALL_KEYS)
+    assert is_recent_writer(user_id) is False
+
+    # 其他工作进程中用户写入后收到的通知
+    dispatch_invalidation(RECENT_WRITERS_NAME, str(user_id))
+    assert is_recent_writer(user_id) is True
+
+
+def test_use_replica_until_user_writes(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "POSTGRES_REPLICA_SERVER", "localhost")
+    monkeypatch.setattr(deps, "replica_engine", object())
+    user_id = _random_user_id()
+    token = create_access_token(user_id)
+
+    assert deps.use_replica(_build_request("GET"), token) is True
+    assert deps.use_replica(_build_request("POST"), token) is False
+
+    with Session(engine) as session:
+        mark_recent_write(session=session, user_id=user_id)
+    assert deps.use_replica(_build_request("GET"), token) is False
+    assert deps.use_replica(_build_request("GET"), create_access_token(1)) is True
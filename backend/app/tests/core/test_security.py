@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from app.core.config import settings
+from app.core.security import (
+    ApiPermissions,
+    PasswordHasher,
+    PasswordHashingBusy,
+    create_access_token,
+    decode_scopes,
+    decode_token,
+    encode_scopes,
+    get_token_scopes,
+)
+
+
+def test_password_hasher_rejects_when_saturated() -> None:
+    hasher = PasswordHasher(max_workers=1, max_pending=0)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_hash() -> str:
+        started.set()
+        release.wait(5)
+        return "hashed"
+
+    results: list[str] = []
+    thread = threading.Thread(target=lambda: results.append(hasher.run(slow_hash)))
+    thread.start()
+    started.wait(5)
+    with pytest.raises(PasswordHashingBusy):
+        hasher.run(str.upper, "password")
+    release.set()
+    thread.join(5)
+
+    assert results == ["hashed"]
+    assert hasher.run(str.upper, "password") == "PASSWORD"
+
+
+def test_compact_scopes_round_trip(monkeypatch: pytest.MonkeyPatch) -> None:
+    scopes = [
+        ApiPermissions.V1_USERS.value.read.name,
+        ApiPermissions.V1_OPERATION_LOGS.value.delete.name,
+        # 不在 oauth2_scopes 中的规则名称不编码
+        "menu",
+    ]
+    monkeypatch.setattr(settings, "COMPACT_TOKEN_SCOPES", True)
+    payload = decode_token(create_access_token(1, scopes=scopes))
+
+    assert "scopes" not in payload
+    assert len(payload["sb"]) < len(scopes[0])
+    assert get_token_scopes(payload) == frozenset(scopes[:2])
+    # 作用域注册表变化后旧的序号不再可信
+    assert get_token_scopes({**payload, "sv": "0"}) == frozenset()
+
+
+def test_token_scopes_fall_back_to_list() -> None:
+    scopes = [ApiPermissions.V1_USERS.value.read.name, "menu"]
+    payload = decode_token(create_access_token(1, scopes=scopes))
+    assert get_token_scopes(payload) == frozenset(scopes)
+    assert encode_scopes([]) == ""
+    assert decode_scopes("") == frozenset()
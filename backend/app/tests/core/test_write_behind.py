@@ -0,0 +1,101 @@
+import asyncio
+from collections.abc import Sequence
+
+from app.core.write_behind import OverflowPolicy, WriteBehindQueue
+
+
+def _build_queue(
+    written: list[int],
+    *,
+    max_size: int = 100,
+    batch_size: int = 10,
+    overflow_policy: OverflowPolicy = "drop_oldest",
+    sample_rate: float = 0.1,
+) -> WriteBehindQueue[int]:
+    def sink(batch: Sequence[int]) -> None:
+        written.extend(batch)
+
+    return WriteBehindQueue(
+        sink,
+        max_size=max_size,
+        batch_size=batch_size,
+        flush_interval=60,
+        overflow_policy=overflow_policy,
+        sample_rate=sample_rate,
+    )
+
+
+def test_write_behind_queue_drains_on_stop() -> None:
+    written: list[int] = []
+    queue = _build_queue(written)
+
+    async def run() -> None:
+        await queue.start()
+        for i in range(25):
+            await queue.put(i)
+        await queue.stop()
+
+    asyncio.run(run())
+
+    assert written == list(range(25))
+    assert queue.written == 25
+    assert queue.depth == 0
+
+
+def test_write_behind_queue_writes_directly_when_not_started() -> None:
+    written: list[int] = []
+    queue = _build_queue(written)
+
+    asyncio.run(queue.put(1))
+
+    assert written == [1]
+
+
+def test_write_behind_queue_drop_oldest() -> None:
+    written: list[int] = []
+    queue = _build_queue(written, max_size=3, batch_size=100)
+
+    async def run() -> None:
+        await queue.start()
+        for i in range(5):
+            await queue.put(i)
+        await queue.stop()
+
+    asyncio.run(run())
+
+    assert written == [2, 3, 4]
+    assert queue.dropped == 2
+
+
+def test_write_behind_queue_sample_drops_new_records() -> None:
+    written: list[int] = []
+    queue = _build_queue(
+        written, max_size=3, batch_size=100, overflow_policy="sample", sample_rate=0
+    )
+
+    async def run() -> None:
+        await queue.start()
+        for i in range(5):
+            await queue.put(i)
+        await queue.stop()
+
+    asyncio.run(run())
+
+    assert written == [0, 1, 2]
+    assert queue.dropped == 2
+
+
+def test_write_behind_queue_block_waits_for_flush() -> None:
+    written: list[int] = []
+    queue = _build_queue(written, max_size=2, batch_size=2, overflow_policy="block")
+
+    async def run() -> None:
+        await queue.start()
+        for i in range(6):
+            await queue.put(i)
+        await queue.stop()
+
+    asyncio.run(run())
+
+    assert written == list(range(6))
+    assert queue.dropped == 0
@@ -1,12 +1,29 @@
+import asyncio
 from datetime import datetime
 from typing import Any, cast
 
 import pytest
 from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import Session, col
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.crud.common import build_where_clause, handle_search_params
-from app.models.query import CommonSearchParam, Operator
-from app.models.user import User
+from app.core.db import async_engine
+from app.crud.common import (
+    build_order_by,
+    build_where_clause,
+    get_page,
+    get_page_async,
+    handle_search_params,
+)
+from app.crud.user import create_user
+from app.models.query import (
+    CommonSearchParam,
+    Operator,
+    OrderDirection,
+    PaginationParams,
+)
+from app.models.user import User, UserCreate
+from app.tests.utils.utils import count_queries, random_lower_string
 
 
 def _compiled(clause: ColumnElement[bool]) -> str:
@@ -105,3 +122,176 @@ def test_handle_search_params_builds_quick_and_common_search_clauses() -> None:
     assert "full_name LIKE '%alice%'" in compiled
     assert "is_active = true" in compiled
     assert "full_name LIKE '%Admin%'" in compiled
+
+
+def _create_users(db: Session, prefix: str, count: int) -> None:
+    for i in range(count):
+        user_create = UserCreate(username=f"{prefix}_{i}", password=prefix)
+        create_user(session=db, user_create=user_create)
+
+
+def test_get_page_returns_items_and_total(db: Session) -> None:
+    prefix = random_lower_string()[:12]
+    _create_users(db, prefix, 3)
+
+    users, total, total_capped = get_page(
+        session=db,
+        model_class=User,
+        where_clause=handle_search_params(User, prefix, ["username"]),
+        order_by=build_order_by(User, "username", OrderDirection.asc),
+        pagination=PaginationParams(skip=2, limit=2),
+    )
+
+    assert [user.username for user in users] == [f"{prefix}_2"]
+    assert total == 3
+    assert total_capped is False
+
+
+def test_get_page_counts_total_for_empty_page(db: Session) -> None:
+    prefix = random_lower_string()[:12]
+    _create_users(db, prefix, 2)
+
+    users, total, _ = get_page(
+        session=db,
+        model_class=User,
+        where_clause=handle_search_params(User, prefix, ["username"]),
+        order_by=build_order_by(User, "username", OrderDirection.asc),
+        pagination=PaginationParams(skip=5, limit=2),
+    )
+
+    assert users == []
+    assert total == 2
+
+
+def test_get_page_with_total_cap(db: Session) -> None:
+    prefix = random_lower_string()[:12]
+    _create_users(db, prefix, 3)
+
+    users, total, total_capped = get_page(
+        session=db,
+        model_class=User,
+        where_clause=handle_search_params(User, prefix, ["username"]),
+        order_by=build_order_by(User, "username", OrderDirection.asc),
+        pagination=PaginationParams(skip=1, limit=1),
+        total_cap=2,
+    )
+
+    assert len(users) == 1
+    assert total == 2
+    assert total_capped is True
+
+
+def test_get_page_without_total(db: Session) -> None:
+    prefix = random_lower_string()[:12]
+    _create_users(db, prefix, 3)
+
+    users, total, total_capped = get_page(
+        session=db,
+        model_class=User,
+        where_clause=handle_search_params(User, prefix, ["username"]),
+        order_by=build_order_by(User, "username", OrderDirection.asc),
+        pagination=PaginationParams(skip=1, limit=2, with_total=False),
+    )
+
+    assert len(users) == 2
+    assert total == 3
+    assert total_capped is True
+
+    users, total, total_capped = get_page(
+        session=db,
+        model_class=User,
+        where_clause=handle_search_params(User, prefix, ["username"]),
+        order_by=build_order_by(User, "username", OrderDirection.asc),
+        pagination=PaginationParams(skip=2, limit=2, with_total=False),
+    )
+
+    assert len(users) == 1
+    assert total == 3
+    # 未计数时总数始终为下限
+    assert total_capped is True
+
+
+def test_get_page_without_total_past_the_end(db: Session) -> None:
+    prefix = random_lower_string()[:12]
+    _create_users(db, prefix, 3)
+
+    users, total, total_capped = get_page(
+        session=db,
+        model_class=User,
+        where_clause=handle_search_params(User, prefix, ["username"]),
+        order_by=build_order_by(User, "username", OrderDirection.asc),
+        pagination=PaginationParams(skip=5, limit=2, with_total=False),
+    )
+
+    assert users == []
+    assert total == 0
+    assert total_capped is True
+
+
+def test_get_page_without_total_last_cursor_page(db: Session) -> None:
+    prefix = random_lower_string()[:12]
+    _create_users(db, prefix, 3)
+
+    users, total, total_capped = get_page(
+        session=db,
+        model_class=User,
+        where_clause=handle_search_params(User, prefix, ["username"]),
+        order_by=build_order_by(User, "username", OrderDirection.asc),
+        pagination=PaginationParams(skip=1, limit=2, with_total=False),
+        seek_clause=col(User.username) > f"{prefix}_0",
+    )
+
+    assert [user.username for user in users] == [f"{prefix}_1", f"{prefix}_2"]
+    # 不知道游标之前的行数，总数只是下限
+    assert total == 2
+    assert total_capped is True
+
+
+def test_get_page_cursor_page_skips_total_by_default(db: Session) -> None:
+    prefix = random_lower_string()[:12]
+    _create_users(db, prefix, 3)
+    kwargs: dict[str, Any] = {
+        "model_class": User,
+        "where_clause": handle_search_params(User, prefix, ["username"]),
+        "order_by": build_order_by(User, "username", OrderDirection.asc),
+        "seek_clause": col(User.username) > f"{prefix}_0",
+    }
+
+    with count_queries() as statements:
+        _, total, total_capped = get_page(
+            session=db, pagination=PaginationParams(skip=1, limit=2), **kwargs
+        )
+    assert "count(" not in statements[0]
+    assert (total, total_capped) == (2, True)
+
+    _, total, total_capped = get_page(
+        session=db,
+        pagination=PaginationParams(skip=1, limit=2, with_total=True),
+        **kwargs,
+    )
+    assert (total, total_capped) == (3, False)
+
+
+def test_get_page_async_matches_get_page(db: Session) -> None:
+    prefix = random_lower_string()[:12]
+    _create_users(db, prefix, 3)
+    kwargs: dict[str, Any] = {
+        "model_class": User,
+        "where_clause": handle_search_params(User, prefix, ["username"]),
+        "order_by": build_order_by(User, "username", OrderDirection.asc),
+        "pagination": PaginationParams(skip=1, limit=1),
+    }
+
+    async def get_page_with_async_session() -> tuple[list[str], int, bool]:
+        async with AsyncSession(async_engine) as session:
+            users, total, total_capped = await get_page_async(session=session, **kwargs)
+        # 连接绑定在当前事件循环上，结束前释放
+        await async_engine.dispose()
+        return [user.username for user in users], total, total_capped
+
+    users, total, total_capped = get_page(session=db, **kwargs)
+    assert asyncio.run(get_page_with_async_session()) == (
+        [user.username for user in users],
+        total,
+        total_capped,
+    )
@@ -1,8 +1,15 @@
+from datetime import date, datetime
+
+from sqlalchemy import text
 from sqlmodel import Session
 
 from app.core.db import engine
 from app.crud import operation_log as crud
-from app.models.operation_log import OperationLog, OperationLogCreate
+from app.models.operation_log import (
+    OperationLog,
+    OperationLogCreate,
+    OperationLogCursor,
+)
 from app.models.query import (
     CommonSearchParam,
     Operator,
@@ -30,7 +37,7 @@ def test_create_operation_log(db: Session) -> None:
     prefix = random_lower_string()[:12]
 
     operation_log = _create_operation_log(prefix, "created", 201)
-    db_operation_log = db.get(OperationLog, operation_log.id)
+    db_operation_log = crud.get_operation_log(session=db, id=operation_log.id)
 
     assert db_operation_log is not None
     assert db_operation_log.username == f"{prefix}_user"
@@ -81,11 +88,113 @@ def test_get_operation_logs_with_common_search() -> None:
     assert result.data[0].title == f"{prefix}_error"
 
 
+def test_get_operation_logs_with_cursor() -> None:
+    prefix = random_lower_string()[:12]
+    for suffix in ["a", "b", "c"]:
+        _create_operation_log(prefix, suffix, 200)
+
+    with Session(engine) as session:
+        first_page = crud.get_operation_logs(
+            session=session,
+            pagination=PaginationParams(skip=1, limit=2),
+            order_by="created_at",
+            order_direction=OrderDirection.desc,
+            quick_search=prefix,
+            common_search=[],
+        )
+        assert first_page.next_cursor is not None
+        second_page = crud.get_operation_logs(
+            session=session,
+            pagination=PaginationParams(skip=1, limit=2),
+            order_by="created_at",
+            order_direction=OrderDirection.desc,
+            quick_search=prefix,
+            common_search=[],
+            cursor=OperationLogCursor.decode(first_page.next_cursor),
+        )
+
+    assert [log.title for log in first_page.data] == [f"{prefix}_c", f"{prefix}_b"]
+    assert [log.title for log in second_page.data] == [f"{prefix}_a"]
+    assert second_page.next_cursor is None
+    # 按游标分页默认不计数，总数为下限
+    assert second_page.total == 1
+    assert second_page.total_capped is True
+    assert first_page.total == 3
+    assert first_page.total_capped is False
+
+
 def test_delete_operation_log(db: Session) -> None:
     operation_log = _create_operation_log(random_lower_string()[:12], "deleted", 204)
-    db_operation_log = db.get(OperationLog, operation_log.id)
+    db_operation_log = crud.get_operation_log(session=db, id=operation_log.id)
     assert db_operation_log is not None
 
     crud.delete_operation_log(session=db, operation_log=db_operation_log)
 
-    assert db.get(OperationLog, operation_log.id) is None
+    assert crud.get_operation_log(session=db, id=operation_log.id) is None
+
+
+def test_create_operation_logs(db: Session) -> None:
+    prefix = random_lower_string()[:12]
+    operation_logs = [
+        OperationLog.model_validate(
+            OperationLogCreate(username=f"{prefix}_user", title=f"{prefix}_{i}")
+        )
+        for i in range(3)
+    ]
+
+    crud.create_operation_logs(operation_logs)
+
+    for operation_log in operation_logs:
+        db_operation_log = crud.get_operation_log(session=db, id=operation_log.id)
+        assert db_operation_log is not None
+        assert db_operation_log.title == operation_log.title
+        assert db_operation_log.created_at == operation_log.created_at
+
+
+def test_operation_log_partition_creation_and_retention(db: Session) -> None:
+    operation_log = OperationLog.model_validate(
+        OperationLogCreate(username=random_lower_string()),
+        update={"created_at": datetime(2000, 1, 15)},
+    )
+    crud.create_operation_logs([operation_log])
+
+    name = crud.create_operation_log_partition(session=db, month=date(2000, 1, 1))
+    db.commit()
+    assert name == "operationlog_p200001"
+    partition = db.execute(
+        text("SELECT tableoid::regclass::text FROM operationlog WHERE id = :id"),
+        {"id": operation_log.id},
+    ).scalar()
+    assert partition == name
+
+    # 没有对应分区的过期数据写入兜底分区
+    default_operation_log = OperationLog.model_validate(
+        OperationLogCreate(username=random_lower_string()),
+        update={"created_at": datetime(2000, 2, 15)},
+    )
+    crud.create_operation_logs([default_operation_log])
+
+    dropped = crud.drop_expired_operation_log_partitions(
+        session=db, retention_months=12
+    )
+    db.commit()
+    assert name in dropped
+    assert date(2000, 1, 1) not in crud.get_operation_log_partitions(session=db)
+    assert crud.get_operation_log(session=db, id=operation_log.id) is None
+    assert crud.get_operation_log(session=db, id=default_operation_log.id) is None
+
+
+def test_maintain_operation_log_partitions_creates_future_partitions(
+    db: Session,
+) -> None:
+    crud.maintain_operation_log_partitions(session=db, months_ahead=2)
+
+    partitions = crud.get_operation_log_partitions(session=db)
+    today = date.today()
+    assert date(today.year, today.month, 1) in partitions
+    assert (
+        len(
+            [month for month in partitions if month >= date(today.year, today.month, 1)]
+        )
+        >= 3
+    )
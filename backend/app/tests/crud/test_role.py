@@ -1,11 +1,13 @@
 from sqlmodel import Session
 
+from app.core.db import engine
 from app.crud import role as crud
+from app.crud import user as user_crud
 from app.models.query import OrderDirection, PaginationParams
 from app.models.role import RoleCreate, RoleUpdate
 from app.tests.utils.rule import create_random_rule
 from app.tests.utils.user import create_random_user
-from app.tests.utils.utils import random_lower_string
+from app.tests.utils.utils import count_queries, random_lower_string
 
 
 def test_create_role_with_permissions_and_users(db: Session) -> None:
@@ -135,3 +137,106 @@ def test_role_update_with_empty_relationships_clears_links(db: Session) -> None:
     db.refresh(updated_role)
     assert updated_role.permissions == []
     assert updated_role.users == []
+
+
+def test_get_roles_query_count_is_independent_of_page_size(db: Session) -> None:
+    prefix = random_lower_string()[:12]
+    rule = create_random_rule(db)
+    user = create_random_user(db)
+    assert rule.id is not None
+    assert user.id is not None
+    for i in range(5):
+        crud.create_role(
+            session=db,
+            role_create=RoleCreate(
+                name=f"{prefix}_{i}", permissions=[rule.id], users=[user.id]
+            ),
+        )
+
+    for limit in [1, 5]:
+        # 使用新的会话，避免命中已加载的关联关系
+        with Session(engine) as session, count_queries() as statements:
+            result = crud.get_roles(
+                session=session,
+                pagination=PaginationParams(skip=1, limit=limit),
+                order_by="name",
+                order_direction=OrderDirection.asc,
+                quick_search=prefix,
+            )
+        assert len(result.data) == limit
+        assert all(role.permissions and role.users for role in result.data)
+        # 分页查询，及权限、用户各一条批量查询
+        assert len(statements) == 3
+
+
+def test_update_role_query_count_is_independent_of_member_count(db: Session) -> None:
+    rule = create_random_rule(db)
+    users = [create_random_user(db) for _ in range(6)]
+    user_ids = [user.id for user in users if user.id is not None]
+    assert rule.id is not None
+
+    counts = []
+    for members in [user_ids[:1], user_ids[1:]]:
+        role = crud.create_role(
+            session=db, role_create=RoleCreate(name=random_lower_string())
+        )
+        with Session(engine) as session, count_queries() as statements:
+            db_role = session.get(type(role), role.id)
+            assert db_role is not None
+            crud.update_role(
+                session=session,
+                db_role=db_role,
+                role_update=RoleUpdate(
+                    name=role.name, permissions=[rule.id], users=members
+                ),
+            )
+            assert {user.id for user in db_role.users} == set(members)
+        counts.append(len(statements))
+    # 校验ID、读取现有关联及写入差异均为批量语句
+    assert counts[0] == counts[1]
+
+
+def test_update_role_ignores_unknown_ids(db: Session) -> None:
+    rule = create_random_rule(db)
+    user = create_random_user(db)
+    assert rule.id is not None
+    assert user.id is not None
+    role = crud.create_role(
+        session=db, role_create=RoleCreate(name=random_lower_string())
+    )
+
+    updated_role = crud.update_role(
+        session=db,
+        db_role=role,
+        role_update=RoleUpdate(
+            name=role.name, permissions=[rule.id, 0], users=[user.id, 0]
+        ),
+    )
+
+    assert [permission.id for permission in updated_role.permissions] == [rule.id]
+    assert [role_user.id for role_user in updated_role.users] == [user.id]
+
+
+def test_delete_role_query_count_is_independent_of_member_count(db: Session) -> None:
+    rule = create_random_rule(db)
+    users = [create_random_user(db) for _ in range(4)]
+    user_ids = [user.id for user in users if user.id is not None]
+    assert rule.id is not None
+
+    counts = []
+    for members in [user_ids[:1], user_ids[1:]]:
+        role = crud.create_role(
+            session=db,
+            role_create=RoleCreate(
+                name=random_lower_string(), permissions=[rule.id], users=members
+            ),
+        )
+        with Session(engine) as session, count_queries() as statements:
+            db_role = session.get(type(role), role.id)
+            assert db_role is not None
+            crud.delete_role(session=session, role=db_role)
+        counts.append(len(statements))
+    # 不加载角色的权限及成员
+    assert counts[0] == counts[1]
+    for user in users:
+        assert user_crud.get_user_permissions(session=db, user=user) == []
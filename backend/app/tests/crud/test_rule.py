@@ -1,8 +1,13 @@
+import pytest
 from sqlmodel import Session
 
+from app.core.config import settings
+from app.core.db import engine
+from app.core.invalidation import invalidation_listener
 from app.crud import rule as crud
+from app.crud.cache_version import bump_cache_version, get_cache_version
 from app.models.rule import Rule, RuleCreate, RuleType, RuleUpdate
-from app.tests.utils.utils import random_lower_string
+from app.tests.utils.utils import count_queries, random_lower_string
 
 
 def _create_rule(
@@ -52,6 +57,25 @@ def test_get_rule_trees_returns_nested_rules(db: Session) -> None:
     assert any(child.id == child_id for child in parent.children)
 
 
+def test_build_rule_trees_uses_single_query(db: Session) -> None:
+    root_id = _create_rule(db, rule_type=RuleType.menu_dir)
+    parent_ids = [root_id]
+    for i in range(10):
+        parent_ids.append(_create_rule(db, parent_id=parent_ids[i // 2], weight=i))
+
+    for only_menus in [False, True]:
+        with Session(engine) as session, count_queries() as statements:
+            result = crud.build_rule_trees(session=session, only_menus=only_menus)
+        assert len(statements) == 1
+        assert result.data
+
+    result = crud.get_rule_trees(session=db)
+    root = next(rule for rule in result.data if rule.id == root_id)
+    assert root.children is not None
+    # 子节点按权重降序排列
+    assert [child.id for child in root.children] == [parent_ids[2], parent_ids[1]]
+
+
 def test_get_rule_trees_only_menus_returns_flat_menu_titles(db: Session) -> None:
     prefix = random_lower_string()[:12]
     parent_id = _create_rule(
@@ -153,6 +177,32 @@ def test_get_full_title(db: Session) -> None:
     assert crud.get_full_title(None) is None
 
 
+def test_get_full_title_reflects_rule_changes(db: Session) -> None:
+    prefix = random_lower_string()[:12]
+    parent_id = _create_rule(
+        db,
+        rule_type=RuleType.menu_dir,
+        title=f"{prefix}_parent",
+        name=f"{prefix}_parent",
+    )
+    child_id = _create_rule(
+        db, title=f"{prefix}_child", name=f"{prefix}_child", parent_id=parent_id
+    )
+    assert crud.get_full_title(f"{prefix}_child") == f"{prefix}_parent-{prefix}_child"
+
+    parent = db.get(Rule, parent_id)
+    assert parent is not None
+    crud.update_rule(
+        session=db, db_rule=parent, rule_update=RuleUpdate(title=f"{prefix}_renamed")
+    )
+    assert crud.get_full_title(f"{prefix}_child") == f"{prefix}_renamed-{prefix}_child"
+
+    child = db.get(Rule, child_id)
+    assert child is not None
+    crud.delete_rule(session=db, rule=child)
+    assert crud.get_full_title(f"{prefix}_child") == ""
+
+
 def test_delete_rule_removes_rule_and_links(db: Session) -> None:
     rule_id = _create_rule(db)
     rule = db.get(Rule, rule_id)
@@ -161,3 +211,66 @@ def test_delete_rule_removes_rule_and_links(db: Session) -> None:
     crud.delete_rule(session=db, rule=rule)
 
     assert db.get(Rule, rule_id) is None
+
+
+def test_get_rule_trees_is_cached_by_rules_version(db: Session) -> None:
+    crud.get_rule_trees(session=db)
+    with count_queries() as statements:
+        crud.get_rule_trees(session=db)
+    assert statements == []
+
+    rule_id = _create_rule(db)
+    result = crud.get_rule_trees(session=db)
+    assert any(rule.id == rule_id for rule in result.data)
+
+
+def test_get_rule_trees_notices_version_bump_from_other_process(db: Session) -> None:
+    crud.get_rule_trees(session=db)
+    # 模拟其他工作进程修改了规则：只递增版本号，本进程的已知版本号过期
+    bump_cache_version(session=db, name=crud.RULES_CACHE_NAME)
+    db.commit()
+    crud.invalidate_rules_version()
+
+    with count_queries() as statements:
+        crud.get_rule_trees(session=db)
+    # 读取版本号并重新构建
+    assert len(statements) == 2
+
+
+def test_get_rules_version_discards_version_read_during_invalidation(
+    db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    crud.invalidate_rules_version()
+    version = crud.get_rules_version(session=db)
+    crud.invalidate_rules_version()
+
+    def get_cache_version_then_invalidate(*, session: Session, name: str) -> int:
+        result = get_cache_version(session=session, name=name)
+        # 读取版本号后、保存之前收到了失效通知
+        bump_cache_version(session=db, name=crud.RULES_CACHE_NAME)
+        db.commit()
+        crud.invalidate_rules_version()
+        return result
+
+    monkeypatch.setattr(crud, "get_cache_version", get_cache_version_then_invalidate)
+    monkeypatch.setattr(invalidation_listener, "connected", True)
+    assert crud.get_rules_version(session=db) == version
+    monkeypatch.setattr(crud, "get_cache_version", get_cache_version)
+
+    # 读到的旧版本号没有被保存，下次读取到新版本号
+    assert crud.get_rules_version(session=db) == version + 1
+
+
+def test_get_rules_version_rechecks_while_listener_connected(
+    db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(invalidation_listener, "connected", True)
+    crud.invalidate_rules_version()
+    version = crud.get_rules_version(session=db)
+    # 其他工作进程修改了规则，但本进程没有收到通知
+    bump_cache_version(session=db, name=crud.RULES_CACHE_NAME)
+    db.commit()
+    assert crud.get_rules_version(session=db) == version
+
+    monkeypatch.setattr(settings, "RULE_CACHE_VERSION_MAX_AGE", 0)
+    assert crud.get_rules_version(session=db) == version + 1
@@ -1,11 +1,23 @@
+from datetime import datetime, timedelta
+
 from fastapi.encoders import jsonable_encoder
-from sqlmodel import Session
+from passlib.hash import bcrypt
+from sqlmodel import Session, col, select
 
-from app.core.security import verify_password
+from app.core.config import settings
+from app.core.db import engine
+from app.core.invalidation import dispatch_invalidation
+from app.core.security import ApiPermissions, verify_password
+from app.crud import operation_log as operation_log_crud
+from app.crud import refresh_token as refresh_token_crud
 from app.crud import security as security_crud
 from app.crud import user as user_crud
-from app.models.user import User, UserCreate, UserUpdate
-from app.tests.utils.utils import random_lower_string
+from app.models.operation_log import OperationLog, OperationLogCreate
+from app.models.query import OrderDirection, PaginationParams
+from app.models.refresh_token import RefreshToken
+from app.models.user import User, UserCreate, UserHome, UserUpdate
+from app.tests.utils.role import create_random_role
+from app.tests.utils.utils import count_queries, random_lower_string
 
 
 def test_create_user(db: Session) -> None:
@@ -29,6 +41,28 @@ def test_authenticate_user(db: Session) -> None:
     assert user.username == authenticated_user.username
 
 
+def test_authenticate_user_rehashes_password_with_different_rounds(
+    db: Session,
+) -> None:
+    username = random_lower_string()
+    password = random_lower_string()
+    user_in = UserCreate(username=username, password=password)
+    user = user_crud.create_user(session=db, user_create=user_in)
+    # 按旧的 cost 计算的哈希
+    user.hashed_password = bcrypt.using(rounds=4).hash(password)
+    db.add(user)
+    db.commit()
+
+    authenticated_user = security_crud.authenticate(
+        session=db, username=username, password=password
+    )
+    assert authenticated_user
+    assert authenticated_user.hashed_password.startswith(
+        f"$2b${settings.BCRYPT_ROUNDS:02d}$"
+    )
+    assert verify_password(password, authenticated_user.hashed_password)
+
+
 def test_not_authenticate_user(db: Session) -> None:
     username = random_lower_string()
     password = random_lower_string()
@@ -92,3 +126,240 @@ def test_update_user(db: Session) -> None:
     assert user_2
     assert user.username == user_2.username
     assert verify_password(new_password, user_2.hashed_password)
+
+
+def test_update_user_password_revokes_refresh_tokens(db: Session) -> None:
+    user_in = UserCreate(username=random_lower_string(), password=random_lower_string())
+    user = user_crud.create_user(session=db, user_create=user_in)
+    assert user.id is not None
+    token = refresh_token_crud.create_refresh_token(session=db, user_id=user.id)
+    db.commit()
+
+    user_crud.update_user(
+        session=db,
+        db_user=user,
+        user_update=UserUpdate(password=random_lower_string()),
+    )
+    assert refresh_token_crud.rotate_refresh_token(session=db, token=token) is None
+
+
+def test_rotate_refresh_token_inactive_user(db: Session) -> None:
+    user_in = UserCreate(username=random_lower_string(), password=random_lower_string())
+    user = user_crud.create_user(session=db, user_create=user_in)
+    assert user.id is not None
+    token = refresh_token_crud.create_refresh_token(session=db, user_id=user.id)
+    user.is_active = False
+    db.add(user)
+    db.commit()
+
+    assert refresh_token_crud.rotate_refresh_token(session=db, token=token) is None
+    db.rollback()
+    # 已禁用用户的令牌不会被标记为已使用
+    db_token = db.exec(
+        select(RefreshToken).where(
+            RefreshToken.token_hash == refresh_token_crud.hash_refresh_token(token)
+        )
+    ).one()
+    assert db_token.used_at is None
+
+
+def test_prune_refresh_tokens(db: Session) -> None:
+    user_in = UserCreate(username=random_lower_string(), password=random_lower_string())
+    user = user_crud.create_user(session=db, user_create=user_in)
+    assert user.id is not None
+    tokens = [
+        refresh_token_crud.create_refresh_token(session=db, user_id=user.id)
+        for _ in range(4)
+    ]
+    db.commit()
+    db_tokens = [
+        db.exec(
+            select(RefreshToken).where(
+                RefreshToken.token_hash == refresh_token_crud.hash_refresh_token(token)
+            )
+        ).one()
+        for token in tokens
+    ]
+    expired, used, revoked, valid = db_tokens
+    long_ago = datetime.now() - timedelta(
+        days=settings.REFRESH_TOKEN_REUSE_DETECTION_DAYS + 1
+    )
+    expired.expires_at = datetime.now() - timedelta(seconds=1)
+    used.used_at = long_ago
+    revoked.revoked_at = long_ago
+    valid.used_at = datetime.now()
+    db.add_all(db_tokens)
+    db.commit()
+    token_ids = [db_token.id for db_token in db_tokens]
+
+    assert refresh_token_crud.prune_refresh_tokens(session=db) >= 3
+    remaining = db.exec(
+        select(RefreshToken.id).where(col(RefreshToken.id).in_(token_ids))
+    ).all()
+    assert remaining == [valid.id]
+
+
+def test_get_users_query_count_is_independent_of_page_size(db: Session) -> None:
+    prefix = random_lower_string()[:12]
+    role = create_random_role(db)
+    assert role.id is not None
+    for i in range(5):
+        user_in = UserCreate(
+            username=f"{prefix}_{i}", password=random_lower_string(), roles=[role.id]
+        )
+        user_crud.create_user(session=db, user_create=user_in)
+
+    for limit in [1, 5]:
+        # 使用新的会话，避免命中已加载的关联关系
+        with Session(engine) as session, count_queries() as statements:
+            result = user_crud.get_users(
+                session=session,
+                pagination=PaginationParams(skip=1, limit=limit),
+                order_by="username",
+                order_direction=OrderDirection.asc,
+                quick_search=prefix,
+                common_search=[],
+            )
+        assert len(result.data) == limit
+        assert all(user.roles for user in result.data)
+        # 分页查询及角色的批量查询
+        assert len(statements) == 2
+
+
+def _create_user_logs(user: User) -> list[OperationLog]:
+    rules_read = ApiPermissions.V1_RULES.value.read.name
+    operation_logs = []
+    for days, path, name, status_code in [
+        (0, f"{settings.API_V1_STR}/login/access-token", None, 200),
+        (0, f"{settings.API_V1_STR}/rules/", rules_read, 200),
+        (3, f"{settings.API_V1_STR}/rules/", rules_read, 200),
+        (3, f"{settings.API_V1_STR}/rules/", rules_read, 500),
+        (10, f"{settings.API_V1_STR}/login/access-token", None, 200),
+        (10, f"{settings.API_V1_STR}/users/home", "/api/v1/users/home:read", 200),
+        (40, f"{settings.API_V1_STR}/rules/", rules_read, 200),
+        # 没有请求路径的日志不计入常用功能
+        (3, None, rules_read, 200),
+    ]:
+        operation_logs.append(
+            OperationLog.model_validate(
+                OperationLogCreate(
+                    user_id=user.id,
+                    username=user.username,
+                    name=name,
+                    request_path=path,
+                    response_status_code=status_code,
+                ),
+                update={"created_at": datetime.now() - timedelta(days=days)},
+            )
+        )
+    operation_log_crud.create_operation_logs(operation_logs)
+    return operation_logs
+
+
+def _sorted_home(home: UserHome) -> UserHome:
+    menus = sorted(home.menus or [], key=lambda menu: (menu.menu, menu.count))
+    return home.model_copy(update={"menus": menus})
+
+
+def test_get_user_home_from_rollups_matches_logs(db: Session) -> None:
+    user_in = UserCreate(
+        username=random_lower_string(),
+        password=random_lower_string(),
+        is_superuser=True,
+    )
+    user = user_crud.create_user(session=db, user_create=user_in)
+    _create_user_logs(user)
+
+    from_rollups = user_crud.get_user_home_from_rollups(session=db, user=user)
+    from_logs = user_crud.get_user_home_from_logs(session=db, user=user)
+
+    assert from_rollups.logins_1w == 1
+    assert from_rollups.previous_logins_1w == 1
+    assert from_rollups.operations_1m == 7
+    assert from_rollups.previous_operations_1m == 1
+    assert _sorted_home(from_rollups) == _sorted_home(from_logs)
+
+
+def test_get_user_home_from_rollups_reads_permissions_in_menus_query(
+    db: Session,
+) -> None:
+    user_in = UserCreate(username=random_lower_string(), password=random_lower_string())
+    user = user_crud.create_user(session=db, user_create=user_in)
+
+    with count_queries() as statements:
+        user_crud.get_user_home_from_rollups(session=db, user=user)
+
+    assert len(statements) == 2
+    assert "userpermission" in statements[-1]
+
+
+def test_delete_operation_log_updates_user_home(db: Session) -> None:
+    user_in = UserCreate(username=random_lower_string(), password=random_lower_string())
+    user = user_crud.create_user(session=db, user_create=user_in)
+    operation_logs = _create_user_logs(user)
+
+    db_operation_log = operation_log_crud.get_operation_log(
+        session=db, id=operation_logs[0].id
+    )
+    assert db_operation_log is not None
+    operation_log_crud.delete_operation_log(session=db, operation_log=db_operation_log)
+
+    home = user_crud.get_user_home_from_rollups(session=db, user=user)
+    assert home.logins_1w == 0
+    assert home.operations_1w == 4
+
+
+def test_get_user_rules_is_shared_by_permission_set(db: Session) -> None:
+    role = create_random_role(db)
+    assert role.id is not None
+    users = [
+        user_crud.create_user(
+            session=db,
+            user_create=UserCreate(
+                username=random_lower_string(),
+                password=random_lower_string(),
+                roles=[role.id],
+            ),
+        )
+        for _ in range(2)
+    ]
+
+    rules = user_crud.get_user_rules(session=db, user=users[0])
+    assert user_crud.get_user_rules(session=db, user=users[1]) is rules
+
+
+def test_principal_snapshot_excludes_hashed_password(db: Session) -> None:
+    password = random_lower_string()
+    user = user_crud.create_user(
+        session=db,
+        user_create=UserCreate(username=random_lower_string(), password=password),
+    )
+    assert user.id is not None
+    user_crud.get_principal(session=db, user_id=user.id, token="token")
+    snapshot = user_crud.principal_cache.get((user.id, "token"))
+    assert snapshot is not None
+    assert "hashed_password" not in snapshot
+
+    # 从快照构造的用户按需从数据库加载密码哈希
+    with Session(engine) as session:
+        principal = user_crud.get_principal(
+            session=session, user_id=user.id, token="token"
+        )
+        assert principal is not None
+        assert verify_password(password, principal.hashed_password)
+
+
+def test_principal_invalidation_notification_evicts_cache(db: Session) -> None:
+    user = user_crud.create_user(
+        session=db,
+        user_create=UserCreate(
+            username=random_lower_string(), password=random_lower_string()
+        ),
+    )
+    assert user.id is not None
+    user_crud.get_principal(session=db, user_id=user.id, token="token")
+    assert user_crud.principal_cache.get((user.id, "token")) is not None
+
+    # 其他工作进程修改用户后收到的通知
+    dispatch_invalidation(user_crud.PRINCIPALS_CACHE_NAME, str(user.id))
+    assert user_crud.principal_cache.get((user.id, "token")) is None
@@ -0,0 +1,92 @@
+from sqlmodel import Session, col, delete
+
+from app.crud import role as role_crud
+from app.crud import rule as rule_crud
+from app.crud import user as user_crud
+from app.crud import user_permission as crud
+from app.models.role import RoleCreate, RoleUpdate
+from app.models.user import UserUpdate
+from app.models.user_permission import UserPermission
+from app.tests.utils.rule import create_random_rule
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import count_queries, random_lower_string
+
+
+def test_user_permissions_follow_role_changes(db: Session) -> None:
+    rule = create_random_rule(db)
+    other_rule = create_random_rule(db)
+    user = create_random_user(db)
+    assert rule.id is not None
+    assert other_rule.id is not None
+    assert user.id is not None
+    assert user_crud.get_user_permissions(session=db, user=user) == []
+
+    role = role_crud.create_role(
+        session=db,
+        role_create=RoleCreate(
+            name=random_lower_string(), permissions=[rule.id], users=[user.id]
+        ),
+    )
+    assert user_crud.get_user_permissions(session=db, user=user) == [rule.name]
+
+    role_crud.update_role(
+        session=db,
+        db_role=role,
+        role_update=RoleUpdate(
+            name=role.name, permissions=[other_rule.id], users=[user.id]
+        ),
+    )
+    assert user_crud.get_user_permissions(session=db, user=user) == [other_rule.name]
+
+    rule_crud.delete_rule(session=db, rule=other_rule)
+    assert user_crud.get_user_permissions(session=db, user=user) == []
+
+    role_crud.update_role(
+        session=db,
+        db_role=role,
+        role_update=RoleUpdate(name=role.name, permissions=[rule.id], users=[user.id]),
+    )
+    role_crud.delete_role(session=db, role=role)
+    assert user_crud.get_user_permissions(session=db, user=user) == []
+    assert crud.check_user_permissions(session=db, user_ids=[user.id]) == {}
+
+
+def test_superuser_permissions_include_new_rules(db: Session) -> None:
+    user = create_random_user(db)
+    assert user.id is not None
+    user_crud.update_user(
+        session=db, db_user=user, user_update=UserUpdate(is_superuser=True)
+    )
+    rule = create_random_rule(db)
+
+    permissions = user_crud.get_user_permissions(session=db, user=user)
+    assert rule.name in permissions
+    assert sorted(permissions) == sorted(
+        crud.build_user_permissions(session=db, user=user)
+    )
+
+    with count_queries() as statements:
+        user_crud.get_user_permissions(session=db, user=user)
+    assert len(statements) == 1
+
+
+def test_check_user_permissions_detects_and_fixes_drift(db: Session) -> None:
+    rule = create_random_rule(db)
+    user = create_random_user(db)
+    assert rule.id is not None
+    assert user.id is not None
+    role_crud.create_role(
+        session=db,
+        role_create=RoleCreate(
+            name=random_lower_string(), permissions=[rule.id], users=[user.id]
+        ),
+    )
+    db.execute(delete(UserPermission).where(col(UserPermission.user_id) == user.id))
+    db.commit()
+
+    assert crud.check_user_permissions(session=db, user_ids=[user.id]) == {
+        user.id: ({rule.name}, set())
+    }
+    crud.refresh_user_permissions(session=db, user_ids=[user.id])
+    db.commit()
+    assert crud.check_user_permissions(session=db, user_ids=[user.id]) == {}
@@ -1,9 +1,15 @@
 import random
 import string
+import threading
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Any
 
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 
 from app.core.config import settings
+from app.core.db import engine
 
 
 def random_lower_string() -> str:
@@ -20,3 +26,24 @@ def get_superuser_token_headers(client: TestClient) -> dict[str, str]:
     a_token = tokens["access_token"]
     headers = {"Authorization": f"Bearer {a_token}"}
     return headers
+
+
+@contextmanager
+def count_queries() -> Generator[list[str], None, None]:
+    """
+    记录当前线程执行的 SQL 语句，不包括后台线程（如操作日志写入）的语句。
+    """
+    statements: list[str] = []
+    thread_id = threading.get_ident()
+
+    def before_cursor_execute(
+        _conn: Any, _cursor: Any, statement: str, *_: Any
+    ) -> None:
+        if threading.get_ident() == thread_id:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
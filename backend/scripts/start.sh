@@ -0,0 +1,10 @@
+#! /usr/bin/env bash
+
+set -e
+
+# 多个工作进程通过该目录汇总 Prometheus 指标，启动前清空上次运行留下的文件
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+exec fastapi run --workers "${WORKERS:-4}" app/main.py